@@ -0,0 +1,201 @@
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from manifest_store import ManifestConflictError
+from storage_backend import open_project_store
+from task_batch import TaskBatch
+from task_worker import TaskWorker
+
+# Standarddauer einer Lease; muss länger sein als der langsamste Handler
+LEASE_SECONDS = 300
+
+
+def lease_deadline(seconds: float, now: Optional[datetime] = None) -> str:
+    """Ablaufzeitpunkt einer Lease im Zeitstempel-Format des Manifests"""
+    return ((now or datetime.now()) + timedelta(seconds=seconds)).isoformat(timespec='seconds') + 'Z'
+
+
+def lease_expired(task: Mapping[str, Any], now: Optional[datetime] = None) -> bool:
+    """Prüft, ob die Lease einer übernommenen Aufgabe abgelaufen ist (Worker abgestürzt)"""
+    expires = task.get('lease_expires')
+    if not task.get('claimed_by') or not expires:
+        return False
+    try:
+        return datetime.fromisoformat(expires.rstrip('Z')) <= (now or datetime.now())
+    except ValueError:
+        return True
+
+
+class LeasedTaskWorker(TaskWorker):
+    """
+    Arbeitsschleife mit Leases für den parallelen Betrieb mehrerer Prozesse
+    Eine Aufgabe wird vor der Bearbeitung bedingt übernommen (status, claimed_by, lease_expires
+    müssen unverändert sein); nur ein Worker gewinnt. Aufgaben mit abgelaufener Lease werden
+    erneut vergeben. Der Abschluss schreibt nur, solange die Lease noch dem Worker gehört.
+    """
+
+    def __init__(self, store, ai_name: str, worker_id: str, lease_seconds: float = LEASE_SECONDS, **kwargs):
+        super().__init__(store, ai_name, **kwargs)
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost_claims = 0
+
+    def next_task(self) -> Optional[Mapping[str, Any]]:
+        """Nächste offene Aufgabe, sonst eine Aufgabe mit abgelaufener Lease"""
+        task = super().next_task()
+        return task if task is not None else self.expired_task()
+
+    def expired_task(self) -> Optional[Mapping[str, Any]]:
+        """Erste übernommene Aufgabe mit registriertem Handler, deren Lease abgelaufen ist"""
+        now = datetime.now()
+        for task in self.store.iter_tasks(status='in_progress'):
+            if task.get('task_id') in self._skipped or self.registry.handler_for(task) is None:
+                continue
+            if lease_expired(task, now):
+                return task
+        return None
+
+    def claim(self, task: Mapping[str, Any]) -> Optional[Mapping[str, Any]]:
+        """Übernimmt die Aufgabe mit einer Lease; None, wenn ein anderer Worker schneller war"""
+        task_id = task['task_id']
+        if task.get('status') != 'open' and not lease_expired(task):
+            self.lost_claims += 1
+            return None
+        expected = {field: task.get(field) for field in ('status', 'claimed_by', 'lease_expires')}
+        fields = {
+            'status': 'in_progress',
+            'claimed_by': self.worker_id,
+            'lease_expires': lease_deadline(self.lease_seconds),
+        }
+        try:
+            self.store.update_task(task_id, fields, expected=expected)
+        except ManifestConflictError:
+            self.lost_claims += 1
+            return None
+        if expected['claimed_by']:
+            print(f"Lease von {expected['claimed_by']} für {task_id} abgelaufen, übernommen von {self.worker_id}.")
+        return self.store.find_task(task_id)
+
+    def release(self, task_id: str) -> bool:
+        """Gibt eine übernommene Aufgabe unbearbeitet wieder frei (z.B. nach einem Abbruch)"""
+        try:
+            self.store.update_task(task_id, {'status': 'open', 'claimed_by': None, 'lease_expires': None},
+                                   expected={'claimed_by': self.worker_id})
+        except ManifestConflictError:
+            return False
+        return True
+
+    def record_failure(self, task_id: str, error: Exception) -> None:
+        """Gibt die Aufgabe nach einem fehlgeschlagenen Handler wieder frei, statt die Lease ablaufen zu lassen"""
+        self.release(task_id)
+        super().record_failure(task_id, error)
+
+    def finish_batch(self, task: Mapping[str, Any], batch: TaskBatch) -> None:
+        """Gibt die Lease mit dem Abschluss frei, sofern sie noch diesem Worker gehört"""
+        task_id = task['task_id']
+        batch.expect(task_id, {'claimed_by': self.worker_id})
+        batch.update_task(task_id, {'claimed_by': None, 'lease_expires': None})
+
+
+def _run_pool_worker(project_root: str, backend: Optional[str], ai_name: str,
+                     task_dir: Optional[str], history_dir: Optional[str],
+                     input_source: Optional[Callable[[], str]], lease_seconds: float,
+                     max_tasks: Optional[int], follow: bool) -> Dict[str, Any]:
+    """Einstiegspunkt eines Pool-Prozesses: eigener Store, eigene Arbeitsschleife"""
+    # Host und PID machen die Lease eindeutig, auch über Neustarts desselben Workers hinweg
+    worker_id = f"{ai_name}@{socket.gethostname()}:{os.getpid()}"
+    store = open_project_store(project_root, backend)
+    worker = LeasedTaskWorker(store, ai_name, worker_id, lease_seconds, task_dir=task_dir,
+                              history_dir=history_dir, input_source=input_source)
+    start = time.perf_counter()
+    worker.run(max_tasks=max_tasks, follow=follow)
+    elapsed = time.perf_counter() - start
+    return {
+        'worker_id': worker_id,
+        'pid': os.getpid(),
+        'processed': worker.processed,
+        'failed': worker.failed,
+        'lost_claims': worker.lost_claims,
+        'stop_reason': worker.stop_reason,
+        'elapsed': elapsed,
+        'tasks_per_second': worker.processed / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+class AgentPool:
+    """
+    Führt mehrere LeasedTaskWorker in eigenen Prozessen parallel aus
+    Die Handler stammen aus der Standard-Registry: bei fork werden sie vererbt, bei spawn
+    registriert der erneut importierte Hauptmodul sie selbst. Jeder Prozess öffnet seinen
+    eigenen Store; die Koordination läuft allein über die Leases im Projektzustand.
+    """
+
+    def __init__(self, project_root: str, workers: Optional[int] = None, ai_name: str = 'AI_Agent',
+                 backend: Optional[str] = None, task_dir: Optional[str] = None,
+                 history_dir: Optional[str] = None, input_source: Optional[Callable[[], str]] = None,
+                 lease_seconds: float = LEASE_SECONDS):
+        self.project_root = project_root
+        self.workers = workers or os.cpu_count() or 1
+        self.ai_name = ai_name
+        self.backend = backend
+        self.task_dir = task_dir
+        self.history_dir = history_dir
+        self.input_source = input_source
+        self.lease_seconds = lease_seconds
+
+    def worker_name(self, index: int) -> str:
+        """KI-Name eines Pool-Workers (erscheint in History und assigned_ai)"""
+        return f"{self.ai_name}_{index + 1}"
+
+    def run(self, max_tasks: Optional[int] = None, follow: bool = False) -> List[Dict[str, Any]]:
+        """
+        Startet alle Worker und wartet auf ihr Ende
+        max_tasks begrenzt die Aufgaben je Worker; zurückgegeben werden die Statistiken je Worker
+        """
+        context = multiprocessing.get_context()
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+            futures = []
+            for index in range(self.workers):
+                futures.append(executor.submit(
+                    _run_pool_worker, self.project_root, self.backend, self.worker_name(index),
+                    self.task_dir, self.history_dir, self.input_source, self.lease_seconds, max_tasks, follow
+                ))
+            return [future.result() for future in futures]
+
+
+def format_pool_report(stats: List[Dict[str, Any]]) -> str:
+    """Durchsatz je Worker und gesamt als Textbericht"""
+    lines = ["Worker-Durchsatz:"]
+    for entry in stats:
+        line = (f"- {entry['worker_id']} (PID {entry['pid']}): {entry['processed']} Aufgaben in "
+                f"{entry['elapsed']:.2f} s ({entry['tasks_per_second']:.1f}/s), {entry['failed']} Fehler, "
+                f"{entry['lost_claims']} verlorene Übernahmen")
+        if entry['stop_reason']:
+            line += f", gestoppt: {entry['stop_reason']}"
+        lines.append(line)
+
+    processed = sum(entry['processed'] for entry in stats)
+    wall_time = max((entry['elapsed'] for entry in stats), default=0.0)
+    total_rate = processed / wall_time if wall_time > 0 else 0.0
+    lines.append(f"Gesamt: {processed} Aufgaben in {wall_time:.2f} s ({total_rate:.1f}/s)")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    # Test der Lease-Logik (ohne Schreiben)
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+    print("=== Agent Pool Test ===")
+    now = datetime.now()
+    claimed = {'task_id': 'task_001_setup', 'claimed_by': 'AI_Agent_1@host', 'lease_expires': lease_deadline(-1, now)}
+    print(f"Lease abgelaufen: {lease_expired(claimed, now)}")
+    claimed['lease_expires'] = lease_deadline(LEASE_SECONDS, now)
+    print(f"Lease gültig bis {claimed['lease_expires']}: {not lease_expired(claimed, now)}")
+    print(f"Worker-Prozesse (Standard): {AgentPool(project_root).workers}")
+    print(format_pool_report([{'worker_id': 'AI_Agent_1@host', 'pid': os.getpid(), 'processed': 0, 'failed': 0,
+                               'lost_claims': 0, 'stop_reason': None, 'elapsed': 0.0, 'tasks_per_second': 0.0}]))
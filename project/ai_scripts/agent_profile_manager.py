@@ -1,10 +1,11 @@
-import json
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Set
 import uuid
 from collections import defaultdict
 
+import json_codec
+
 class AgentProfileManager:
     """
     KI-Agenten-Profile und Spezialisierungs-Management
@@ -115,7 +116,7 @@ class AgentProfileManager:
         # Profil speichern
         profile_file = os.path.join(self.profiles_dir, f'{profile_id}.json')
         with open(profile_file, 'w', encoding='utf-8') as f:
-            json.dump(profile, f, indent=2, ensure_ascii=False)
+            json_codec.dump(profile, f, pretty=True)
         
         return profile_id
     
@@ -216,7 +217,7 @@ class AgentProfileManager:
         profile_path = os.path.join(self.profiles_dir, latest_file)
         
         with open(profile_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            return json_codec.load(f)
     
     def update_agent_profile(self, agent_id: str, updates: Dict[str, Any]) -> bool:
         """Aktualisiert das Profil eines Agenten"""
@@ -237,7 +238,7 @@ class AgentProfileManager:
         # Profil speichern
         profile_file = os.path.join(self.profiles_dir, f"{profile['profile_id']}.json")
         with open(profile_file, 'w', encoding='utf-8') as f:
-            json.dump(profile, f, indent=2, ensure_ascii=False)
+            json_codec.dump(profile, f, pretty=True)
         
         return True
     
@@ -392,7 +393,7 @@ class AgentProfileManager:
                 profile_path = os.path.join(self.profiles_dir, filename)
                 
                 with open(profile_path, 'r', encoding='utf-8') as f:
-                    profile = json.load(f)
+                    profile = json_codec.load(f)
                 
                 agent_id = profile['agent_id']
                 
@@ -0,0 +1,175 @@
+import asyncio
+import functools
+import inspect
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Mapping, Optional, Set, Tuple
+
+from agent_pool import LEASE_SECONDS, LeasedTaskWorker
+from task_batch import TaskBatch
+from task_worker import TaskHandlerRegistry
+
+# Abfrageintervall des Kill-Switch-Wächters in Sekunden
+KILL_SWITCH_POLL_INTERVAL = 0.05
+
+
+class AsyncOrchestrator:
+    """
+    asyncio-Orchestrator für Task-Handler als Coroutinen
+    Bis zu concurrency Aufgaben laufen gleichzeitig; Store- und Dateizugriffe laufen in einem
+    Thread-Pool. Ein Wächter prüft Kill-Switch und Kill-Keyword alle poll_interval Sekunden
+    und bricht laufende Handler ab; ihre Batches werden verworfen und die Aufgaben freigegeben.
+    Übernahme und Abschluss laufen über Leases (siehe LeasedTaskWorker), der Orchestrator
+    arbeitet daher auch neben Pool-Workern anderer Prozesse.
+    """
+
+    def __init__(self, store, ai_name: str, registry: Optional[TaskHandlerRegistry] = None,
+                 task_dir: Optional[str] = None, history_dir: Optional[str] = None,
+                 input_source: Optional[Callable[[], str]] = None, concurrency: int = 8,
+                 poll_interval: float = KILL_SWITCH_POLL_INTERVAL, lease_seconds: float = LEASE_SECONDS,
+                 io_threads: Optional[int] = None):
+        worker_id = f"{ai_name}@{socket.gethostname()}:{os.getpid()}"
+        self.worker = LeasedTaskWorker(store, ai_name, worker_id, lease_seconds, registry=registry,
+                                       task_dir=task_dir, history_dir=history_dir, input_source=input_source)
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.io_threads = io_threads or concurrency + 2
+        self.cancelled = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._running: Set[asyncio.Task] = set()
+
+    @property
+    def processed(self) -> int:
+        return self.worker.processed
+
+    @property
+    def stop_reason(self) -> Optional[str]:
+        return self.worker.stop_reason
+
+    async def _io(self, function: Callable, *args: Any) -> Any:
+        """Führt einen blockierenden Store- oder Dateizugriff im Thread-Pool aus"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args))
+
+    async def watch_kill_switch(self) -> None:
+        """
+        Hintergrund-Wächter: prüft Kill-Switch und Kill-Keyword im Abfrageintervall und
+        bricht bei Auslösung alle laufenden Handler ab
+        """
+        while not self._stop.is_set():
+            stop: Optional[Tuple[str, str]] = await self._io(self.worker.check_stop)
+            if stop is not None:
+                await self._io(self.worker.stop, *stop)
+                self._halt()
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def _halt(self) -> None:
+        """Setzt das Stopp-Signal und bricht alle laufenden Handler ab"""
+        self._stop.set()
+        for running in self._running:
+            running.cancel()
+
+    async def _run_task(self, task: Mapping[str, Any]) -> None:
+        """Führt den Handler einer übernommenen Aufgabe aus und schreibt seinen Batch"""
+        task_id = task['task_id']
+        handler = self.worker.registry.handler_for(task)
+        batch = TaskBatch(self.worker.store, self.worker.task_dir, self.worker.history_dir)
+        flushing: Optional[asyncio.Future] = None
+        try:
+            if inspect.iscoroutinefunction(handler):
+                await handler(task, batch, self.worker.ai_name)
+            else:
+                await self._io(handler, task, batch, self.worker.ai_name)
+            self.worker.finish_batch(task, batch)
+            flushing = asyncio.ensure_future(self._io(batch.flush))
+            await asyncio.shield(flushing)
+        except asyncio.CancelledError:
+            if flushing is not None:
+                # Ein begonnener flush wird zu Ende geführt, damit Manifest, Aufgaben-Datei und
+                # History zueinander passen
+                await asyncio.gather(flushing, return_exceptions=True)
+                raise
+            batch.discard()
+            self.cancelled += 1
+            await asyncio.shield(self._io(self.worker.release, task_id))
+            raise
+        except Exception as e:
+            batch.discard()
+            await self._io(self.worker.record_failure, task_id, e)
+            return
+        await self._io(self.worker.record_success, task_id)
+
+    async def _next_claimed_task(self) -> Optional[Mapping[str, Any]]:
+        """Nächste Aufgabe, die dieser Orchestrator übernommen hat (None, wenn keine frei ist)"""
+        while not self._stop.is_set():
+            task = await self._io(self.worker.next_task)
+            if task is None:
+                return None
+            claimed = await self._io(self.worker.claim, task)
+            if claimed is not None:
+                return claimed
+        return None
+
+    async def run(self, max_tasks: Optional[int] = None, follow: bool = False) -> int:
+        """
+        Bearbeitet Aufgaben, bis keine mehr vorliegt (follow=False), max_tasks gestartet wurden
+        oder Kill-Switch bzw. Kill-Keyword greifen; gibt die Anzahl abgeschlossener Aufgaben zurück
+        """
+        start = self.worker.processed
+        started = 0
+        self._stop = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.io_threads, thread_name_prefix='orchestrator-io')
+        stop = await self._io(self.worker.check_stop)
+        if stop is not None:
+            await self._io(self.worker.stop, *stop)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            return 0
+
+        watcher = asyncio.create_task(self.watch_kill_switch())
+        stop_waiter = asyncio.create_task(self._stop.wait())
+        try:
+            while not self._stop.is_set():
+                while not self._stop.is_set() and len(self._running) < self.concurrency \
+                        and (max_tasks is None or started < max_tasks):
+                    task = await self._next_claimed_task()
+                    if task is None:
+                        break
+                    self._running.add(asyncio.create_task(self._run_task(task)))
+                    started += 1
+
+                if not self._running:
+                    if not follow or (max_tasks is not None and started >= max_tasks):
+                        break
+                    await asyncio.wait({stop_waiter}, timeout=self.worker.poll_interval)
+                    # Fehlgeschlagene Aufgaben erneut versuchen (wie TaskWorker.run)
+                    self.worker.reset_skipped()
+                    continue
+
+                done, _ = await asyncio.wait(self._running | {stop_waiter}, return_when=asyncio.FIRST_COMPLETED)
+                self._running -= done
+        finally:
+            if self._running:
+                self._halt()
+                await asyncio.gather(*self._running, return_exceptions=True)
+                self._running.clear()
+            self._stop.set()
+            await asyncio.gather(watcher, stop_waiter, return_exceptions=True)
+            await self._io(self.worker.flush_history)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        return self.worker.processed - start
+
+
+if __name__ == '__main__':
+    # Test des Orchestrators mit einer eigenen Registry (ohne Schreiben)
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    from storage_backend import open_project_store
+
+    print("=== Async Orchestrator Test ===")
+    orchestrator = AsyncOrchestrator(open_project_store(project_root), 'AI_Agent_Prototype', TaskHandlerRegistry())
+    print(f"Abgeschlossen: {asyncio.run(orchestrator.run())} (keine Handler registriert)")
+    print(f"Stopp-Grund: {orchestrator.stop_reason}")
@@ -1,10 +1,15 @@
-import json
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Set, Tuple
 import re
 from pathlib import Path
 
+from history_log import get_history_log, parse_history_timestamp
+from storage_backend import open_project_store
+
+# Betroffenes Element eines History-Ereignisses, das sich auf eine Aufgabe bezieht (Gruppe: Task-ID)
+_TASK_ITEM_PATTERN = re.compile(r'task_(\w+)')
+
 class DocumentationChecker:
     """
     Automatisierte Dokumentations-Checks für das Framework
@@ -14,6 +19,7 @@ class DocumentationChecker:
     def __init__(self, project_root: str):
         self.project_root = project_root
         self.manifest_path = os.path.join(project_root, 'project_manifest.json')
+        self.manifest_store = open_project_store(project_root)
         self.history_dir = os.path.join(project_root, 'history')
         self.knowledge_base_dir = os.path.join(project_root, 'knowledge_base')
         self.tasks_dir = os.path.join(project_root, 'tasks')
@@ -89,8 +95,7 @@ class DocumentationChecker:
     
     def load_manifest(self) -> Dict[str, Any]:
         """Lädt das project_manifest.json"""
-        with open(self.manifest_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.manifest_store.load()
     
     def get_file_modification_time(self, file_path: str) -> Optional[datetime]:
         """Holt die letzte Änderungszeit einer Datei"""
@@ -104,6 +109,10 @@ class DocumentationChecker:
         if not os.path.exists(dir_path):
             return None
         
+        # History: nur der Ereignisstrom wird beschrieben, die Partitionen müssen nicht durchlaufen werden
+        if os.path.abspath(dir_path) == os.path.abspath(self.history_dir):
+            return get_history_log(self.history_dir).last_modified()
+        
         latest_time = None
         
         for root, dirs, files in os.walk(dir_path):
@@ -126,30 +135,29 @@ class DocumentationChecker:
             'new_task_creation': []
         }
         
-        # Manifest-Änderungen prüfen
-        manifest_time = self.get_file_modification_time(self.manifest_path)
+        # Änderungen am Projektzustand prüfen (Manifest mit Journal bzw. Datenbank)
+        try:
+            manifest_time = datetime.fromtimestamp(self.manifest_store.last_modified())
+        except FileNotFoundError:
+            manifest_time = None
         if manifest_time and manifest_time > cutoff_time:
-            manifest = self.load_manifest()
-            
-            # Prüfe auf verschiedene Änderungstypen
-            completed_tasks = [t for t in manifest.get('tasks', []) if t.get('status') == 'completed']
-            if completed_tasks:
-                for task in completed_tasks:
-                    if task.get('completed_date'):
-                        try:
-                            completed_date = datetime.fromisoformat(task['completed_date'])
-                            if completed_date > cutoff_time:
-                                changes['task_completion'].append({
-                                    'type': 'task_completed',
-                                    'task_id': task.get('task_id'),
-                                    'timestamp': completed_date,
-                                    'details': task
-                                })
-                        except:
-                            pass
+            # Prüfe auf verschiedene Änderungstypen (Aufgaben werden gestreamt)
+            for task in self.manifest_store.iter_tasks(status='completed'):
+                if task.get('completed_date'):
+                    try:
+                        completed_date = datetime.fromisoformat(task['completed_date'])
+                        if completed_date > cutoff_time:
+                            changes['task_completion'].append({
+                                'type': 'task_completed',
+                                'task_id': task.get('task_id'),
+                                'timestamp': completed_date,
+                                'details': task
+                            })
+                    except:
+                        pass
             
             # Neue Tasks
-            new_tasks = [t for t in manifest.get('tasks', []) if t.get('status') == 'open']
+            new_tasks = self.manifest_store.iter_tasks(status='open')
             for task in new_tasks:
                 changes['new_task_creation'].append({
                     'type': 'new_task',
@@ -159,12 +167,12 @@ class DocumentationChecker:
                 })
             
             # Team-Struktur Änderungen
-            teams = manifest.get('teams', [])
-            if teams:
+            team_count = sum(1 for _ in self.manifest_store.iter_items('teams'))
+            if team_count:
                 changes['team_structure_change'].append({
                     'type': 'team_update',
                     'timestamp': manifest_time,
-                    'details': {'team_count': len(teams)}
+                    'details': {'team_count': team_count}
                 })
         
         # Guidelines-Änderungen prüfen
@@ -177,25 +185,27 @@ class DocumentationChecker:
             })
         
         # History-Änderungen prüfen
-        history_time = self.get_directory_latest_modification(self.history_dir)
+        history_log = get_history_log(self.history_dir)
+        history_time = history_log.last_modified()
         if history_time and history_time > cutoff_time:
-            # Neue Log-Dateien könnten auf Task-Completion hinweisen
-            for filename in os.listdir(self.history_dir):
-                if filename.endswith('.log'):
-                    file_path = os.path.join(self.history_dir, filename)
-                    file_time = self.get_file_modification_time(file_path)
-                    
-                    if file_time and file_time > cutoff_time:
-                        # Versuche Task-ID aus Dateiname zu extrahieren
-                        task_match = re.search(r'task_(\w+)', filename)
-                        if task_match:
-                            task_id = task_match.group(1)
-                            changes['task_completion'].append({
-                                'type': 'task_activity',
-                                'task_id': task_id,
-                                'timestamp': file_time,
-                                'details': {'log_file': filename}
-                            })
+            # Neue History-Ereignisse könnten auf Task-Completion hinweisen (ein Eintrag je Task)
+            task_activity = {}
+            for event in history_log.query(since=cutoff_time, affected_item=_TASK_ITEM_PATTERN):
+                event_time = parse_history_timestamp(event.get('timestamp'))
+                if event_time is None or event_time <= cutoff_time:
+                    continue
+                
+                # Task-ID aus dem betroffenen Element extrahieren
+                task_match = _TASK_ITEM_PATTERN.search(event['affected_item'])
+                if task_match:
+                    task_id = task_match.group(1)
+                    task_activity[task_id] = {
+                        'type': 'task_activity',
+                        'task_id': task_id,
+                        'timestamp': event_time,
+                        'details': {'log_file': event['source'], 'action_type': event.get('action_type')}
+                    }
+            changes['task_completion'].extend(task_activity.values())
         
         return changes
     
@@ -1,9 +1,11 @@
-import json
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import uuid
 
+import json_codec
+from storage_backend import open_project_store
+
 class FeedbackSystem:
     """
     Automatisiertes Feedback- und Review-Loop-System für KI-Agenten
@@ -12,6 +14,7 @@ class FeedbackSystem:
     def __init__(self, project_root: str):
         self.project_root = project_root
         self.manifest_path = os.path.join(project_root, 'project_manifest.json')
+        self.manifest_store = open_project_store(project_root)
         self.feedback_dir = os.path.join(project_root, 'feedback')
         self.knowledge_base_dir = os.path.join(project_root, 'knowledge_base')
         self.ideas_path = os.path.join(self.knowledge_base_dir, 'ideas.md')
@@ -42,13 +45,11 @@ class FeedbackSystem:
     
     def load_manifest(self) -> Dict[str, Any]:
         """Lädt das project_manifest.json"""
-        with open(self.manifest_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.manifest_store.load()
     
     def save_manifest(self, manifest: Dict[str, Any]) -> None:
         """Speichert das project_manifest.json"""
-        with open(self.manifest_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        self.manifest_store.save(manifest)
     
     def create_task_completion_feedback(self, task_id: str, agent_id: str, 
                                       ratings: Dict[str, int], 
@@ -75,7 +76,7 @@ class FeedbackSystem:
         # Feedback speichern
         feedback_file = os.path.join(self.feedback_dir, f'feedback_{feedback_id}_{task_id}.json')
         with open(feedback_file, 'w', encoding='utf-8') as f:
-            json.dump(feedback, f, indent=2, ensure_ascii=False)
+            json_codec.dump(feedback, f)
         
         return feedback_id
     
@@ -83,14 +84,8 @@ class FeedbackSystem:
         """
         Generiert automatisierte Feedback-Prompts für KI-Agenten
         """
-        manifest = self.load_manifest()
-        task = None
-        
         # Task finden
-        for t in manifest.get('tasks', []):
-            if t.get('task_id') == task_id:
-                task = t
-                break
+        task = self.manifest_store.find_task(task_id)
         
         if not task:
             return {'error': f'Task {task_id} nicht gefunden'}
@@ -316,7 +311,7 @@ class FeedbackSystem:
                     filepath = os.path.join(self.feedback_dir, filename)
                     try:
                         with open(filepath, 'r', encoding='utf-8') as f:
-                            feedback = json.load(f)
+                            feedback = json_codec.load(f)
                         
                         feedback_date = datetime.fromisoformat(feedback.get('timestamp', ''))
                         if feedback_date >= cutoff_date:
@@ -0,0 +1,949 @@
+import atexit
+import gzip
+import hashlib
+import mmap
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Nicht-POSIX-Systeme: keine prozessübergreifende Sperre
+    fcntl = None
+
+import json_codec
+from manifest_journal import truncate_torn_tail
+
+# Aktives Segment des Ereignisstroms und Index der abgeschlossenen Segmente im history-Verzeichnis
+HISTORY_LOG_NAME = 'history.jsonl'
+HISTORY_INDEX_NAME = 'index.json'
+# Tagespartitionen <JJJJ-MM-TT>/ mit abgeschlossenen Segmenten history-<Rotationszeitpunkt>.jsonl.gz
+_DAY_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_SEGMENT_PATTERN = re.compile(r'^history-(\d{4}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2})(?:-(\d+))?\.jsonl(?:\.gz)?$')
+# Felder, die index.json je Segment zählt, und ihr Schlüssel im Index-Eintrag
+_INDEX_COUNTERS = {'ai_name': 'agents', 'action_type': 'actions'}
+# Kopfzeile eines Eintrags im bisherigen .log-Format (siehe history/log_template.log)
+_LEGACY_HEADER = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?) - (.+?) - (.+?) - (.*)$')
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# Blockgröße beim Durchsuchen komprimierter Segmente
+SCAN_CHUNK_BYTES = 1024 * 1024
+# Gelesene Ereignisse abgeschlossener Segmente, die je history-Verzeichnis im Speicher bleiben
+SEGMENT_CACHE_EVENTS = 50000
+
+# Gruppen-Commit des gepufferten Schreibers: spätestens nach so vielen Ereignissen bzw. Sekunden
+FLUSH_BATCH_SIZE = 256
+FLUSH_INTERVAL = 0.05
+# Warteschlangengröße; ist sie voll, blockieren die Aufrufer von log (Gegendruck)
+MAX_QUEUED_EVENTS = 10000
+
+
+def timestamp_now() -> str:
+    """Zeitstempel im Format der History-Logs (ISO 8601, Sekunden, UTC-Suffix)"""
+    return datetime.now().isoformat(timespec='seconds') + 'Z'
+
+
+def format_history_entry(timestamp: str, ai_name: str, action_type: str, affected_item: str,
+                         description: str, output: str = '') -> str:
+    """Formatiert einen History-Eintrag im bisherigen Textformat"""
+    log_entry = f"{timestamp} - {ai_name} - {action_type} - {affected_item}\n"
+    log_entry += f"Beschreibung: {description}\n"
+    log_entry += f"Output: {output}\n\n"
+    return log_entry
+
+
+def make_history_event(timestamp: str, ai_name: str, action_type: str, affected_item: str,
+                       description: str, output: str = '') -> Dict[str, Any]:
+    """Ein History-Ereignis mit denselben Feldern wie ein Eintrag im .log-Format"""
+    return {
+        'timestamp': timestamp,
+        'ai_name': ai_name,
+        'action_type': action_type,
+        'affected_item': affected_item,
+        'description': description,
+        'output': output,
+    }
+
+
+def format_history_event(event: Dict[str, Any]) -> str:
+    """Gibt ein Ereignis im bisherigen Textformat aus (z.B. für Musteranalysen)"""
+    return format_history_entry(event.get('timestamp', ''), event.get('ai_name', ''), event.get('action_type', ''),
+                                event.get('affected_item', ''), event.get('description', ''),
+                                event.get('output', ''))
+
+
+def parse_history_timestamp(timestamp: str) -> Optional[datetime]:
+    """Zeitstempel eines Ereignisses als datetime (None, falls nicht lesbar)"""
+    try:
+        return datetime.fromisoformat(timestamp.rstrip('Z'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_legacy_log(content: str) -> List[Dict[str, Any]]:
+    """
+    Liest die Einträge einer .log-Datei im bisherigen Format
+    Die Ausgabe eines Eintrags darf mehrzeilig sein und reicht bis zur nächsten Kopfzeile
+    """
+    events: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    section: Optional[str] = None
+
+    for line in content.split('\n'):
+        header = _LEGACY_HEADER.match(line)
+        if header:
+            current = make_history_event(*header.groups(), description='')
+            events.append(current)
+            section = None
+        elif current is None:
+            continue
+        elif line.startswith('Beschreibung: ') and section is None:
+            current['description'] = line[len('Beschreibung: '):]
+            section = 'description'
+        elif line.startswith('Output: ') and section != 'output':
+            current['output'] = line[len('Output: '):]
+            section = 'output'
+        elif section == 'output':
+            current['output'] += '\n' + line
+
+    for event in events:
+        event['output'] = event['output'].rstrip('\n')
+    return events
+
+
+class HistoryLog:
+    """
+    Append-only Ereignisstrom für das history-Verzeichnis (eine JSON-Zeile je Aktion)
+    Geschrieben wird in history.jsonl. Ab max_bytes oder beim ersten Schreiben an einem neuen
+    Tag wird das Segment in die Tagespartition <JJJJ-MM-TT>/history-<Zeitpunkt>.jsonl verschoben,
+    mit gzip komprimiert und in index.json eingetragen (Zeitraum, Anzahl Ereignisse, KIs, Aktionstypen).
+    Bereichsabfragen lesen nur die Partitionen und Segmente, die den Zeitraum berühren; query und
+    count filtern zusätzlich über den Index. Gelesene abgeschlossene Segmente bleiben bis zu
+    SEGMENT_CACHE_EVENTS Ereignisse im Speicher (get_history_log teilt sie im Prozess).
+    Schreibzugriffe sind über eine fcntl-Sperre (history.jsonl.lock) zwischen Prozessen
+    serialisiert. iter_events liest auch die bisherigen .log-Dateien.
+    """
+
+    def __init__(self, history_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, compress: bool = True,
+                 cache_events: int = SEGMENT_CACHE_EVENTS):
+        self.history_dir = history_dir
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.active_path = os.path.join(history_dir, HISTORY_LOG_NAME)
+        self.index_path = os.path.join(history_dir, HISTORY_INDEX_NAME)
+        self.lock_path = self.active_path + '.lock'
+        self._lock = threading.RLock()
+        # (inode, Zeitpunkt des ersten Ereignisses) des aktiven Segments
+        self._segment_start: Optional[Tuple[int, Optional[datetime]]] = None
+        # Segment (ohne .gz) -> Ereignisse; abgeschlossene Segmente ändern sich nicht mehr
+        self.cache_events = cache_events
+        self._cache: 'OrderedDict[str, List[Dict[str, Any]]]' = OrderedDict()
+        self._cached_events = 0
+        self._cache_lock = threading.Lock()
+
+    @contextmanager
+    def locked(self):
+        """Hält die prozessübergreifende Schreibsperre des Ereignisstroms"""
+        with self._lock:
+            with open(self.lock_path, 'a+') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def log(self, ai_name: str, action_type: str, affected_item: str, description: str,
+            output: str = '') -> Dict[str, Any]:
+        """Schreibt ein einzelnes Ereignis mit aktuellem Zeitstempel"""
+        event = make_history_event(timestamp_now(), ai_name, action_type, affected_item, description, output)
+        self.append([event])
+        return event
+
+    def append(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Hängt Ereignisse mit einem einzigen Schreibvorgang an das aktive Segment an"""
+        data = b''.join(json_codec.dumpb(event) + b'\n' for event in events)
+        if not data:
+            return
+        closed = None
+        with self.locked():
+            if self._should_rotate(len(data)):
+                closed = self._close_segment()
+            with open(self.active_path, 'a+b') as f:
+                truncate_torn_tail(f)
+                f.write(data)
+        # Komprimieren und Indexieren außerhalb der Sperre, damit andere Schreiber nicht warten
+        if closed is not None:
+            self._seal_segment(closed)
+
+    def _segment_started(self, stat: os.stat_result) -> Optional[datetime]:
+        """Zeitpunkt des ersten Ereignisses im aktiven Segment (gecacht je inode)"""
+        if self._segment_start is not None and self._segment_start[0] == stat.st_ino:
+            return self._segment_start[1]
+        started = None
+        with open(self.active_path, 'rb') as f:
+            first_line = f.readline()
+        if first_line.endswith(b'\n'):
+            try:
+                started = parse_history_timestamp(json_codec.loads(first_line).get('timestamp'))
+            except (json_codec.JSONDecodeError, ValueError, AttributeError):
+                pass
+        self._segment_start = (stat.st_ino, started)
+        return started
+
+    def _should_rotate(self, incoming: int) -> bool:
+        try:
+            stat = os.stat(self.active_path)
+        except FileNotFoundError:
+            return False
+        if stat.st_size == 0:
+            return False
+        if stat.st_size + incoming > self.max_bytes:
+            return True
+        started = self._segment_started(stat)
+        return started is not None and started.date() != datetime.now().date()
+
+    def _close_segment(self) -> str:
+        """
+        Verschiebt das aktive Segment in die Partition des Tages seines ersten Ereignisses
+        (unter der Sperre); gibt den neuen Pfad zurück
+        """
+        started = self._segment_started(os.stat(self.active_path)) or datetime.now()
+        day_dir = os.path.join(self.history_dir, started.strftime('%Y-%m-%d'))
+        os.makedirs(day_dir, exist_ok=True)
+        stamp = timestamp_now().rstrip('Z').replace(':', '-')
+        path = os.path.join(day_dir, f"history-{stamp}.jsonl")
+        counter = 0
+        while os.path.exists(path) or os.path.exists(path + '.gz'):
+            counter += 1
+            path = os.path.join(day_dir, f"history-{stamp}-{counter}.jsonl")
+        os.replace(self.active_path, path)
+        self._segment_start = None
+        return path
+
+    def _seal_segment(self, path: str) -> None:
+        """Komprimiert ein abgeschlossenes Segment atomar nach <path>.gz und indexiert es"""
+        stats = segment_stats(self._read_segment(path))
+        if self.compress:
+            temp_path = path + '.gz.tmp'
+            with open(path, 'rb') as source, gzip.open(temp_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.replace(temp_path, path + '.gz')
+            os.remove(path)
+            path += '.gz'
+        with self.locked():
+            index = self.read_index()
+            index['segments'][self.relative_path(path)] = stats
+            self._write_index(index)
+
+    def relative_path(self, path: str) -> str:
+        """Pfad eines Segments relativ zum history-Verzeichnis (Schlüssel in index.json)"""
+        return os.path.relpath(path, self.history_dir).replace(os.sep, '/')
+
+    def read_index(self) -> Dict[str, Any]:
+        """Inhalt von index.json: {'segments': {Pfad: {start, end, events, agents}}}"""
+        try:
+            index = json_codec.load_file(self.index_path)
+        except (FileNotFoundError, json_codec.JSONDecodeError):
+            return {'segments': {}}
+        index.setdefault('segments', {})
+        return index
+
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        temp_path = self.index_path + '.tmp'
+        json_codec.dump_file(temp_path, index)
+        os.replace(temp_path, self.index_path)
+
+    def reindex(self) -> int:
+        """
+        Komprimiert und indexiert liegengebliebene Segmente (z.B. nach einem Absturz), ergänzt
+        Index-Einträge ohne Aktionstypen und verschiebt Segmente ohne Partition in ihre
+        Tagespartition; gibt die Anzahl zurück
+        """
+        day_dirs, _, flat_segments = self._scan()
+        pending = []
+        for name in flat_segments:
+            day_dir = os.path.join(self.history_dir, _SEGMENT_PATTERN.match(name).group(1)[:10])
+            os.makedirs(day_dir, exist_ok=True)
+            target = os.path.join(day_dir, name)
+            os.replace(os.path.join(self.history_dir, name), target)
+            pending.append(target)
+
+        indexed = self.read_index()['segments']
+        for day in day_dirs:
+            for name in self._partition_segments(day):
+                path = os.path.join(self.history_dir, day, name)
+                entry = indexed.get(self.relative_path(path))
+                if path not in pending and (name.endswith('.jsonl') or entry is None or 'actions' not in entry):
+                    pending.append(path)
+
+        for path in pending:
+            try:
+                if path.endswith('.gz'):
+                    with self.locked():
+                        index = self.read_index()
+                        index['segments'][self.relative_path(path)] = segment_stats(self._read_segment(path))
+                        self._write_index(index)
+                else:
+                    self._seal_segment(path)
+            except FileNotFoundError:
+                continue  # Wird gerade von einem anderen Prozess bearbeitet
+        return len(pending)
+
+    def _scan(self) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Ein Durchlauf über das history-Verzeichnis: Tagespartitionen, bisherige .log-Dateien
+        und Segmente ohne Partition, jeweils in zeitlicher Reihenfolge
+        """
+        day_dirs, legacy, flat_segments = [], [], []
+        if not os.path.isdir(self.history_dir):
+            return day_dirs, legacy, flat_segments
+        with os.scandir(self.history_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if _DAY_PATTERN.match(name) and entry.is_dir():
+                    day_dirs.append(name)
+                elif name.endswith('.log') and name != 'log_template.log':
+                    legacy.append(name)
+                elif _SEGMENT_PATTERN.match(name):
+                    flat_segments.append(name)
+        return sorted(day_dirs), sorted(legacy), _sorted_segments(flat_segments)
+
+    def _partition_segments(self, day: str) -> List[str]:
+        try:
+            names = [name for name in os.listdir(os.path.join(self.history_dir, day)) if _SEGMENT_PATTERN.match(name)]
+        except FileNotFoundError:
+            return []
+        return _sorted_segments(names)
+
+    def segments(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[str]:
+        """
+        Pfade der Segmente, die Ereignisse zwischen since und until enthalten können
+        (abgeschlossene in zeitlicher Reihenfolge, aktives zuletzt). Indexierte Segmente werden
+        über ihren Zeitraum ausgewählt; Partitionen außerhalb des Zeitraums werden nicht gelesen.
+        """
+        day_dirs, _, flat_segments = self._scan()
+        # Eine Partition trägt den Tag des ersten Ereignisses ihrer Segmente; ein kurz vor
+        # Mitternacht gepuffertes Ereignis kann ein Segment eröffnen, das überwiegend am
+        # Folgetag liegt. Daher wird eine Partition vor since mit durchsucht.
+        first_day = (since - timedelta(days=1)).strftime('%Y-%m-%d') if since is not None else None
+        last_day = until.strftime('%Y-%m-%d') if until is not None else None
+        indexed = self.read_index()['segments']
+
+        selected = {path for path, entry in indexed.items() if _overlaps(entry, since, until)}
+        for name in flat_segments:
+            rotated = datetime.strptime(_SEGMENT_PATTERN.match(name).group(1), '%Y-%m-%dT%H-%M-%S')
+            if since is None or rotated >= since:
+                selected.add(name)
+        # Noch nicht indexierte Segmente (gerade rotiert oder nach einem Absturz)
+        for day in day_dirs:
+            if (first_day is not None and day < first_day) or (last_day is not None and day > last_day):
+                continue
+            for name in self._partition_segments(day):
+                if f"{day}/{name}" not in indexed:
+                    selected.add(f"{day}/{name}")
+
+        paths = [os.path.join(self.history_dir, *relative.split('/')) for relative in sorted(selected, key=_segment_sort_key)]
+        if os.path.exists(self.active_path):
+            paths.append(self.active_path)
+        return paths
+
+    def legacy_files(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[str]:
+        """Dateinamen der bisherigen .log-Dateien (eine Datei je Aktion), gefiltert nach ihrem Datum"""
+        first_day = since.strftime('%Y-%m-%d') if since is not None else None
+        last_day = until.strftime('%Y-%m-%d') if until is not None else None
+        return [name for name in self._scan()[1]
+                if (first_day is None or name[:10] >= first_day) and (last_day is None or name[:10] <= last_day)]
+
+    def index_entries(self, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """Index-Einträge der abgeschlossenen Segmente im Zeitraum (ohne ein Segment zu lesen)"""
+        return {path: entry for path, entry in self.read_index()['segments'].items()
+                if _overlaps(entry, since, until)}
+
+    def last_modified(self) -> Optional[datetime]:
+        """Zeitpunkt des letzten Schreibzugriffs auf den Ereignisstrom oder das Verzeichnis"""
+        times = []
+        for path in (self.active_path, self.history_dir):
+            try:
+                times.append(os.path.getmtime(path))
+            except FileNotFoundError:
+                continue
+        return datetime.fromtimestamp(max(times)) if times else None
+
+    @staticmethod
+    def _open_segment(path: str):
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            return opener(path, 'rb')
+        except FileNotFoundError:
+            if path.endswith('.gz'):
+                return None
+            # Inzwischen komprimiert
+            try:
+                return gzip.open(path + '.gz', 'rb')
+            except FileNotFoundError:
+                return None
+
+    def read_segment_from(self, path: str, position: Optional[Dict[str, Any]] = None
+                          ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Ereignisse eines Segments mit der Leseposition hinter dem jeweiligen Ereignis
+        Eine Position ist {'head': SHA-1 der ersten Zeile, 'offset': Byte-Offset (bei .gz im
+        entpackten Inhalt)}. Die erste Zeile bleibt beim Rotieren und Komprimieren erhalten;
+        eine Position des aktiven Segments gilt so auch für seine spätere Ablage. Passt head
+        nicht, wird von vorn gelesen. Eine unvollständige letzte Zeile wird nicht gelesen.
+        """
+        f = self._open_segment(path)
+        if f is None:
+            return
+        with f:
+            first_line = f.readline()
+            if not first_line.endswith(b'\n'):
+                return
+            head = hashlib.sha1(first_line).hexdigest()
+            offset = 0
+            if position is not None and position.get('head') == head:
+                offset = position['offset']
+            f.seek(offset)
+            for line in f:
+                # Unvollständige letzte Zeile: Schreibvorgang läuft noch oder wurde abgebrochen
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    event = json_codec.loads(line)
+                except json_codec.JSONDecodeError:
+                    continue
+                yield event, {'head': head, 'offset': offset}
+
+    def _scan_segment(self, path: str, keywords: List[bytes]) -> Iterator[bytes]:
+        """
+        Vollständige Zeilen eines Segments, die eines der (kleingeschriebenen) Schlüsselwörter enthalten
+        Unkomprimierte Segmente werden in mmap-Fenstern durchsucht, komprimierte blockweise entpackt;
+        der Speicherbedarf hängt so nicht von der Segmentgröße ab.
+        """
+        if not path.endswith('.gz'):
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                path += '.gz'  # Inzwischen komprimiert
+            else:
+                with f:
+                    yield from _scan_blocks(self._mapped_blocks(f, path == self.active_path), keywords)
+                return
+
+        f = self._open_segment(path)
+        if f is None:
+            return
+        with f:
+            yield from _scan_blocks(iter(lambda: f.read(SCAN_CHUNK_BYTES), b''), keywords)
+
+    def _mapped_blocks(self, f, active: bool) -> Iterator[mmap.mmap]:
+        # Ein Schreiber kürzt eine abgebrochene letzte Zeile des aktiven Segments (unter der Sperre);
+        # eingeblendet wird nur bis zum letzten Zeilenumbruch, dieser Bereich bleibt bestehen
+        with self.locked() if active else nullcontext():
+            end = _complete_length(f)
+        offset = 0
+        while offset < end:
+            length = min(SCAN_CHUNK_BYTES, end - offset)
+            with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ, offset=offset) as window:
+                yield window
+            offset += length
+
+    def _read_segment(self, path: str) -> Iterator[Dict[str, Any]]:
+        for event, _ in self.read_segment_from(path):
+            yield event
+
+    def read_legacy_file(self, name: str) -> List[Dict[str, Any]]:
+        """Einträge einer bisherigen .log-Datei als Ereignisse (mit 'source')"""
+        with open(os.path.join(self.history_dir, name), 'r', encoding='utf-8', errors='replace') as f:
+            events = parse_legacy_log(f.read())
+        for event in events:
+            event['source'] = name
+        return events
+
+    def shards(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+               include_legacy: bool = True) -> List[str]:
+        """
+        Dateien des Ereignisstroms (relativ zum history-Verzeichnis) in der Reihenfolge von
+        iter_events; Einheit der parallelen Auswertung (siehe map_history_shards)
+        """
+        shards = self.legacy_files(since, until) if include_legacy else []
+        shards.extend(self.relative_path(path) for path in self.segments(since, until))
+        return shards
+
+    def iter_shard(self, shard: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                   position: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Ereignisse einer Datei aus shards zwischen since und until, jeweils mit 'source'
+        position wird bei Segmenten wie in read_segment_from verwendet
+        """
+        if shard.endswith('.log'):
+            events = self.read_legacy_file(shard)
+        elif shard == HISTORY_LOG_NAME or position is not None:
+            events = (event for event, _ in
+                      self.read_segment_from(os.path.join(self.history_dir, *shard.split('/')), position))
+        else:
+            events = (dict(event) for event in self._cached_segment(shard))
+        for event in events:
+            event['source'] = shard
+            if _in_range(event, since, until):
+                yield event
+
+    def _cached_segment(self, shard: str) -> List[Dict[str, Any]]:
+        """Ereignisse eines abgeschlossenen Segments aus dem Cache, sonst gelesen und zwischengespeichert"""
+        key = shard[:-3] if shard.endswith('.gz') else shard
+        with self._cache_lock:
+            events = self._cache.get(key)
+            if events is not None:
+                self._cache.move_to_end(key)
+                return events
+        events = list(self._read_segment(os.path.join(self.history_dir, *shard.split('/'))))
+        if not events or len(events) > self.cache_events:
+            return events
+        with self._cache_lock:
+            if key not in self._cache:
+                self._cache[key] = events
+                self._cached_events += len(events)
+            while self._cached_events > self.cache_events:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_events -= len(evicted)
+        return events
+
+    def query(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              ai_name: Any = None, action_type: Any = None, affected_item: Any = None,
+              include_legacy: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Ereignisse zwischen since und until (wie iter_events), gefiltert nach KI, Aktionstyp und
+        betroffenem Element; jeder Filter ist ein Wert, eine Menge von Werten oder ein kompilierter
+        Ausdruck (re.search). Segmente, die laut Index keine passende KI bzw. keinen passenden
+        Aktionstyp enthalten, werden nicht gelesen.
+        """
+        filters = [(field, _value_filter(value)) for field, value in
+                   (('ai_name', ai_name), ('action_type', action_type), ('affected_item', affected_item))
+                   if value is not None]
+        indexed = self.read_index()['segments']
+        for shard in self.shards(since, until, include_legacy):
+            entry = indexed.get(shard)
+            if entry is not None and not _entry_may_match(entry, filters):
+                continue
+            for event in self.iter_shard(shard, since, until):
+                if all(matches(event.get(field, '')) for field, matches in filters):
+                    yield event
+
+    def count(self, by: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              include_legacy: bool = True, **filters: Any) -> Dict[str, int]:
+        """
+        Anzahl der Ereignisse je Wert des Feldes by (z.B. 'ai_name', 'action_type', 'affected_item')
+        mit den Filtern von query. Ohne Filter werden 'ai_name' und 'action_type' für Segmente,
+        die ganz im Zeitraum liegen, aus dem Index gezählt, ohne sie zu lesen.
+        """
+        counts: Dict[str, int] = {}
+        index_key = _INDEX_COUNTERS.get(by)
+        if filters or index_key is None:
+            for event in self.query(since, until, include_legacy=include_legacy, **filters):
+                value = event.get(by, '')
+                counts[value] = counts.get(value, 0) + 1
+            return counts
+
+        indexed = self.read_index()['segments']
+        for shard in self.shards(since, until, include_legacy):
+            entry = indexed.get(shard)
+            if entry is not None and index_key in entry and _entry_within(entry, since, until):
+                for value, count in entry[index_key].items():
+                    counts[value] = counts.get(value, 0) + count
+                continue
+            for event in self.iter_shard(shard, since, until):
+                value = event.get(by, '')
+                counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def search_shard(self, shard: str, keywords: Iterable[str], since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Ereignisse einer Datei aus shards, deren gespeicherter Eintrag eines der Schlüsselwörter enthält
+        Schlüsselwörter sind ASCII, Groß-/Kleinschreibung spielt keine Rolle. Nur passende Zeilen werden
+        dekodiert (Vorfilter, den Inhalt prüft der Aufrufer selbst); Segmente werden ohne vollständige
+        Kopie im Speicher durchsucht.
+        """
+        encoded = [keyword.lower().encode('ascii') for keyword in keywords]
+        if shard.endswith('.log'):
+            events = (event for event in self.read_legacy_file(shard)
+                      if any(keyword in format_history_event(event).lower().encode('utf-8') for keyword in encoded))
+        else:
+            events = _decode_lines(self._scan_segment(os.path.join(self.history_dir, *shard.split('/')), encoded))
+        for event in events:
+            event['source'] = shard
+            if _in_range(event, since, until):
+                yield event
+
+    def iter_events(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    include_legacy: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Alle Ereignisse zwischen since und until in zeitlicher Reihenfolge: bisherige .log-Dateien,
+        abgeschlossene Segmente, aktives Segment. Jedes Ereignis erhält 'source' (Datei, aus der
+        es stammt, relativ zum history-Verzeichnis).
+        """
+        for shard in self.shards(since, until, include_legacy):
+            yield from self.iter_shard(shard, since, until)
+
+
+def map_history_shards(history_dir: str, mapper: Callable[..., Any], shards: List[str], *args: Any,
+                       workers: int = 1) -> List[Any]:
+    """
+    Wendet mapper(history_dir, shard, *args) auf jede Datei aus HistoryLog.shards an
+    Mit workers > 1 (0 = alle CPU-Kerne) laufen die Aufrufe in einem Prozesspool; mapper und args
+    müssen dafür picklebar sein (Funktion auf Modulebene). Die Ergebnisse kommen in der Reihenfolge
+    von shards zurück, ein Zusammenführen in dieser Reihenfolge entspricht dem seriellen Durchlauf.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(shards))
+    if workers <= 1:
+        return [mapper(history_dir, shard, *args) for shard in shards]
+    chunksize = max(1, len(shards) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context()) as executor:
+        return list(executor.map(mapper, repeat(history_dir), shards, *(repeat(arg) for arg in args),
+                                 chunksize=chunksize))
+
+
+def _complete_length(f) -> int:
+    """Länge einer Datei bis hinter ihren letzten Zeilenumbruch (ohne unvollständige letzte Zeile)"""
+    end = os.fstat(f.fileno()).st_size
+    while end > 0:
+        start = max(0, end - 65536)
+        f.seek(start)
+        newline = f.read(end - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return 0
+
+
+def _scan_blocks(blocks: Iterable[bytes], keywords: List[bytes]) -> Iterator[bytes]:
+    """Zeilen aus aufeinanderfolgenden Blöcken, die ein Schlüsselwort enthalten; Zeilen über Blockgrenzen werden zusammengesetzt"""
+    tail = b''
+    for block in blocks:
+        start = 0
+        if tail:
+            newline = block.find(b'\n')
+            if newline < 0:
+                tail += block[:]
+                continue
+            line = tail + block[:newline]
+            tail = b''
+            lowered = line.lower()
+            if any(keyword in lowered for keyword in keywords):
+                yield line
+            start = newline + 1
+        end = max(block.rfind(b'\n', start) + 1, start)
+        yield from _matching_lines(block, keywords, start, end)
+        tail = block[end:]
+    # Eine unvollständige letzte Zeile (tail) wird nicht gelesen
+
+
+def _matching_lines(block, keywords: List[bytes], start: int, end: int) -> Iterator[bytes]:
+    """Zeilen aus block[start:end] (end folgt auf einen Zeilenumbruch), die ein Schlüsselwort enthalten"""
+    # Nur der Block wird kleingeschrieben kopiert; bytes.find sucht ohne Regex-Engine
+    lowered = block[start:end].lower()
+    line_starts = set()
+    for keyword in keywords:
+        position = lowered.find(keyword)
+        while position >= 0:
+            line_start = lowered.rfind(b'\n', 0, position) + 1
+            line_starts.add(line_start)
+            position = lowered.find(keyword, lowered.find(b'\n', position) + 1)
+    for line_start in sorted(line_starts):
+        yield block[start + line_start:start + lowered.find(b'\n', line_start)]
+
+
+def _decode_lines(lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    for line in lines:
+        try:
+            yield json_codec.loads(line)
+        except json_codec.JSONDecodeError:
+            continue
+
+
+def segment_stats(events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Index-Eintrag eines Segments: erster und letzter Zeitstempel, Anzahl Ereignisse je KI und Aktionstyp"""
+    start = end = None
+    count = 0
+    agents: Dict[str, int] = {}
+    actions: Dict[str, int] = {}
+    for event in events:
+        count += 1
+        timestamp = event.get('timestamp')
+        if timestamp:
+            start = timestamp if start is None or timestamp < start else start
+            end = timestamp if end is None or timestamp > end else end
+        ai_name = event.get('ai_name', '')
+        agents[ai_name] = agents.get(ai_name, 0) + 1
+        action_type = event.get('action_type', '')
+        actions[action_type] = actions.get(action_type, 0) + 1
+    return {'start': start, 'end': end, 'events': count, 'agents': agents, 'actions': actions}
+
+
+def _overlaps(entry: Dict[str, Any], since: Optional[datetime], until: Optional[datetime]) -> bool:
+    """Prüft, ob der Zeitraum eines Index-Eintrags [since, until] berührt"""
+    end = parse_history_timestamp(entry.get('end'))
+    start = parse_history_timestamp(entry.get('start'))
+    if since is not None and end is not None and end < since:
+        return False
+    if until is not None and start is not None and start > until:
+        return False
+    return True
+
+
+def _entry_within(entry: Dict[str, Any], since: Optional[datetime], until: Optional[datetime]) -> bool:
+    """Prüft, ob alle Ereignisse eines Index-Eintrags in [since, until] liegen"""
+    start = parse_history_timestamp(entry.get('start'))
+    end = parse_history_timestamp(entry.get('end'))
+    return ((since is None or (start is not None and start >= since))
+            and (until is None or (end is not None and end <= until)))
+
+
+def _value_filter(value: Any) -> Callable[[Any], bool]:
+    """Filter aus einem Wert, einer Menge von Werten oder einem kompilierten Ausdruck"""
+    if isinstance(value, re.Pattern):
+        return lambda field: isinstance(field, str) and value.search(field) is not None
+    if isinstance(value, (set, frozenset, list, tuple)):
+        values = set(value)
+        return lambda field: field in values
+    return lambda field: field == value
+
+
+def _entry_may_match(entry: Dict[str, Any], filters: List[Tuple[str, Callable[[Any], bool]]]) -> bool:
+    """Prüft über die Zähler eines Index-Eintrags, ob das Segment passende Ereignisse enthalten kann"""
+    for field, matches in filters:
+        values = entry.get(_INDEX_COUNTERS[field]) if field in _INDEX_COUNTERS else None
+        if values is not None and not any(matches(value) for value in values):
+            return False
+    return True
+
+
+def _in_range(event: Dict[str, Any], since: Optional[datetime], until: Optional[datetime]) -> bool:
+    if since is None and until is None:
+        return True
+    timestamp = parse_history_timestamp(event.get('timestamp'))
+    if timestamp is None:
+        return True
+    return (since is None or timestamp >= since) and (until is None or timestamp <= until)
+
+
+def _sorted_segments(names: List[str]) -> List[str]:
+    """Segmente in zeitlicher Reihenfolge; während der Komprimierung kann eines kurz doppelt existieren"""
+    stems = {name[:-3] for name in names if name.endswith('.gz')}
+    return sorted((name for name in names if name not in stems), key=_segment_sort_key)
+
+
+def _segment_sort_key(relative: str) -> Tuple[str, str, int]:
+    """Rotationszeitpunkt, dann Partition (Segmente ohne Partition zuerst), dann laufende Nummer"""
+    day, _, name = relative.rpartition('/')
+    stamp, counter = _SEGMENT_PATTERN.match(name).groups()
+    return stamp, day, int(counter or 0)
+
+
+class _FlushRequest:
+    """Markierung in der Warteschlange: alle vorher eingereihten Ereignisse schreiben"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class BufferedHistoryWriter:
+    """
+    Gepufferter Schreiber für einen HistoryLog mit eigenem Hintergrund-Thread
+    log und append reihen Ereignisse nur ein; der Thread schreibt sie gesammelt, sobald
+    batch_size Ereignisse vorliegen oder das älteste flush_interval Sekunden wartet.
+    Ist die Warteschlange voll, blockieren die Aufrufer, bis der Thread aufgeholt hat.
+    flush() wartet, bis alles Eingereihte geschrieben ist; close() zusätzlich auf das
+    Thread-Ende. Lesezugriffe über HistoryLog.iter_events sehen nur Geschriebenes.
+    """
+
+    def __init__(self, history_log: HistoryLog, batch_size: int = FLUSH_BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, max_queued: int = MAX_QUEUED_EVENTS):
+        self.history_log = history_log
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.write_errors = 0
+        self.pid = os.getpid()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+
+    def log(self, ai_name: str, action_type: str, affected_item: str, description: str,
+            output: str = '') -> Dict[str, Any]:
+        """Reiht ein Ereignis mit aktuellem Zeitstempel ein"""
+        event = make_history_event(timestamp_now(), ai_name, action_type, affected_item, description, output)
+        self.append([event])
+        return event
+
+    def append(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Reiht Ereignisse ein; nach close() wird direkt geschrieben"""
+        if self._closed:
+            self.history_log.append(events)
+            return
+        for event in events:
+            self._queue.put(event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wartet, bis alle bisher eingereihten Ereignisse geschrieben sind (False bei Zeitüberschreitung)"""
+        if self._closed:
+            return True
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Schreibt alle ausstehenden Ereignisse und beendet den Hintergrund-Thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _write(self, pending: List[Dict[str, Any]]) -> bool:
+        try:
+            self.history_log.append(pending)
+        except OSError as e:
+            self.write_errors += 1
+            print(f"Fehler beim Schreiben der History ({len(pending)} Ereignisse ausstehend): {e}")
+            return False
+        self.written += len(pending)
+        return True
+
+    def _run(self) -> None:
+        pending: List[Dict[str, Any]] = []
+        waiting: List[_FlushRequest] = []
+        deadline = 0.0
+        stopping = False
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if pending else None
+            try:
+                items = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                items = []
+            # Bereits eingereihte Ereignisse ohne Warten mitnehmen
+            while items and len(pending) + len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in items:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, _FlushRequest):
+                    waiting.append(item)
+                else:
+                    if not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    pending.append(item)
+
+            due = len(pending) >= self.batch_size or time.monotonic() >= deadline
+            if pending and (due or waiting or stopping):
+                if self._write(pending):
+                    pending = []
+                else:
+                    # Erneuter Versuch nach flush_interval; bis dahin staut sich die Warteschlange
+                    deadline = time.monotonic() + self.flush_interval
+                    if stopping:
+                        print(f"History: {len(pending)} Ereignisse konnten nicht geschrieben werden.")
+                        pending = []
+            if not pending:
+                for request in waiting:
+                    request.done.set()
+                waiting = []
+            if stopping:
+                for request in waiting:
+                    request.done.set()
+                return
+
+
+_logs: Dict[str, HistoryLog] = {}
+_logs_lock = threading.Lock()
+_writers: Dict[str, BufferedHistoryWriter] = {}
+
+
+def get_history_log(history_dir: str) -> HistoryLog:
+    """Gibt den prozessweit geteilten HistoryLog für ein history-Verzeichnis zurück"""
+    key = os.path.realpath(history_dir)
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None:
+            log = HistoryLog(key)
+            _logs[key] = log
+        return log
+
+
+def get_history_writer(history_dir: str) -> BufferedHistoryWriter:
+    """
+    Gibt den prozessweit geteilten gepufferten Schreiber für ein history-Verzeichnis zurück
+    Nach einem fork wird im Kindprozess ein eigener Schreiber (mit eigenem Thread) angelegt
+    """
+    log = get_history_log(history_dir)
+    with _logs_lock:
+        writer = _writers.get(log.history_dir)
+        if writer is None or writer.pid != os.getpid():
+            writer = BufferedHistoryWriter(log)
+            _writers[log.history_dir] = writer
+        return writer
+
+
+def _reset_locks_after_fork() -> None:
+    """
+    Der Schreiber-Thread existiert im Kindprozess nicht mehr; hielt er beim fork eine
+    Sperre, bliebe sie dort für immer belegt
+    """
+    global _logs_lock
+    _logs_lock = threading.Lock()
+    for log in _logs.values():
+        log._lock = threading.RLock()
+        log._cache_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_locks_after_fork)
+
+
+@atexit.register
+def _close_history_writers() -> None:
+    with _logs_lock:
+        writers = [writer for writer in _writers.values() if writer.pid == os.getpid()]
+    for writer in writers:
+        writer.close()
+
+
+if __name__ == '__main__':
+    # Test des Ereignisstroms (ohne Schreiben)
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    history_log = get_history_log(os.path.join(project_root, 'history'))
+
+    print("=== History Log Test ===")
+    print(f"Bisherige .log-Dateien: {len(history_log.legacy_files())}")
+    print(f"Segmente: {[os.path.basename(path) for path in history_log.segments()]}")
+    print(f"Dateien für die parallele Auswertung: {len(history_log.shards())}")
+    last_week = datetime.now() - timedelta(days=7)
+    print(f"Index-Einträge der letzten 7 Tage: {len(history_log.index_entries(since=last_week))}")
+    print(f"Ereignisse der letzten 7 Tage: {sum(1 for _ in history_log.iter_events(since=last_week))}")
+    for event in history_log.iter_events():
+        print(f"- {event['timestamp']} {event['ai_name']} {event['action_type']} {event['affected_item']} "
+              f"({event['source']})")
@@ -0,0 +1,167 @@
+import json
+import sys
+import time
+from collections.abc import Mapping, Sequence
+from typing import Any, IO, Union
+
+try:
+    import orjson
+except ImportError:  # optional: schnellerer Codec, sonst ujson bzw. Standardbibliothek
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+# Aktiver Codec: orjson > ujson > json (Standardbibliothek)
+CODEC = 'orjson' if orjson is not None else 'ujson' if ujson is not None else 'json'
+
+# Fehlerklasse beim Parsen unabhängig vom Codec (orjson.JSONDecodeError erbt davon)
+JSONDecodeError = json.JSONDecodeError
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+    _ORJSON_PRETTY_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2
+
+
+def _default(value: Any) -> Any:
+    """Serialisiert Mapping-/Sequence-Sichten (z.B. ReadOnlyDict aus dem Manifest-Cache)"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumpb(value: Any, pretty: bool = False) -> bytes:
+    """
+    Serialisiert nach UTF-8-Bytes
+    pretty=True rückt mit zwei Leerzeichen ein (für von Menschen gelesene Dateien),
+    sonst kompakt ohne Leerzeichen (für maschinenlesbare Dateien)
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=_default,
+                                option=_ORJSON_PRETTY_OPTIONS if pretty else _ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            pass  # z.B. Ganzzahlen > 64 Bit: Standardbibliothek übernimmt
+    return dumps(value, pretty).encode('utf-8')
+
+
+def dumps(value: Any, pretty: bool = False) -> str:
+    """Serialisiert nach Text (siehe dumpb)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=_default,
+                                option=_ORJSON_PRETTY_OPTIONS if pretty else _ORJSON_OPTIONS).decode('utf-8')
+        except (orjson.JSONEncodeError, TypeError):
+            pass
+    if pretty:
+        return json.dumps(value, indent=2, ensure_ascii=False, default=_default)
+    if ujson is not None:
+        try:
+            return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_default)
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Parst JSON aus Text oder UTF-8-Bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    if ujson is not None:
+        try:
+            return ujson.loads(data)
+        except ValueError as e:
+            raise JSONDecodeError(str(e), data if isinstance(data, str) else '', 0)
+    return json.loads(data)
+
+
+def load(f: IO) -> Any:
+    """Liest und parst eine geöffnete Datei (Text- oder Binärmodus)"""
+    return loads(f.read())
+
+
+def dump(value: Any, f: IO, pretty: bool = False) -> None:
+    """Schreibt value in eine geöffnete Datei (Text- oder Binärmodus)"""
+    if 'b' in getattr(f, 'mode', ''):
+        f.write(dumpb(value, pretty))
+    else:
+        f.write(dumps(value, pretty))
+
+
+def load_file(path: str) -> Any:
+    """Liest und parst eine JSON-Datei"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(path: str, value: Any, pretty: bool = False) -> None:
+    """Schreibt value als JSON-Datei"""
+    with open(path, 'wb') as f:
+        f.write(dumpb(value, pretty))
+
+
+def _benchmark_manifest(task_count: int) -> dict:
+    """Erzeugt ein Manifest mit task_count Aufgaben für den Benchmark"""
+    statuses = ['open', 'assigned', 'in_progress', 'completed']
+    return {
+        'project_name': 'Benchmark',
+        'goal': 'Dezentrale Web 3.0 Investment-Plattform mit Smart Contracts und Membership-System',
+        'ceo_directives': {'priority_focus': 'integration', 'budget_allocation': {}},
+        'teams': [{'name': f'Team_{i}', 'members': [f'AI_{i}_{j}' for j in range(3)]} for i in range(20)],
+        'tasks': [{
+            'task_id': f'task_{i:06d}',
+            'title': f'Aufgabe {i}: Integration der Plattform-Komponente',
+            'description': 'Komplexe Integration mit Blockchain-Anbindung und Sicherheitsprüfung für Kundengelder',
+            'status': statuses[i % len(statuses)],
+            'assigned_team': f'Team_{i % 20}',
+            'assigned_ai': f'AI_{i % 20}_{i % 3}',
+            'urgency': 'medium',
+            'dependencies': [f'task_{i - 1:06d}'] if i else [],
+            'due_date': None,
+            'completed_date': None
+        } for i in range(task_count)],
+    }
+
+
+def _measure(function, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    # Benchmark: Standardbibliothek gegen aktiven Codec auf einem Manifest mit 100k Aufgaben
+    task_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    manifest = _benchmark_manifest(task_count)
+    pretty_text = json.dumps(manifest, indent=2, ensure_ascii=False)
+    compact_bytes = dumpb(manifest)
+    size_mb = len(pretty_text.encode('utf-8')) / 1024 / 1024
+
+    print("=== JSON Codec Benchmark ===")
+    print(f"Aktiver Codec: {CODEC}")
+    print(f"Manifest: {task_count} Aufgaben, {size_mb:.1f} MB (eingerückt), "
+          f"{len(compact_bytes) / 1024 / 1024:.1f} MB (kompakt)")
+
+    results = [
+        ('parse', lambda: json.loads(pretty_text), lambda: loads(pretty_text.encode('utf-8'))),
+        ('dump (eingerückt)', lambda: json.dumps(manifest, indent=2, ensure_ascii=False),
+         lambda: dumpb(manifest, pretty=True)),
+        ('dump (kompakt)', lambda: json.dumps(manifest, ensure_ascii=False, separators=(',', ':')),
+         lambda: dumpb(manifest)),
+    ]
+    for name, stdlib_function, codec_function in results:
+        stdlib_time = _measure(stdlib_function)
+        codec_time = _measure(codec_function)
+        print(f"{name:20s} json: {stdlib_time * 1000:8.1f} ms ({size_mb / stdlib_time:6.1f} MB/s)   "
+              f"{CODEC}: {codec_time * 1000:8.1f} ms ({size_mb / codec_time:6.1f} MB/s)   "
+              f"Faktor {stdlib_time / codec_time:4.1f}x")
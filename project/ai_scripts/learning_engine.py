@@ -1,9 +1,121 @@
-import json
 import os
 import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict, Counter
+from functools import lru_cache
+
+import json_codec
+from history_log import HISTORY_LOG_NAME, format_history_event, get_history_log, map_history_shards
+from pattern_scanner import PatternScanner
+from storage_backend import open_project_store
+
+# Format des Analyse-Checkpoints; bei Änderung wird die Analyse neu aufgebaut
+HISTORY_CHECKPOINT_VERSION = 1
+# Zeitraum für aktuelle Probleme in Tagen
+RECENT_ISSUE_DAYS = 7
+
+
+def new_history_analysis() -> Dict[str, Any]:
+    """Leere Zähler der History-Analyse"""
+    return {
+        'total_logs': 0,
+        'error_frequency': {},
+        'success_patterns': {},
+        'agent_performance': {},
+        'time_patterns': {},
+        'task_patterns': {},
+        'recent_issues': []
+    }
+
+
+@lru_cache(maxsize=8)
+def _pattern_scanner(patterns: Tuple[str, ...]) -> PatternScanner:
+    """Scanner über Fehler- und Erfolgs-Pattern (je Prozess einmal kompiliert)"""
+    # Der Inhalt wird vor dem Scan kleingeschrieben, re.IGNORECASE ist daher nicht nötig
+    return PatternScanner(patterns)
+
+
+def analyze_history_event(event: Dict[str, Any], analysis: Dict[str, Any], now: datetime,
+                          error_patterns: List[str], success_patterns: List[str]) -> None:
+    """Rechnet ein History-Ereignis in die Zähler der Analyse ein"""
+    log_file = event.get('affected_item') or event['source']
+    analysis['total_logs'] += 1
+    
+    # Log-Inhalt analysieren
+    content = format_history_event(event).lower()
+    
+    # Agent aus KI-Name extrahieren
+    agent_match = re.search(r'ai_agent_(\w+)', event.get('ai_name', '').lower())
+    agent_name = agent_match.group(1) if agent_match else 'unknown'
+    performance = analysis['agent_performance'].setdefault(agent_name, {'errors': 0, 'successes': 0})
+    
+    # Fehler- und Erfolgs-Pattern in einem Durchlauf zählen
+    counts = _pattern_scanner(tuple(error_patterns + success_patterns)).counts(content)
+    error_counts = counts[:len(error_patterns)]
+    for pattern, matches in zip(error_patterns, error_counts):
+        if matches:
+            analysis['error_frequency'][pattern] = analysis['error_frequency'].get(pattern, 0) + matches
+            performance['errors'] += matches
+    
+    for pattern, matches in zip(success_patterns, counts[len(error_patterns):]):
+        if matches:
+            analysis['success_patterns'][pattern] = analysis['success_patterns'].get(pattern, 0) + matches
+            performance['successes'] += matches
+    
+    # Zeitbasierte Analyse (aus Zeitstempel)
+    time_match = re.search(r'(\d{4}-\d{2}-\d{2})', event.get('timestamp', ''))
+    if time_match:
+        date_str = time_match.group(1)
+        analysis['time_patterns'][date_str] = analysis['time_patterns'].get(date_str, 0) + 1
+    
+    # Task-Pattern analysieren
+    task_match = re.search(r'task_(\w+)', event.get('affected_item', '').lower())
+    if task_match:
+        task_type = task_match.group(1)
+        analysis['task_patterns'][task_type] = analysis['task_patterns'].get(task_type, 0) + 1
+    
+    # Aktuelle Probleme (letzte 7 Tage)
+    try:
+        file_date = datetime.strptime(time_match.group(1), '%Y-%m-%d')
+        if now - file_date <= timedelta(days=RECENT_ISSUE_DAYS):
+            for pattern, matches in zip(error_patterns, error_counts):
+                if matches:
+                    analysis['recent_issues'].append({
+                        'date': date_str,
+                        'agent': agent_name,
+                        'file': log_file,
+                        'pattern': pattern
+                    })
+    except:
+        pass
+
+
+def merge_history_analysis(analysis: Dict[str, Any], partial: Dict[str, Any]) -> None:
+    """
+    Addiert eine Teilanalyse zu analysis; in Reihenfolge der Ereignisse zusammengeführt entspricht
+    das Ergebnis (samt Reihenfolge der Schlüssel) einer seriellen Analyse
+    """
+    analysis['total_logs'] += partial['total_logs']
+    for key in ('error_frequency', 'success_patterns', 'time_patterns', 'task_patterns'):
+        counter = analysis[key]
+        for name, count in partial[key].items():
+            counter[name] = counter.get(name, 0) + count
+    for agent, counts in partial['agent_performance'].items():
+        performance = analysis['agent_performance'].setdefault(agent, {'errors': 0, 'successes': 0})
+        performance['errors'] += counts['errors']
+        performance['successes'] += counts['successes']
+    analysis['recent_issues'].extend(partial['recent_issues'])
+
+
+def _analyze_history_shard(history_dir: str, shard: str, error_patterns: List[str], success_patterns: List[str],
+                           now: datetime, position: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Teilanalyse einer History-Datei (Map-Schritt, läuft bei mehreren Workern im Prozesspool)"""
+    analysis = new_history_analysis()
+    for event in get_history_log(history_dir).iter_shard(shard, position=position):
+        analyze_history_event(event, analysis, now, error_patterns, success_patterns)
+    return analysis
+
 
 class LearningEngine:
     """
@@ -11,14 +123,19 @@ class LearningEngine:
     Analysiert Lessons Learned und History-Daten für proaktive Verbesserungen
     """
     
-    def __init__(self, project_root: str):
+    def __init__(self, project_root: str, history_workers: int = 1):
         self.project_root = project_root
         self.manifest_path = os.path.join(project_root, 'project_manifest.json')
+        self.manifest_store = open_project_store(project_root)
         self.history_dir = os.path.join(project_root, 'history')
         self.knowledge_base_dir = os.path.join(project_root, 'knowledge_base')
         self.lessons_learned_path = os.path.join(self.knowledge_base_dir, 'lessons_learned.md')
         self.known_issues_path = os.path.join(self.knowledge_base_dir, 'known_issues.md')
         self.ideas_path = os.path.join(self.knowledge_base_dir, 'ideas.md')
+        self.history_checkpoint_path = os.path.join(self.history_dir, 'learning_checkpoint.json')
+        self._history_checkpoint = None
+        # Prozesse für die History-Analyse (1 = seriell, 0 = alle CPU-Kerne)
+        self.history_workers = history_workers
         
         # Pattern für häufige Probleme
         self.error_patterns = [
@@ -44,8 +161,7 @@ class LearningEngine:
     
     def load_manifest(self) -> Dict[str, Any]:
         """Lädt das project_manifest.json"""
-        with open(self.manifest_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.manifest_store.load()
     
     def load_knowledge_base_file(self, file_path: str) -> str:
         """Lädt eine Knowledge Base Datei"""
@@ -60,79 +176,119 @@ class LearningEngine:
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
     
+    def load_history_checkpoint(self) -> Dict[str, Any]:
+        """
+        Lädt den Checkpoint der History-Analyse (Zähler und Lesepositionen)
+        Ein Checkpoint mit anderer Version oder anderen Mustern wird verworfen
+        """
+        if self._history_checkpoint is None:
+            try:
+                checkpoint = json_codec.load_file(self.history_checkpoint_path)
+            except (FileNotFoundError, json_codec.JSONDecodeError):
+                checkpoint = None
+            if (not isinstance(checkpoint, dict) or checkpoint.get('version') != HISTORY_CHECKPOINT_VERSION
+                    or checkpoint.get('patterns') != self.error_patterns + self.success_patterns):
+                checkpoint = {
+                    'version': HISTORY_CHECKPOINT_VERSION,
+                    'patterns': self.error_patterns + self.success_patterns,
+                    'legacy_last': '',
+                    'segments_done': [],
+                    'active': None,
+                    'analysis': new_history_analysis()
+                }
+            self._history_checkpoint = checkpoint
+        return self._history_checkpoint
+    
+    def save_history_checkpoint(self) -> None:
+        """Schreibt den Checkpoint der History-Analyse atomar"""
+        temp_path = f"{self.history_checkpoint_path}.{os.getpid()}.tmp"
+        json_codec.dump_file(temp_path, self._history_checkpoint)
+        os.replace(temp_path, self.history_checkpoint_path)
+    
+    def _process_new_history(self, checkpoint: Dict[str, Any]) -> bool:
+        """
+        Verarbeitet alle History-Einträge nach den Lesepositionen des Checkpoints
+        Gibt True zurück, wenn sich der Checkpoint geändert hat
+        """
+        history_log = get_history_log(self.history_dir)
+        analysis = checkpoint['analysis']
+        now = datetime.now()
+        
+        # Bisherige .log-Dateien werden nicht mehr beschrieben: nur neue Dateinamen verarbeiten
+        legacy = [name for name in history_log.legacy_files() if name > checkpoint['legacy_last']]
+        
+        # Abgeschlossene Segmente sind unveränderlich und werden genau einmal gelesen; das
+        # aktive Segment ab seiner Leseposition, die auch für seine spätere Ablage gilt
+        done = set(checkpoint['segments_done'])
+        present = set()
+        pending = {}
+        active_path = None
+        for path in history_log.segments():
+            if path == history_log.active_path:
+                active_path = path
+                continue
+            relative = history_log.relative_path(path)
+            segment = relative[:-3] if relative.endswith('.gz') else relative
+            present.add(segment)
+            if segment not in done:
+                pending[relative] = segment
+        
+        # Map-Reduce: Teilanalysen je Datei (mit history_workers > 1 im Prozesspool), in
+        # Dateireihenfolge zusammengeführt
+        shards = legacy + list(pending)
+        partials = map_history_shards(self.history_dir, _analyze_history_shard, shards, self.error_patterns,
+                                      self.success_patterns, now, checkpoint['active'], workers=self.history_workers)
+        for partial in partials:
+            merge_history_analysis(analysis, partial)
+        if legacy:
+            checkpoint['legacy_last'] = legacy[-1]
+        done.update(pending.values())
+        changed = bool(shards)
+        
+        if active_path is not None:
+            for event, position in history_log.read_segment_from(active_path, checkpoint['active']):
+                event['source'] = HISTORY_LOG_NAME
+                analyze_history_event(event, analysis, now, self.error_patterns, self.success_patterns)
+                checkpoint['active'] = position
+                changed = True
+        
+        # Gelöschte Segmente nicht weiter im Checkpoint führen
+        if done - present:
+            changed = True
+        checkpoint['segments_done'] = sorted(done & present)
+        return changed
+    
     def analyze_history_logs(self) -> Dict[str, Any]:
         """
         Analysiert alle History-Logs für Muster und Trends
+        Inkrementell: Zähler und Lesepositionen liegen im Checkpoint (history/learning_checkpoint.json),
+        verarbeitet werden nur Einträge, die seit dem letzten Aufruf hinzugekommen sind
         """
-        analysis = {
-            'total_logs': 0,
-            'error_frequency': defaultdict(int),
-            'success_patterns': defaultdict(int),
-            'agent_performance': defaultdict(lambda: {'errors': 0, 'successes': 0}),
-            'time_patterns': defaultdict(int),
-            'task_patterns': defaultdict(int),
-            'recent_issues': []
+        checkpoint = self.load_history_checkpoint()
+        changed = os.path.exists(self.history_dir) and self._process_new_history(checkpoint)
+        
+        # Aktuelle Probleme älter als 7 Tage verwerfen (Datumsvergleich als Text, JJJJ-MM-TT)
+        stored = checkpoint['analysis']
+        cutoff_day = (datetime.now() - timedelta(days=RECENT_ISSUE_DAYS)).strftime('%Y-%m-%d')
+        recent_issues = [issue for issue in stored['recent_issues'] if issue['date'] > cutoff_day]
+        if len(recent_issues) != len(stored['recent_issues']):
+            stored['recent_issues'] = recent_issues
+            changed = True
+        if changed:
+            self.save_history_checkpoint()
+        
+        # Kopie für den Aufrufer (der Checkpoint bleibt unverändert)
+        return {
+            'total_logs': stored['total_logs'],
+            'error_frequency': defaultdict(int, stored['error_frequency']),
+            'success_patterns': defaultdict(int, stored['success_patterns']),
+            'agent_performance': defaultdict(lambda: {'errors': 0, 'successes': 0},
+                                             {agent: dict(performance)
+                                              for agent, performance in stored['agent_performance'].items()}),
+            'time_patterns': defaultdict(int, stored['time_patterns']),
+            'task_patterns': defaultdict(int, stored['task_patterns']),
+            'recent_issues': [dict(issue) for issue in recent_issues]
         }
-        
-        if not os.path.exists(self.history_dir):
-            return analysis
-        
-        # Alle Log-Dateien durchgehen
-        for log_file in os.listdir(self.history_dir):
-            if log_file.endswith('.log'):
-                log_path = os.path.join(self.history_dir, log_file)
-                analysis['total_logs'] += 1
-                
-                # Log-Inhalt analysieren
-                with open(log_path, 'r', encoding='utf-8') as f:
-                    content = f.read().lower()
-                
-                # Agent aus Dateiname extrahieren
-                agent_match = re.search(r'ai_agent_(\w+)', log_file.lower())
-                agent_name = agent_match.group(1) if agent_match else 'unknown'
-                
-                # Fehler-Pattern suchen
-                for pattern in self.error_patterns:
-                    matches = re.findall(pattern, content, re.IGNORECASE)
-                    if matches:
-                        analysis['error_frequency'][pattern] += len(matches)
-                        analysis['agent_performance'][agent_name]['errors'] += len(matches)
-                
-                # Erfolgs-Pattern suchen
-                for pattern in self.success_patterns:
-                    matches = re.findall(pattern, content, re.IGNORECASE)
-                    if matches:
-                        analysis['success_patterns'][pattern] += len(matches)
-                        analysis['agent_performance'][agent_name]['successes'] += len(matches)
-                
-                # Zeitbasierte Analyse (aus Dateiname)
-                time_match = re.search(r'(\d{4}-\d{2}-\d{2})', log_file)
-                if time_match:
-                    date_str = time_match.group(1)
-                    analysis['time_patterns'][date_str] += 1
-                
-                # Task-Pattern analysieren
-                task_match = re.search(r'task_(\w+)', log_file.lower())
-                if task_match:
-                    task_type = task_match.group(1)
-                    analysis['task_patterns'][task_type] += 1
-                
-                # Aktuelle Probleme (letzte 7 Tage)
-                try:
-                    file_date = datetime.strptime(time_match.group(1), '%Y-%m-%d')
-                    if datetime.now() - file_date <= timedelta(days=7):
-                        for pattern in self.error_patterns:
-                            if re.search(pattern, content, re.IGNORECASE):
-                                analysis['recent_issues'].append({
-                                    'date': date_str,
-                                    'agent': agent_name,
-                                    'file': log_file,
-                                    'pattern': pattern
-                                })
-                except:
-                    pass
-        
-        return analysis
     
     def extract_lessons_learned(self) -> List[Dict[str, Any]]:
         """
@@ -399,7 +555,7 @@ class LearningEngine:
         
         # Zusammenfassung
         report += "## Zusammenfassung\n\n"
-        report += f"- **Analysierte Log-Dateien:** {history_analysis['total_logs']}\n"
+        report += f"- **Analysierte Log-Einträge:** {history_analysis['total_logs']}\n"
         report += f"- **Dokumentierte Lessons Learned:** {len(lessons)}\n"
         report += f"- **Identifizierte Warnungen:** {len(warnings)}\n"
         report += f"- **Verbesserungsvorschläge:** {len(improvements)}\n\n"
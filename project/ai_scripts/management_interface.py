@@ -1,9 +1,11 @@
-import json
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import uuid
 
+import json_codec
+from storage_backend import open_project_store
+
 class ManagementInterface:
     """
     Schnittstelle für menschliches Feedback und Management-Interaktion
@@ -18,6 +20,7 @@ class ManagementInterface:
         self.feedback_dir = os.path.join(self.management_dir, 'feedback')
         self.decisions_dir = os.path.join(self.management_dir, 'decisions')
         self.manifest_path = os.path.join(project_root, 'project_manifest.json')
+        self.manifest_store = open_project_store(project_root)
         
         # Management-Response-Status
         self.response_status = {
@@ -45,13 +48,11 @@ class ManagementInterface:
     
     def load_manifest(self) -> Dict[str, Any]:
         """Lädt das project_manifest.json"""
-        with open(self.manifest_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.manifest_store.load()
     
     def save_manifest(self, manifest: Dict[str, Any]) -> None:
         """Speichert das project_manifest.json"""
-        with open(self.manifest_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        self.manifest_store.save(manifest)
     
     def extract_ideas_for_review(self) -> List[Dict[str, Any]]:
         """Extrahiert KI-Vorschläge aus ideas.md für Management-Review"""
@@ -320,8 +321,6 @@ class ManagementInterface:
     
     def _process_approved_idea(self, decision: Dict[str, Any]) -> None:
         """Verarbeitet eine genehmigte Idee"""
-        manifest = self.load_manifest()
-        
         # Erstelle neue Aufgabe aus genehmigter Idee
         task_id = f"task_{decision['id']}_{datetime.now().strftime('%m%d')}"
         
@@ -348,12 +347,8 @@ class ManagementInterface:
         if decision.get('budget') and decision['budget'] != 'none':
             new_task['budget'] = decision['budget']
         
-        # Zu Manifest hinzufügen
-        if 'tasks' not in manifest:
-            manifest['tasks'] = []
-        
-        manifest['tasks'].append(new_task)
-        self.save_manifest(manifest)
+        # Zu Manifest hinzufügen (als Journal-Eintrag)
+        self.manifest_store.append_task(new_task)
     
     def _process_rejected_idea(self, decision: Dict[str, Any]) -> None:
         """Verarbeitet eine abgelehnte Idee"""
@@ -370,14 +365,14 @@ class ManagementInterface:
         
         if os.path.exists(rejection_file):
             with open(rejection_file, 'r', encoding='utf-8') as f:
-                rejections = json.load(f)
+                rejections = json_codec.load(f)
         else:
             rejections = []
         
         rejections.append(rejection_log)
         
         with open(rejection_file, 'w', encoding='utf-8') as f:
-            json.dump(rejections, f, indent=2, ensure_ascii=False)
+            json_codec.dump(rejections, f, pretty=True)
     
     def _process_revision_request(self, decision: Dict[str, Any]) -> None:
         """Verarbeitet eine Überarbeitungsanfrage"""
@@ -394,14 +389,14 @@ class ManagementInterface:
         
         if os.path.exists(revision_file):
             with open(revision_file, 'r', encoding='utf-8') as f:
-                revisions = json.load(f)
+                revisions = json_codec.load(f)
         else:
             revisions = []
         
         revisions.append(revision_request)
         
         with open(revision_file, 'w', encoding='utf-8') as f:
-            json.dump(revisions, f, indent=2, ensure_ascii=False)
+            json_codec.dump(revisions, f, pretty=True)
     
     def _save_management_decision(self, decision: Dict[str, Any]) -> None:
         """Speichert eine Management-Entscheidung"""
@@ -416,7 +411,7 @@ class ManagementInterface:
         decision_file = os.path.join(self.decisions_dir, f"{decision_record['decision_id']}.json")
         
         with open(decision_file, 'w', encoding='utf-8') as f:
-            json.dump(decision_record, f, indent=2, ensure_ascii=False)
+            json_codec.dump(decision_record, f, pretty=True)
     
     def generate_management_dashboard(self) -> str:
         """Generiert ein Management-Dashboard mit Übersicht"""
@@ -439,7 +434,7 @@ class ManagementInterface:
                     
                     try:
                         with open(os.path.join(self.decisions_dir, filename), 'r', encoding='utf-8') as f:
-                            decision = json.load(f)
+                            decision = json_codec.load(f)
                         
                         status = decision.get('decision', {}).get('status', '')
                         if status == 'approved':
@@ -0,0 +1,226 @@
+import os
+from datetime import datetime
+from typing import List, Dict, Any, Tuple
+
+import json_codec
+
+
+class JsonPatchError(Exception):
+    """Fehler beim Anwenden einer JSON-Patch-Operation"""
+
+
+def parse_pointer(path: str) -> List[str]:
+    """Zerlegt einen JSON-Pointer (RFC 6901) in seine Segmente"""
+    if path == '':
+        return []
+    if not path.startswith('/'):
+        raise JsonPatchError(f"Ungültiger JSON-Pointer: {path}")
+    return [part.replace('~1', '/').replace('~0', '~') for part in path[1:].split('/')]
+
+
+def escape_pointer_segment(segment: str) -> str:
+    """Maskiert ein Segment für die Verwendung in einem JSON-Pointer"""
+    return str(segment).replace('~', '~0').replace('/', '~1')
+
+
+def _resolve_parent(document: Any, parts: List[str]) -> Tuple[Any, str]:
+    """Liefert den Container und den letzten Schlüssel eines Pointers"""
+    if not parts:
+        raise JsonPatchError("Operationen auf das Wurzeldokument werden nicht unterstützt")
+    target = document
+    for part in parts[:-1]:
+        if isinstance(target, list):
+            target = target[int(part)]
+        else:
+            target = target[part]
+    return target, parts[-1]
+
+
+def _list_position(container: List[Any], key: str, inserting: bool = False) -> int:
+    """Tatsächliche Listenposition eines Pointer-Segments (wie list.insert bzw. Indexzugriff)"""
+    index = int(key)
+    if inserting:
+        return max(0, len(container) + index) if index < 0 else min(index, len(container))
+    if not -len(container) <= index < len(container):
+        raise IndexError(f"Index {index} außerhalb der Liste")
+    return index % len(container)
+
+
+def _undo(steps: List[Tuple[Any, ...]]) -> None:
+    """Nimmt bereits angewendete Operationen in umgekehrter Reihenfolge zurück"""
+    for action, container, key, value in reversed(steps):
+        if action == 'set':
+            container[key] = value
+        elif action == 'delete':
+            del container[key]
+        else:  # insert
+            container.insert(key, value)
+
+
+def apply_patch(document: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Wendet JSON-Patch-Operationen (add, replace, remove, test) direkt auf ein Dokument an
+    Schlägt eine Operation fehl, werden die vorherigen zurückgenommen: das Dokument bleibt unverändert
+    """
+    steps: List[Tuple[Any, ...]] = []
+    for operation in operations:
+        op = operation.get('op')
+        try:
+            container, key = _resolve_parent(document, parse_pointer(operation['path']))
+
+            if op == 'test':
+                current = container[int(key)] if isinstance(container, list) else container[key]
+                if current != operation['value']:
+                    raise JsonPatchError(f"Test fehlgeschlagen für {operation['path']}")
+            elif op == 'add':
+                if isinstance(container, list):
+                    position = len(container) if key == '-' else _list_position(container, key, inserting=True)
+                    container.insert(position, operation['value'])
+                    steps.append(('delete', container, position, None))
+                else:
+                    steps.append(('set', container, key, container[key]) if key in container
+                                 else ('delete', container, key, None))
+                    container[key] = operation['value']
+            elif op == 'replace':
+                if isinstance(container, list):
+                    position = _list_position(container, key)
+                else:
+                    if key not in container:
+                        raise JsonPatchError(f"Pfad nicht vorhanden: {operation['path']}")
+                    position = key
+                steps.append(('set', container, position, container[position]))
+                container[position] = operation['value']
+            elif op == 'remove':
+                if isinstance(container, list):
+                    position = _list_position(container, key)
+                    steps.append(('insert', container, position, container[position]))
+                else:
+                    position = key
+                    steps.append(('set', container, position, container[position]))
+                del container[position]
+            else:
+                raise JsonPatchError(f"Nicht unterstützte Operation: {op}")
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            _undo(steps)
+            raise JsonPatchError(f"Pfad {operation.get('path')} nicht anwendbar: {e}")
+        except JsonPatchError:
+            _undo(steps)
+            raise
+
+    return document
+
+
+def truncate_torn_tail(f) -> None:
+    """
+    Entfernt eine unvollständige letzte Zeile einer im Binärmodus (a+b) geöffneten Datei,
+    z.B. nach einem Absturz beim Schreiben
+    """
+    size = f.seek(0, os.SEEK_END)
+    if size == 0:
+        return
+    f.seek(size - 1)
+    if f.read(1) == b'\n':
+        return
+
+    position = size
+    while position > 0:
+        step = min(4096, position)
+        position -= step
+        f.seek(position)
+        newline = f.read(step).rfind(b'\n')
+        if newline != -1:
+            f.truncate(position + newline + 1)
+            return
+    f.truncate(0)
+
+
+class ManifestJournal:
+    """
+    Append-only Write-Ahead-Journal für Manifest-Änderungen
+    Jede Zeile enthält einen Datensatz mit Sequenznummer und JSON-Patch-Operationen
+    """
+
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+
+    def size(self) -> int:
+        """Aktuelle Größe des Journals in Bytes (0, falls nicht vorhanden)"""
+        try:
+            return os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, seq: int, operations: List[Dict[str, Any]]) -> int:
+        """Hängt einen Datensatz an und synchronisiert ihn auf die Platte"""
+        record = {
+            'seq': seq,
+            'timestamp': datetime.now().isoformat(timespec='seconds') + 'Z',
+            'ops': operations
+        }
+        line = json_codec.dumpb(record) + b'\n'
+
+        with open(self.journal_path, 'a+b') as f:
+            truncate_torn_tail(f)
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def read(self, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Liest alle vollständigen Datensätze ab einem Byte-Offset
+        Eine unvollständige letzte Zeile (abgebrochener Schreibvorgang) wird ignoriert
+        """
+        records = []
+        if not os.path.exists(self.journal_path):
+            return records, 0
+
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            for raw_line in f:
+                if not raw_line.endswith(b'\n'):
+                    break
+                offset += len(raw_line)
+                if raw_line.strip():
+                    records.append(json_codec.loads(raw_line))
+
+        return records, offset
+
+    def truncate(self) -> None:
+        """Leert das Journal nach einer Kompaktierung"""
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def diff_documents(old: Any, new: Any, path: str = '') -> List[Dict[str, Any]]:
+    """
+    Berechnet JSON-Patch-Operationen, die old in new überführen
+    Listen werden elementweise verglichen; angehängte Elemente werden als '-' hinzugefügt
+    """
+    operations = []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                operations.append({'op': 'remove', 'path': f'{path}/{escape_pointer_segment(key)}'})
+        for key, value in new.items():
+            child_path = f'{path}/{escape_pointer_segment(key)}'
+            if key not in old:
+                operations.append({'op': 'add', 'path': child_path, 'value': value})
+            else:
+                operations.extend(diff_documents(old[key], value, child_path))
+
+    elif isinstance(old, list) and isinstance(new, list) and len(new) >= len(old):
+        for position, item in enumerate(old):
+            operations.extend(diff_documents(item, new[position], f'{path}/{position}'))
+        for item in new[len(old):]:
+            operations.append({'op': 'add', 'path': f'{path}/-', 'value': item})
+
+    elif old != new or type(old) is not type(new):
+        if not path:
+            raise JsonPatchError("Das Wurzeldokument kann nicht ersetzt werden")
+        operations.append({'op': 'replace', 'path': path, 'value': new})
+
+    return operations
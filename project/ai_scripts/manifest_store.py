@@ -0,0 +1,510 @@
+import os
+import random
+import tempfile
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Nicht-POSIX-Systeme: keine prozessübergreifende Sperre
+    fcntl = None
+
+import json_codec
+from manifest_stream import filter_tasks, iter_json_file_array
+from task_index import TaskIndex
+from manifest_journal import (ManifestJournal, JsonPatchError, apply_patch, diff_documents,
+                              escape_pointer_segment)
+
+
+class ReadOnlyDict(Mapping):
+    """
+    Schreibgeschützte Sicht auf ein Dictionary aus dem Manifest-Cache
+    Verschachtelte Dictionaries und Listen werden ebenfalls schreibgeschützt zurückgegeben
+    """
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def __getitem__(self, key):
+        return freeze(self._data[key])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"ReadOnlyDict({self._data!r})"
+
+    def copy(self) -> Dict[str, Any]:
+        """Gibt eine veränderbare, tiefe Kopie zurück"""
+        return thaw(self._data)
+
+
+class ReadOnlyList(Sequence):
+    """
+    Schreibgeschützte Sicht auf eine Liste aus dem Manifest-Cache
+    """
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data: list):
+        self._data = data
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadOnlyList(self._data[index])
+        return freeze(self._data[index])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ReadOnlyList):
+            return self._data == other._data
+        if isinstance(other, list):
+            return self._data == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ReadOnlyList({self._data!r})"
+
+    def copy(self) -> list:
+        """Gibt eine veränderbare, tiefe Kopie zurück"""
+        return thaw(self._data)
+
+
+def freeze(value: Any) -> Any:
+    """Verpackt Dictionaries und Listen in schreibgeschützte Sichten"""
+    if isinstance(value, dict):
+        return ReadOnlyDict(value)
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Erzeugt eine veränderbare, tiefe Kopie (auch aus schreibgeschützten Sichten)"""
+    if isinstance(value, (ReadOnlyDict, ReadOnlyList)):
+        value = value._data
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+class ManifestStore:
+    """
+    Prozessweiter Cache für das project_manifest.json
+    Das Manifest wird nur neu geparst, wenn sich (mtime, size, inode) der Datei ändern.
+    Einzelne Änderungen werden als JSON-Patch im Journal angehängt und beim Lesen
+    nachgespielt; ab compact_threshold Datensätzen wird in den Snapshot kompaktiert.
+    Schreibzugriffe sind über eine fcntl-Sperre (project_manifest.json.lock) zwischen
+    Prozessen serialisiert, Snapshots werden atomar per os.replace ersetzt.
+    """
+
+    def __init__(self, manifest_path: str, compact_threshold: int = 500):
+        self.manifest_path = manifest_path
+        self.journal = ManifestJournal(os.path.splitext(manifest_path)[0] + '.journal.jsonl')
+        self.compact_threshold = compact_threshold
+        self.lock_path = manifest_path + '.lock'
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._data: Optional[Dict[str, Any]] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._seq = 0
+        self._task_index: Optional[TaskIndex] = None
+
+    def _stat_signature(self) -> Tuple[int, int, int]:
+        """Ermittelt die Datei-Signatur (mtime, size, inode) des Manifests"""
+        stat = os.stat(self.manifest_path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    @contextmanager
+    def locked(self, shared: bool = False):
+        """
+        Hält die prozessübergreifende Manifest-Sperre (verschachtelbar innerhalb eines Prozesses)
+        """
+        with self._lock:
+            if self._lock_depth == 0:
+                self._lock_file = open(self.lock_path, 'a+')
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    if fcntl is not None:
+                        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def _replay_journal(self, offset: int) -> None:
+        """Spielt Journal-Datensätze ab einem Offset auf das gecachte Manifest ein"""
+        records, self._journal_offset = self.journal.read(offset)
+        for record in records:
+            if record['seq'] <= self._seq:
+                continue  # Bereits im Snapshot enthalten
+            try:
+                apply_patch(self._data, record['ops'])
+                self._update_task_index(record['ops'])
+            except JsonPatchError as e:
+                # z.B. nach manueller Bearbeitung des Snapshots; apply_patch nimmt bereits
+                # angewendete Operationen zurück, Cache und Aufgaben-Index bleiben unverändert
+                print(f"Journal-Eintrag {record['seq']} übersprungen: {e}")
+            self._seq = record['seq']
+            self._journal_records += 1
+
+    def _is_cached(self) -> bool:
+        """Prüft ohne zu parsen, ob der Cache dem Stand von Snapshot und Journal entspricht"""
+        try:
+            return self._data is not None and self._stat_signature() == self._signature \
+                and self.journal.size() == self._journal_offset
+        except FileNotFoundError:
+            return False
+
+    def _current(self) -> Dict[str, Any]:
+        """Gibt das gecachte Manifest zurück und parst es nur bei Änderungen neu"""
+        with self._lock:
+            if self._is_cached():
+                return self._data
+
+            # Änderungen unter geteilter Sperre einlesen, damit keine Kompaktierung dazwischenkommt
+            with self.locked(shared=True):
+                signature = self._stat_signature()
+                journal_size = self.journal.size()
+
+                if self._data is None or signature != self._signature or journal_size < self._journal_offset:
+                    with open(self.manifest_path, 'rb') as f:
+                        self._data = json_codec.load(f)
+                    self._task_index = None
+                    self._signature = signature
+                    self._seq = self._data.get('metadata', {}).get('journal_seq', 0)
+                    self._journal_records = 0
+                    self._replay_journal(0)
+                elif journal_size != self._journal_offset:
+                    self._replay_journal(self._journal_offset)
+
+            return self._data
+
+    def _write_snapshot(self, data: Dict[str, Any]) -> None:
+        """Schreibt den vollständigen Snapshot atomar und leert das Journal (Sperre erforderlich)"""
+        data.setdefault('metadata', {})['journal_seq'] = self._seq
+        manifest_dir = os.path.dirname(self.manifest_path) or '.'
+        fd, temp_path = tempfile.mkstemp(prefix='.project_manifest.', suffix='.tmp', dir=manifest_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                json_codec.dump(data, f, pretty=True)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                mode = os.stat(self.manifest_path).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, self.manifest_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.journal.truncate()
+        if data is not self._data:
+            self._task_index = None
+        self._data = data
+        self._signature = self._stat_signature()
+        self._journal_offset = 0
+        self._journal_records = 0
+
+    @property
+    def version(self) -> Optional[Tuple[Tuple[int, int, int], int]]:
+        """Signatur des aktuell gecachten Manifest-Standes (Snapshot + Journal-Position)"""
+        with self._lock:
+            self._current()
+            return (self._signature, self._journal_offset)
+
+    def last_modified(self) -> float:
+        """Zeitpunkt der letzten Änderung an Snapshot oder Journal"""
+        mtime = os.path.getmtime(self.manifest_path)
+        if self.journal.size():
+            mtime = max(mtime, os.path.getmtime(self.journal.journal_path))
+        return mtime
+
+    def view(self) -> ReadOnlyDict:
+        """Gibt eine schreibgeschützte Sicht auf das Manifest zurück (ohne Kopie)"""
+        return ReadOnlyDict(self._current())
+
+    def load(self) -> Dict[str, Any]:
+        """Gibt eine veränderbare Kopie des Manifests zurück"""
+        with self._lock:
+            return thaw(self._current())
+
+    def save(self, manifest: Dict[str, Any]) -> None:
+        """Speichert das vollständige Manifest als neuen Snapshot"""
+        with self.locked():
+            try:
+                self._current()
+            except FileNotFoundError:
+                pass
+            self._write_snapshot(thaw(manifest))
+
+    def apply(self, operations: List[Dict[str, Any]]) -> None:
+        """
+        Wendet JSON-Patch-Operationen an und hängt sie als einen Datensatz an das Journal an
+        """
+        with self.locked():
+            operations = thaw(operations)
+            data = self._current()
+            try:
+                apply_patch(data, operations)
+                self._update_task_index(operations)
+                self._journal_offset = self.journal.append(self._seq + 1, operations)
+            except Exception:
+                self.invalidate()
+                raise
+            self._seq += 1
+            self._journal_records += 1
+
+            if self._journal_records >= self.compact_threshold:
+                self.compact()
+
+    def compact(self) -> None:
+        """Überführt alle Journal-Einträge in den Snapshot"""
+        with self.locked():
+            self._write_snapshot(self._current())
+
+    def get_field(self, key: str, default: Any = None) -> Any:
+        """Einzelnes Top-Level-Feld des Manifests (z.B. kill_switch), schreibgeschützt"""
+        return self.view().get(key, default)
+
+    def iter_items(self, key: str) -> Iterator[Any]:
+        """
+        Elemente einer Top-Level-Liste des Manifests (z.B. 'tasks', 'teams')
+        Ohne gültigen Cache und ohne offene Journal-Einträge werden sie einzeln aus dem
+        Snapshot gestreamt, statt das gesamte Manifest zu parsen
+        """
+        with self._lock:
+            if self._is_cached() or self.journal.size():
+                return iter([freeze(item) for item in self._current().get(key, [])])
+        return iter_json_file_array(self.manifest_path, key)
+
+    def iter_tasks(self, fields: Optional[Sequence[str]] = None, **filters: Any) -> Iterator[Mapping[str, Any]]:
+        """
+        Aufgaben einzeln, gefiltert nach field == value und optional auf fields reduziert
+        Bei gültigem Cache werden indizierte Filter über den Aufgaben-Index aufgelöst
+        """
+        with self._lock:
+            if filters and self._is_cached() and all(field in TaskIndex.INDEXED_FIELDS for field in filters):
+                field, value = next(iter(filters.items()))
+                tasks = [ReadOnlyDict(task) for task in self.task_index().find(field, value)]
+                return filter_tasks(tasks, fields, **filters)
+        return filter_tasks(self.iter_items('tasks'), fields, **filters)
+
+    def task_index(self) -> TaskIndex:
+        """Index über die Aufgaben des aktuellen Manifest-Standes (wird inkrementell gepflegt)"""
+        with self._lock:
+            data = self._current()
+            if self._task_index is None:
+                self._task_index = TaskIndex(data.get('tasks', []))
+            return self._task_index
+
+    def _update_task_index(self, operations: List[Dict[str, Any]]) -> None:
+        """Hält den Aufgaben-Index nach angewendeten Patch-Operationen aktuell"""
+        if self._task_index is None:
+            return
+
+        changed_positions = set()
+        for operation in operations:
+            parts = operation['path'].split('/')
+            if len(parts) < 2 or parts[1] != 'tasks' or operation['op'] == 'test':
+                continue
+            if len(parts) == 2 or (len(parts) == 3 and operation['op'] != 'replace' and parts[2] != '-'):
+                # Liste ersetzt bzw. Einfügen/Löschen verschiebt Positionen
+                self._task_index = None
+                return
+            if parts[2] != '-':
+                changed_positions.add(int(parts[2]))
+
+        self._task_index.sync_appended()
+        for position in changed_positions:
+            self._task_index.reindex(position)
+
+    def find_task(self, task_id: str) -> Optional[ReadOnlyDict]:
+        """Schreibgeschützte Sicht auf eine Aufgabe oder None"""
+        with self._lock:
+            return freeze(self.task_index().get(task_id))
+
+    def find_tasks(self, field: str, value: Any) -> List[ReadOnlyDict]:
+        """Schreibgeschützte Sichten aller Aufgaben mit field == value"""
+        with self._lock:
+            return [ReadOnlyDict(task) for task in self.task_index().find(field, value)]
+
+    def _task_position(self, task_id: str) -> Optional[int]:
+        """Ermittelt die Position einer Aufgabe in manifest['tasks']"""
+        return self.task_index().position(task_id)
+
+    def update_tasks(self, updates: Dict[str, Dict[str, Any]],
+                     manifest_fields: Optional[Dict[str, Any]] = None,
+                     expected: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """
+        Ändert Felder mehrerer Aufgaben als einen einzigen Journal-Datensatz
+        expected {task_id: {field: value}} wird unter der Sperre geprüft (siehe check_expected)
+        """
+        with self.locked():
+            data = self._current()
+            tests = []
+            operations = []
+
+            for task_id, fields in updates.items():
+                position = self._task_position(task_id)
+                if position is None:
+                    raise KeyError(f"Aufgabe {task_id} nicht im Manifest gefunden")
+                check_expected(task_id, data['tasks'][position], (expected or {}).get(task_id))
+                tests.append({'op': 'test', 'path': f'/tasks/{position}/task_id', 'value': task_id})
+                for field, value in fields.items():
+                    operations.append({
+                        'op': 'add',
+                        'path': f'/tasks/{position}/{escape_pointer_segment(field)}',
+                        'value': value
+                    })
+
+            for field, value in (manifest_fields or {}).items():
+                operations.append({'op': 'add', 'path': f'/{escape_pointer_segment(field)}', 'value': value})
+
+            if operations:
+                self.apply(tests + operations)
+
+    def update_task(self, task_id: str, fields: Dict[str, Any],
+                    manifest_fields: Optional[Dict[str, Any]] = None,
+                    expected: Optional[Dict[str, Any]] = None) -> None:
+        """Ändert Felder einer einzelnen Aufgabe (nur, wenn sie expected entspricht)"""
+        self.update_tasks({task_id: fields}, manifest_fields, {task_id: expected} if expected else None)
+
+    def append_task(self, task: Dict[str, Any]) -> None:
+        """Fügt eine neue Aufgabe an manifest['tasks'] an"""
+        with self.locked():
+            operations = []
+            if 'tasks' not in self._current():
+                operations.append({'op': 'add', 'path': '/tasks', 'value': []})
+            operations.append({'op': 'add', 'path': '/tasks/-', 'value': task})
+            self.apply(operations)
+
+    def commit(self, manifest: Dict[str, Any], base_version) -> None:
+        """
+        Übernimmt ein verändertes Manifest, sofern seit base_version niemand geschrieben hat
+        Die Differenz wird als ein Journal-Datensatz angehängt
+        """
+        with self.locked():
+            if self.version != base_version:
+                raise ManifestConflictError("Manifest wurde zwischenzeitlich von einem anderen Agenten geändert")
+            operations = diff_documents(self._current(), manifest)
+            if operations:
+                self.apply(operations)
+
+    def invalidate(self) -> None:
+        """Verwirft den Cache, das nächste Lesen parst die Datei neu"""
+        with self._lock:
+            self._data = None
+            self._signature = None
+            self._journal_offset = 0
+            self._journal_records = 0
+            self._seq = 0
+            self._task_index = None
+
+
+class ManifestConflictError(Exception):
+    """Das Manifest wurde während einer Transaktion von einem anderen Schreiber geändert"""
+
+
+def check_expected(task_id: str, task: Mapping[str, Any], expected: Optional[Mapping[str, Any]]) -> None:
+    """
+    Bedingung für update_tasks: jedes Feld in expected muss den angegebenen Wert haben
+    (fehlende Felder gelten als None), sonst ManifestConflictError
+    """
+    for field, value in (expected or {}).items():
+        if task.get(field) != value:
+            raise ManifestConflictError(
+                f"Aufgabe {task_id}: {field} ist {task.get(field)!r} statt {value!r}")
+
+
+class ManifestTransaction:
+    """
+    Optimistische Manifest-Transaktion
+
+    with ManifestTransaction(store) as manifest:
+        manifest['kill_switch'] = True
+
+    Beim Verlassen wird unter Sperre geprüft, ob sich die Manifest-Version seit Beginn
+    geändert hat; in diesem Fall wird ManifestConflictError ausgelöst.
+    """
+
+    def __init__(self, store: 'ManifestStore'):
+        self.store = store
+        self.manifest: Optional[Dict[str, Any]] = None
+        self._base_version = None
+
+    def __enter__(self) -> Dict[str, Any]:
+        with self.store._lock:
+            self._base_version = self.store.version
+            self.manifest = self.store.load()
+        return self.manifest
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is None:
+            self.store.commit(self.manifest, self._base_version)
+        return False
+
+
+def run_transaction(store: 'ManifestStore', mutate: Callable[[Dict[str, Any]], Any],
+                    retries: int = 5, backoff: float = 0.05) -> Any:
+    """
+    Führt mutate(manifest) in einer ManifestTransaction aus und wiederholt bei Konflikten
+    mutate muss daher frei von Seiteneffekten außerhalb des Manifests sein
+    """
+    for attempt in range(retries + 1):
+        try:
+            with ManifestTransaction(store) as manifest:
+                result = mutate(manifest)
+            return result
+        except ManifestConflictError:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+
+_stores: Dict[str, ManifestStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_manifest_store(manifest_path: str) -> ManifestStore:
+    """Gibt den prozessweit geteilten ManifestStore für einen Manifest-Pfad zurück"""
+    key = os.path.realpath(manifest_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ManifestStore(key)
+            _stores[key] = store
+        return store
+
+
+if __name__ == '__main__':
+    # Test des Manifest-Caches
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    store = get_manifest_store(os.path.join(project_root, 'project_manifest.json'))
+
+    print("=== Manifest Store Test ===")
+    manifest = store.view()
+    print(f"Projekt: {manifest.get('project_name')}")
+    print(f"Aufgaben: {len(manifest.get('tasks', []))}")
+    print(f"Cache wiederverwendet: {store.view()._data is manifest._data}")
@@ -0,0 +1,146 @@
+import json
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, IO, Iterable, Iterator, Mapping, Optional, Sequence
+
+# raw_decode der Standardbibliothek parst einen einzelnen Wert ab einer Position und liefert
+# dessen Ende; damit lassen sich Array-Elemente einzeln aus dem Datei-Puffer lösen
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DELIMITERS = ' \t\n\r,:]}'
+
+
+class _StreamBuffer:
+    """
+    Textpuffer über einer geöffneten JSON-Datei
+    Bereits verarbeitete Zeichen werden beim Nachladen verworfen, der Speicherbedarf bleibt
+    daher auf Blockgröße plus größtes Einzelelement begrenzt.
+    """
+
+    def __init__(self, f: IO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self, size: Optional[int] = None) -> bool:
+        """Lädt den nächsten Block nach; False am Dateiende"""
+        if self.eof:
+            return False
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Nächstes Zeichen nach Leerraum ('' am Dateiende)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.read_more():
+                return ''
+
+    def expect(self, characters: str) -> str:
+        """Liest eines der erwarteten Strukturzeichen"""
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Ungültiges JSON: '{characters}' erwartet, '{character}' gefunden")
+        self.pos += 1
+        return character
+
+    def value(self) -> Any:
+        """Parst den nächsten vollständigen JSON-Wert"""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                # Nur ein folgendes Trennzeichen beweist, dass der Wert (z.B. eine Zahl) vollständig ist
+                if self.eof or (end < len(self.text) and self.text[end] in _DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Wert reicht über den Puffer hinaus: mit wachsender Blockgröße nachladen
+            if self.read_more(size):
+                size *= 2
+
+
+def iter_json_array(f: IO, key: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Liefert die Elemente des Arrays unter dem Top-Level-Schlüssel key einzeln
+    Andere Top-Level-Werte werden übersprungen; fehlt der Schlüssel, wird nichts geliefert
+    """
+    buffer = _StreamBuffer(f, chunk_size)
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        return
+
+    while True:
+        name = buffer.value()
+        buffer.expect(':')
+        if name == key and buffer.peek() == '[':
+            buffer.expect('[')
+            if buffer.peek() == ']':
+                return
+            while True:
+                yield buffer.value()
+                if buffer.expect(',]') == ']':
+                    return
+        buffer.value()
+        if buffer.expect(',}') == '}':
+            return
+
+
+def iter_json_file_array(path: str, key: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Wie iter_json_array, öffnet die Datei selbst"""
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from iter_json_array(f, key, chunk_size)
+
+
+def task_matches(task: Mapping[str, Any], filters: Mapping[str, Any]) -> bool:
+    """Prüft, ob eine Aufgabe allen Feldfiltern (field == value) entspricht"""
+    return all(task.get(field) == value for field, value in filters.items())
+
+
+def project_task(task: Mapping[str, Any], fields: Optional[Sequence[str]]) -> Mapping[str, Any]:
+    """Reduziert eine Aufgabe auf die angefragten Felder (fehlende Felder als None)"""
+    if fields is None:
+        return task
+    return {field: task.get(field) for field in fields}
+
+
+def filter_tasks(tasks: Iterable[Mapping[str, Any]], fields: Optional[Sequence[str]] = None,
+                 **filters: Any) -> Iterator[Mapping[str, Any]]:
+    """Filtert und projiziert einen Aufgaben-Strom"""
+    for task in tasks:
+        if task_matches(task, filters):
+            yield project_task(task, fields)
+
+
+def status_histogram(store, field: str = 'status', **filters: Any) -> Counter:
+    """
+    Häufigkeiten der Werte eines Aufgabenfeldes (Standard: status)
+    Die Aufgaben werden einzeln gestreamt, der Speicherbedarf hängt nicht von ihrer Anzahl ab
+    """
+    return Counter(task[field] for task in store.iter_tasks((field,), **filters))
+
+
+if __name__ == '__main__':
+    # Test des Streaming-Readers
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    from storage_backend import open_project_store
+
+    manifest_path = os.path.join(project_root, 'project_manifest.json')
+
+    print("=== Manifest Stream Test ===")
+    for task in iter_json_file_array(manifest_path, 'tasks'):
+        print(f"- {task.get('task_id')}: {task.get('status')}")
+    print(f"Status-Histogramm: {dict(status_histogram(open_project_store(project_root)))}")
@@ -1,4 +1,3 @@
-import json
 import os
 import hashlib
 from datetime import datetime, timedelta
@@ -6,6 +5,9 @@ from typing import List, Dict, Any, Optional, Set
 import difflib
 import re
 
+import json_codec
+from storage_backend import open_project_store
+
 class NotificationSystem:
     """
     Transparentes Änderungsbenachrichtigungssystem für KI-Agenten
@@ -15,6 +17,7 @@ class NotificationSystem:
     def __init__(self, project_root: str):
         self.project_root = project_root
         self.manifest_path = os.path.join(project_root, 'project_manifest.json')
+        self.manifest_store = open_project_store(project_root)
         self.guidelines_path = os.path.join(project_root, 'AI_GUIDELINES.md')
         self.notifications_dir = os.path.join(project_root, 'notifications')
         self.state_file = os.path.join(self.notifications_dir, 'file_states.json')
@@ -57,10 +60,8 @@ class NotificationSystem:
         states = {}
         
         for file_key, file_info in self.monitored_files.items():
-            if os.path.exists(file_info['path']):
-                with open(file_info['path'], 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
+            content = self._read_content(file_key, file_info['path'])
+            if content is not None:
                 states[file_key] = {
                     'last_hash': hashlib.md5(content.encode()).hexdigest(),
                     'last_modified': datetime.now().isoformat(),
@@ -68,27 +69,44 @@ class NotificationSystem:
                 }
         
         with open(self.state_file, 'w', encoding='utf-8') as f:
-            json.dump(states, f, indent=2)
+            json_codec.dump(states, f)
     
     def _load_file_states(self) -> Dict[str, Any]:
         """Lädt die gespeicherten Datei-Zustände"""
         if os.path.exists(self.state_file):
             with open(self.state_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                return json_codec.load(f)
         return {}
     
     def _save_file_states(self, states: Dict[str, Any]) -> None:
         """Speichert die Datei-Zustände"""
         with open(self.state_file, 'w', encoding='utf-8') as f:
-            json.dump(states, f, indent=2)
+            json_codec.dump(states, f)
     
-    def _get_file_hash(self, file_path: str) -> Optional[str]:
-        """Berechnet den Hash einer Datei"""
+    def _read_content(self, file_key: str, file_path: str) -> Optional[str]:
+        """
+        Inhalt einer überwachten Datei oder None, wenn sie fehlt
+        Das Manifest wird über den Store gelesen: Änderungen stehen bis zur Kompaktierung nur im
+        Journal (bzw. in einem anderen Backend), eine Kompaktierung allein ist keine Änderung
+        """
+        if file_key == 'project_manifest.json':
+            try:
+                manifest = self.manifest_store.load()
+            except FileNotFoundError:
+                return None
+            # Journal-Position des Snapshots ist Verwaltungsinformation, kein Inhalt
+            manifest.get('metadata', {}).pop('journal_seq', None)
+            return json_codec.dumps(manifest)
         if not os.path.exists(file_path):
             return None
-        
         with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+            return f.read()
+    
+    def _get_file_hash(self, file_path: str, file_key: Optional[str] = None) -> Optional[str]:
+        """Berechnet den Hash einer Datei (bzw. des Manifest-Stands)"""
+        content = self._read_content(file_key, file_path)
+        if content is None:
+            return None
         
         return hashlib.md5(content.encode()).hexdigest()
     
@@ -100,10 +118,11 @@ class NotificationSystem:
         for file_key, file_info in self.monitored_files.items():
             file_path = file_info['path']
             
-            if not os.path.exists(file_path):
+            content = self._read_content(file_key, file_path)
+            if content is None:
                 continue
             
-            current_hash = self._get_file_hash(file_path)
+            current_hash = hashlib.md5(content.encode()).hexdigest()
             stored_state = current_states.get(file_key, {})
             last_hash = stored_state.get('last_hash')
             
@@ -122,9 +141,6 @@ class NotificationSystem:
                 changes.append(change_info)
                 
                 # Zustand aktualisieren
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
                 current_states[file_key] = {
                     'last_hash': current_hash,
                     'last_modified': datetime.now().isoformat(),
@@ -146,10 +162,9 @@ class NotificationSystem:
             return 'system_update'
     
     def _analyze_manifest_changes(self, manifest_path: str) -> str:
-        """Analysiert spezifische Änderungen im project_manifest.json"""
+        """Analysiert spezifische Änderungen im project_manifest.json (aktueller Stand des Stores)"""
         try:
-            with open(manifest_path, 'r', encoding='utf-8') as f:
-                manifest = json.load(f)
+            manifest = self.manifest_store.view()
             
             # Prüfe verschiedene Bereiche
             if manifest.get('kill_switch', False):
@@ -190,10 +205,9 @@ class NotificationSystem:
         return details
     
     def _analyze_manifest_details(self, manifest_path: str) -> Dict[str, Any]:
-        """Analysiert Details von Manifest-Änderungen"""
+        """Analysiert Details von Manifest-Änderungen (aktueller Stand des Stores)"""
         try:
-            with open(manifest_path, 'r', encoding='utf-8') as f:
-                manifest = json.load(f)
+            manifest = self.manifest_store.view()
             
             details = {
                 'summary': 'Projekt-Manifest wurde aktualisiert',
@@ -313,7 +327,7 @@ class NotificationSystem:
         # Benachrichtigung speichern
         notification_file = os.path.join(self.notifications_dir, f'{notification_id}.json')
         with open(notification_file, 'w', encoding='utf-8') as f:
-            json.dump(notification, f, indent=2, ensure_ascii=False)
+            json_codec.dump(notification, f, pretty=True)
         
         return notification_id
     
@@ -341,7 +355,7 @@ class NotificationSystem:
                 
                 try:
                     with open(filepath, 'r', encoding='utf-8') as f:
-                        notification = json.load(f)
+                        notification = json_codec.load(f)
                     
                     # Nur aktive Benachrichtigungen
                     if notification.get('status') == 'active':
@@ -372,7 +386,7 @@ class NotificationSystem:
         
         try:
             with open(notification_file, 'r', encoding='utf-8') as f:
-                notification = json.load(f)
+                notification = json_codec.load(f)
             
             acknowledged_by = notification.get('acknowledged_by', [])
             if agent_id not in acknowledged_by:
@@ -381,7 +395,7 @@ class NotificationSystem:
                 notification['last_acknowledged'] = datetime.now().isoformat()
             
             with open(notification_file, 'w', encoding='utf-8') as f:
-                json.dump(notification, f, indent=2, ensure_ascii=False)
+                json_codec.dump(notification, f, pretty=True)
             
             return True
             
@@ -452,7 +466,7 @@ class NotificationSystem:
                 
                 try:
                     with open(filepath, 'r', encoding='utf-8') as f:
-                        notification = json.load(f)
+                        notification = json_codec.load(f)
                     
                     notification_date = datetime.fromisoformat(notification.get('timestamp', ''))
                     
@@ -487,7 +501,7 @@ class NotificationSystem:
         # Benachrichtigung speichern
         notification_file = os.path.join(self.notifications_dir, f'{notification_id}.json')
         with open(notification_file, 'w', encoding='utf-8') as f:
-            json.dump(notification, f, indent=2, ensure_ascii=False)
+            json_codec.dump(notification, f, pretty=True)
         
         return notification_id
 
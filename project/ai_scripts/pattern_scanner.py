@@ -0,0 +1,123 @@
+import os
+import random
+import re
+from collections import Counter
+from typing import Dict, Iterator, List, Sequence
+
+from history_log import format_history_entry
+
+
+class PatternScanner:
+    """
+    Zählt mehrere reguläre Ausdrücke in einem einzigen Durchlauf über den Text
+    Alle Muster bilden eine flache Alternation, die re.findall in einem Durchlauf abarbeitet;
+    jeder gefundene Text wird dem ersten Muster zugeordnet, das ihn vollständig erfasst (je
+    unterschiedlichem Text einmal, danach aus dem Cache). Treffer verschiedener Muster überlappen
+    nicht: an einer Position zählt das erste passende Muster in der gegebenen Reihenfolge (z.B.
+    'erfolgreich' nur als 'completed|...|erfolgreich', nicht zusätzlich als 'erfolg'). Muster
+    dürfen daher keine Lookarounds oder Anker enthalten, die vom umgebenden Text abhängen.
+    Ohne re.IGNORECASE kann die Alternation Positionen anhand der Anfangszeichen überspringen;
+    für Groß-/Kleinschreibung besser den Text vorher mit lower() angleichen.
+    """
+
+    # Höchstzahl zwischengespeicherter Zuordnungen (Muster mit '.*' liefern viele verschiedene Texte)
+    OWNER_CACHE_SIZE = 65536
+
+    def __init__(self, patterns: Sequence[str], flags: int = 0):
+        self.patterns: List[str] = list(patterns)
+        # Flache Alternation: nur so ermittelt re die Menge der möglichen Anfangszeichen
+        self._combined = re.compile('|'.join(self.patterns) or '(?!)', flags)
+        self._compiled = [re.compile(pattern, flags) for pattern in self.patterns]
+        self._owners: Dict[str, int] = {}
+
+    def _owner(self, matched: str) -> int:
+        """Index des Musters, zu dem ein gefundener Text gehört"""
+        owner = self._owners.get(matched)
+        if owner is None:
+            owner = next((index for index, regex in enumerate(self._compiled) if regex.fullmatch(matched)), 0)
+            if len(self._owners) >= self.OWNER_CACHE_SIZE:
+                self._owners.clear()
+            self._owners[matched] = owner
+        return owner
+
+    def counts(self, text: str) -> List[int]:
+        """Anzahl der Treffer je Muster, in der Reihenfolge der Muster"""
+        counts = [0] * len(self.patterns)
+        if self._combined.groups:
+            # Muster mit eigenen Gruppen: findall lieferte Gruppen statt des gefundenen Texts
+            found = [match.group() for match in self._combined.finditer(text)]
+        else:
+            found = self._combined.findall(text)
+        if found:
+            for matched, count in Counter(found).items():
+                counts[self._owner(matched)] += count
+        return counts
+
+    def count_map(self, text: str) -> Dict[str, int]:
+        """Treffer je Muster als Dictionary; Muster ohne Treffer fehlen"""
+        return {pattern: count for pattern, count in zip(self.patterns, self.counts(text)) if count}
+
+
+def synthetic_history(total_bytes: int, dense: bool, seed: int = 0) -> Iterator[str]:
+    """
+    Kleingeschriebene History-Einträge im .log-Format mit zusammen etwa total_bytes Zeichen
+    dense: Schlüsselwörter in fast jedem Eintrag, sonst nur in etwa jedem zwanzigsten
+    """
+    rng = random.Random(seed)
+    keywords = ['error', 'fehler', 'problem', 'failed', 'fehlgeschlagen', 'timeout', 'verbindung zum server problem',
+                'permission denied', 'nicht gefunden', 'ungültig', 'konflikt', 'completed', 'abgeschlossen',
+                'erfolgreich', 'success', 'beendet', 'gelöst', 'optimiert', 'verbessert']
+    words = ['aufgabe', 'datei', 'manifest', 'status', 'gelesen', 'geschrieben', 'agent', 'schritt', 'prüfung',
+             'daten', 'modell', 'index', 'wert', 'liste', 'eintrag', 'lauf']
+    pool = []
+    for number in range(4096):
+        text = [rng.choice(words) for _ in range(rng.randint(6, 14))]
+        if dense or number % 20 == 0:
+            for _ in range(rng.randint(1, 3)):
+                text.insert(rng.randrange(len(text) + 1), rng.choice(keywords))
+        pool.append(format_history_entry(f'2025-01-{number % 28 + 1:02d}t10:00:00z', f'ai_agent_{number % 7}',
+                                         'task_status_update', f'task_{number % 50:03d}_work', ' '.join(text),
+                                         rng.choice(words)))
+    produced = 0
+    while produced < total_bytes:
+        entry = pool[rng.randrange(len(pool))]
+        produced += len(entry)
+        yield entry
+
+
+if __name__ == '__main__':
+    # Benchmark: vorkompilierte Muster je einzeln (re.findall) gegen einen Durchlauf des Scanners
+    # Aufruf: python pattern_scanner.py [MiB je Korpus], Standard 64 MiB
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    import sys
+    import time
+    from learning_engine import LearningEngine
+
+    print("=== Pattern Scanner Test ===")
+    engine = LearningEngine(project_root)
+    patterns = engine.error_patterns + engine.success_patterns
+    compiled = [re.compile(pattern) for pattern in patterns]
+    scanner = PatternScanner(patterns)
+    print(f"Beispiel: {scanner.count_map('aufgabe erfolgreich abgeschlossen, kein fehler')}")
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    chunk_size = min(size, 64)
+    for dense in (True, False):
+        # Der Korpus wird in Stücken zu 64 MiB erzeugt; gemessen wird nur das Zählen
+        timings = {'je Eintrag': [0.0, 0.0, 0, 0], 'Blöcke zu 8192 Einträgen': [0.0, 0.0, 0, 0]}
+        for chunk in range(max(1, size // chunk_size)):
+            entries = list(synthetic_history(chunk_size * 1024 * 1024, dense, seed=chunk))
+            blocks = [''.join(entries[start:start + 8192]) for start in range(0, len(entries), 8192)]
+            for label, texts in zip(timings, (entries, blocks)):
+                start = time.perf_counter()
+                expected = sum(len(regex.findall(text)) for text in texts for regex in compiled)
+                timings[label][0] += time.perf_counter() - start
+                start = time.perf_counter()
+                counted = sum(sum(scanner.counts(text)) for text in texts)
+                timings[label][1] += time.perf_counter() - start
+                timings[label][2] += expected
+                timings[label][3] += counted
+        print(f"{'Dicht' if dense else 'Dünn'}, {max(1, size // chunk_size) * chunk_size} MiB:")
+        for label, (baseline, single_pass, expected, counted) in timings.items():
+            print(f"- {label}: je Muster {baseline:.2f} s, ein Durchlauf {single_pass:.2f} s "
+                  f"({baseline / single_pass:.1f}x), Treffer {expected} bzw. {counted}")
@@ -1,9 +1,325 @@
-import json
 import os
+from collections import defaultdict
+from collections.abc import Mapping
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Set
 import re
 
+try:
+    import numpy
+except ImportError:  # optional: vektorisierte Gewichtung in score_tasks, sonst reines Python
+    numpy = None
+
+from manifest_store import freeze, thaw
+from ready_queue import ReadyQueue
+from storage_backend import open_project_store
+from task_graph import TaskGraph
+from task_index import TaskIndex, index_value
+
+# Merkmale des Prioritätsscores in der Reihenfolge, in der calculate_priority_score gewichtet summiert
+PRIORITY_FEATURES = ('urgency', 'complexity', 'dependencies', 'resource_availability', 'strategic_importance')
+# Urgency aus Task-Metadaten (unbekannte Werte und Default: medium)
+URGENCY_SCORES = {'high': 1.0, 'medium': 0.6, 'low': 0.3}
+# Keywords der Komplexitätsanalyse (kleingeschrieben, Teilstring-Suche in der Beschreibung)
+COMPLEXITY_KEYWORDS = ('komplex', 'schwierig', 'herausfordernd', 'umfangreich',
+                       'integration', 'algorithmus', 'optimierung', 'machine learning')
+
+
+def _team_load_saturation() -> int:
+    """Anzahl laufender Team-Aufgaben, ab der analyze_dependencies auch ohne offene Abhängigkeiten 1.0 erreicht"""
+    dependency_score, steps = 0.0, 0
+    while dependency_score < 1.0:
+        dependency_score += 0.1
+        steps += 1
+    return steps
+
+
+# Mehr laufende Aufgaben im Team ändern keinen Score mehr
+TEAM_LOAD_SATURATION = _team_load_saturation()
+
+
+def task_complexity(task: Mapping[str, Any], description: Optional[str] = None) -> float:
+    """
+    Komplexität einer Aufgabe aus Subtasks und Keywords der Beschreibung (0-1)
+    description: bereits kleingeschriebene Beschreibung, damit sie je Aufgabe nur einmal umgewandelt wird
+    """
+    if description is None:
+        description = task.get('description', '').lower()
+    complexity_score = len(task.get('subtasks', [])) * 0.1
+    for keyword in COMPLEXITY_KEYWORDS:
+        if keyword in description:
+            complexity_score += 0.2
+    return min(complexity_score, 1.0)
+
+
+class ScoringContext:
+    """
+    Für einen Stand von CEO-Prioritätsfokus und Projektziel vorbereitete Textmerkmale
+    Fokus und Ziel-Keywords (erste 5 Wörter des Ziels mit mehr als 3 Zeichen) werden einmal
+    kleingeschrieben bzw. zerlegt statt für jede Aufgabe erneut.
+    """
+    
+    def __init__(self, manifest: Mapping[str, Any]):
+        ceo_directives = manifest.get('ceo_directives', {})
+        self.source = (ceo_directives.get('priority_focus', ''), manifest.get('goal', ''))
+        self.priority_focus = self.source[0].lower()
+        self.goal_keywords = tuple(keyword for keyword in self.source[1].lower().split()[:5] if len(keyword) > 3)
+    
+    def matches(self, manifest: Mapping[str, Any]) -> bool:
+        """True, wenn Fokus und Ziel des Manifests denen des Kontexts entsprechen"""
+        return (manifest.get('ceo_directives', {}).get('priority_focus', ''), manifest.get('goal', '')) == self.source
+    
+    def strategic_importance(self, task: Mapping[str, Any], description: Optional[str] = None) -> float:
+        """Strategische Wichtigkeit (0-1); description wie bei task_complexity"""
+        if description is None:
+            description = task.get('description', '').lower()
+        strategic_score = 0.5
+        if self.priority_focus and (self.priority_focus in task.get('title', '').lower()
+                                    or self.priority_focus in description):
+            strategic_score += 0.4
+        for keyword in self.goal_keywords:
+            if keyword in description:
+                strategic_score += 0.1
+        return min(strategic_score, 1.0)
+
+
+class DependencyAggregates:
+    """
+    In einem Durchlauf über alle Aufgaben vorberechnete Zähler für analyze_dependencies
+    Wird einmal je Priorisierungslauf erstellt; die Abhängigkeitsbewertung einer Aufgabe kostet
+    damit O(Anzahl Abhängigkeiten) statt Index-Abfragen und Schnittmengen je Aufgabe.
+    """
+    
+    def __init__(self, tasks: Iterable[Mapping[str, Any]]):
+        # task_id -> Anzahl nicht abgeschlossener Aufgaben mit dieser ID
+        self.unfinished: Dict[Any, int] = {}
+        # assigned_team -> Anzahl Aufgaben in Bearbeitung
+        self.in_progress: Dict[Any, int] = {}
+        for task in tasks:
+            self.add(task)
+    
+    def add(self, task: Mapping[str, Any], step: int = 1) -> None:
+        """Zählt eine Aufgabe hinzu (mit step=-1 wieder heraus, z.B. vor einer Änderung)"""
+        status = task.get('status')
+        if status != 'completed':
+            task_id = index_value(task.get('task_id'))
+            self.unfinished[task_id] = self.unfinished.get(task_id, 0) + step
+        if status == 'in_progress':
+            team = index_value(task.get('assigned_team'))
+            self.in_progress[team] = self.in_progress.get(team, 0) + step
+    
+    def unfinished_count(self, task_id: Any) -> int:
+        """Anzahl nicht abgeschlossener Aufgaben mit der gegebenen task_id"""
+        return self.unfinished.get(index_value(task_id), 0)
+    
+    def in_progress_count(self, team: Any) -> int:
+        """Anzahl Aufgaben des Teams in Bearbeitung"""
+        return self.in_progress.get(index_value(team), 0)
+
+
+class PriorityScoreTable:
+    """
+    Persistente Prioritätsscores der offenen Aufgaben (Position im Manifest -> Score)
+    refresh() liest die seit dem letzten Aufruf geänderten Positionen aus dem Änderungsprotokoll des
+    Aufgaben-Index und bewertet nur betroffene offene Aufgaben neu:
+    - die geänderte Aufgabe selbst
+    - Aufgaben mit einer Abhängigkeit, deren Anzahl offener Aufgaben sich geändert hat
+    - Aufgaben eines Teams, dessen Anzahl laufender Aufgaben, Mitglieder oder Budget sich geändert hat
+    Ein geänderter CEO-Prioritätsfokus, ein neues Projektziel oder andere Gewichtungen bewerten alle
+    offenen Aufgaben neu, ein neu geladener Aufgaben-Index baut die Tabelle neu auf. Zähler
+    (DependencyAggregates), Abhängigkeitsgraph (TaskGraph) und die Warteschlange der offenen
+    Aufgaben (ReadyQueue, Reihenfolge wie prioritize_tasks) werden dabei mitgeführt.
+    """
+    
+    def __init__(self, engine: 'PriorityEngine'):
+        self.engine = engine
+        self.index: Optional[TaskIndex] = None
+        self.scores: Dict[int, float] = {}
+        self.aggregates: Optional[DependencyAggregates] = None
+        self.graph: Optional[TaskGraph] = None
+        self.queue = ReadyQueue()
+        self.rescored = 0  # Anzahl der im letzten refresh bewerteten Aufgaben
+        self._offset = 0
+        self._records: List[Optional[Dict[str, Any]]] = []
+        self._dependents: Dict[Any, Set[int]] = defaultdict(set)
+        self._team_tasks: Dict[Any, Set[int]] = defaultdict(set)
+        self._signature: Dict[str, Any] = {}
+    
+    @staticmethod
+    def _record(task: Mapping[str, Any]) -> Dict[str, Any]:
+        """Für Abhängigkeiten, Teams und Graph relevante Felder einer Aufgabe (als Index-Schlüssel)"""
+        return {
+            'task_id': index_value(task.get('task_id')),
+            'status': index_value(task.get('status')),
+            'assigned_team': index_value(task.get('assigned_team')),
+            # analyze_dependencies sucht das Team mit Default '' (fehlendes Team zählt nicht als None)
+            'team': index_value(task.get('assigned_team', '')),
+            'dependencies': tuple(index_value(dep_id) for dep_id in task.get('dependencies') or ())
+        }
+    
+    def _manifest_signature(self, manifest: Mapping[str, Any]) -> Dict[str, Any]:
+        """Manifest-Felder außerhalb der Aufgaben, von denen die Scores abhängen"""
+        ceo_directives = manifest.get('ceo_directives', {})
+        return {
+            'teams': thaw(manifest.get('teams', [])),
+            'budget': thaw(ceo_directives.get('budget_allocation', {})),
+            'focus': ceo_directives.get('priority_focus', ''),
+            'goal': manifest.get('goal', ''),
+            'weights': dict(self.engine.weights)
+        }
+    
+    def _link(self, position: int, record: Dict[str, Any], add: bool) -> None:
+        """Trägt eine Position in die Rückverweise (Abhängigkeit, Team) ein bzw. aus"""
+        for dep_id in record['dependencies']:
+            if add:
+                self._dependents[dep_id].add(position)
+            else:
+                self._dependents[dep_id].discard(position)
+        if add:
+            self._team_tasks[record['team']].add(position)
+        else:
+            self._team_tasks[record['team']].discard(position)
+    
+    def refresh(self) -> int:
+        """Bringt die Scores auf den aktuellen Stand; gibt die Anzahl neu bewerteter Aufgaben zurück"""
+        store = self.engine.manifest_store
+        index = store.task_index()
+        manifest = store.view()
+        changes = index.changes_since(self._offset) if index is self.index else None
+        if changes is None:
+            self._rebuild(index, manifest)
+            return self.rescored
+        self._offset += len(changes)
+        
+        affected: Set[int] = set()
+        signature = self._manifest_signature(manifest)
+        if signature != self._signature:
+            affected |= self._changed_by_manifest(self._signature, signature)
+            self._signature = signature
+        
+        graph_stale = False
+        for position in dict.fromkeys(changes):
+            affected.add(position)
+            old = self._records[position] if position < len(self._records) else None
+            new = self._record(index.tasks[position])
+            if old == new:
+                continue
+            
+            task_ids = {new['task_id']} | ({old['task_id']} if old else set())
+            teams = {new['assigned_team']} | ({old['assigned_team']} if old else set())
+            unfinished = {task_id: self.aggregates.unfinished_count(task_id) for task_id in task_ids}
+            in_progress = {team: self.aggregates.in_progress_count(team) for team in teams}
+            if old is not None:
+                self.aggregates.add(old, -1)
+                self._link(position, old, False)
+            self.aggregates.add(new)
+            self._link(position, new, True)
+            while len(self._records) <= position:
+                self._records.append(None)
+            self._records[position] = new
+            
+            for task_id, before in unfinished.items():
+                after = self.aggregates.unfinished_count(task_id)
+                if after != before:
+                    affected |= self._dependents.get(task_id, set())
+                    if (after > 0) != (before > 0):
+                        self.graph.set_finished(task_id, after == 0)
+            for team, before in in_progress.items():
+                after = self.aggregates.in_progress_count(team)
+                if after != before and min(before, after) < TEAM_LOAD_SATURATION:
+                    affected |= self._team_tasks.get(team, set())
+            if old is None or old['task_id'] != new['task_id'] or old['dependencies'] != new['dependencies']:
+                graph_stale = True
+        
+        if graph_stale:
+            self.graph.rebuild(index.tasks)
+        self._rescore(affected, manifest)
+        if graph_stale:
+            # Nach einem Neuaufbau des Graphen können sich alle Ränge verschoben haben
+            self.queue = ReadyQueue((position, self.rank(position)) for position in self.scores)
+        else:
+            # Geänderte kritische Pfade bzw. fan_out verschieben den Gleichstands-Rang
+            for task_id in self.graph.take_rank_changes():
+                for position in index.positions('task_id', task_id):
+                    if position in self.scores:
+                        self.queue.push(position, self.rank(position))
+        return self.rescored
+    
+    def _changed_by_manifest(self, old: Dict[str, Any], new: Dict[str, Any]) -> Set[int]:
+        """Positionen, deren Score von geänderten Teams, Budgets, Fokus, Ziel oder Gewichtungen abhängt"""
+        budgets_comparable = isinstance(old.get('budget'), dict) and isinstance(new['budget'], dict)
+        if any(old.get(key) != new[key] for key in ('focus', 'goal', 'weights')) or not budgets_comparable:
+            return set(range(len(self._records)))
+        
+        teams = set()
+        old_teams, new_teams = defaultdict(list), defaultdict(list)
+        for entries, team_list in ((old_teams, old['teams']), (new_teams, new['teams'])):
+            for team in team_list:
+                entries[index_value(team.get('name'))].append(team)
+        for name in old_teams.keys() | new_teams.keys():
+            if old_teams.get(name) != new_teams.get(name):
+                teams.add(name)
+        for name in old['budget'].keys() | new['budget'].keys():
+            if old['budget'].get(name) != new['budget'].get(name):
+                teams.add(index_value(name))
+        
+        affected = set()
+        for team in teams:
+            affected |= self._team_tasks.get(team, set())
+        return affected
+    
+    def _rebuild(self, index: TaskIndex, manifest: Mapping[str, Any]) -> None:
+        """Liest alle Aufgaben neu ein und bewertet alle offenen Aufgaben"""
+        self.index = index
+        self._offset = index.change_count
+        self._records = [self._record(task) for task in index.tasks]
+        self.aggregates = DependencyAggregates(self._records)
+        self._dependents = defaultdict(set)
+        self._team_tasks = defaultdict(set)
+        for position, record in enumerate(self._records):
+            self._link(position, record, True)
+        self._signature = self._manifest_signature(manifest)
+        self.graph = TaskGraph(index.tasks)
+        self.scores = {}
+        self.queue = ReadyQueue()
+        self._rescore(range(len(self._records)), manifest)
+    
+    def _rescore(self, positions: Iterable[int], manifest: Mapping[str, Any]) -> None:
+        """Bewertet die offenen unter den gegebenen Positionen neu (in einem Batch)"""
+        tasks = self.index.tasks
+        open_positions = []
+        for position in positions:
+            if self._records[position]['status'] == 'open':
+                open_positions.append(position)
+            else:
+                self.scores.pop(position, None)
+                self.queue.remove(position)
+        scores = self.engine.score_tasks([tasks[position] for position in open_positions], tasks, manifest,
+                                         self.aggregates)
+        self.scores.update(zip(open_positions, scores))
+        for position in open_positions:
+            self.queue.push(position, self.rank(position))
+        self.rescored = len(open_positions)
+    
+    def rank(self, position: int) -> tuple:
+        """Rang einer offenen Aufgabe: (Score, kritischer Pfad, fan_out), höher zuerst"""
+        return (self.scores[position], *self.graph.rank(self._records[position]['task_id']))
+    
+    def task(self, position: int) -> Dict[str, Any]:
+        """Kopie der Aufgabe an einer Position, mit ergänztem priority_score"""
+        task = freeze(self.index.tasks[position]).copy()
+        task['priority_score'] = self.scores[position]
+        return task
+    
+    def open_tasks(self) -> List[Dict[str, Any]]:
+        """Kopien aller offenen Aufgaben in Manifest-Reihenfolge, mit ergänztem priority_score"""
+        return [self.task(position) for position in sorted(self.scores)]
+    
+    def next_tasks(self, count: int) -> List[Dict[str, Any]]:
+        """Die count am höchsten priorisierten offenen Aufgaben (aus der Warteschlange, ohne Sortierung)"""
+        return [self.task(position) for position, _ in self.queue.top(count)]
+
+
 class PriorityEngine:
     """
     Erweiterte Priorisierungs-Engine für automatisierte Aufgabenverteilung
@@ -15,6 +331,10 @@ class PriorityEngine:
         self.tasks_dir = os.path.join(project_root, 'tasks')
         self.history_dir = os.path.join(project_root, 'history')
         self.knowledge_base_dir = os.path.join(project_root, 'knowledge_base')
+        self.manifest_store = open_project_store(project_root)
+        # Scores und Abhängigkeitsgraph, zwischen Priorisierungsläufen gehalten (siehe PriorityScoreTable)
+        self._score_table: Optional[PriorityScoreTable] = None
+        self._scoring_context: Optional[ScoringContext] = None
         
         # Priorisierungs-Gewichtungen
         self.weights = {
@@ -27,13 +347,11 @@ class PriorityEngine:
     
     def load_manifest(self) -> Dict[str, Any]:
         """Lädt das project_manifest.json"""
-        with open(self.manifest_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.manifest_store.load()
     
     def save_manifest(self, manifest: Dict[str, Any]) -> None:
         """Speichert das project_manifest.json"""
-        with open(self.manifest_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        self.manifest_store.save(manifest)
     
     def analyze_task_complexity(self, task: Dict[str, Any]) -> float:
         """
@@ -42,44 +360,42 @@ class PriorityEngine:
         - Beschreibungslänge
         - Verwendete Keywords (technisch, komplex, etc.)
         """
-        complexity_score = 0.0
-        
-        # Subtasks-Analyse
-        subtasks = task.get('subtasks', [])
-        complexity_score += len(subtasks) * 0.1
-        
-        # Beschreibungsanalyse
-        description = task.get('description', '')
-        complexity_keywords = ['komplex', 'schwierig', 'herausfordernd', 'umfangreich', 
-                              'integration', 'algorithmus', 'optimierung', 'machine learning']
-        
-        for keyword in complexity_keywords:
-            if keyword.lower() in description.lower():
-                complexity_score += 0.2
-        
-        # Normalisierung auf 0-1 Skala
-        return min(complexity_score, 1.0)
+        return task_complexity(task)
     
-    def analyze_dependencies(self, task: Dict[str, Any], all_tasks: List[Dict[str, Any]]) -> float:
+    def analyze_dependencies(self, task: Dict[str, Any], all_tasks: List[Dict[str, Any]],
+                             task_index: Optional[TaskIndex] = None,
+                             aggregates: Optional[DependencyAggregates] = None) -> float:
         """
         Analysiert Abhängigkeiten einer Aufgabe
+        Für viele Aufgaben einmal DependencyAggregates(all_tasks) erstellen und übergeben
         """
+        if aggregates is None and task_index is None:
+            task_index = TaskIndex(all_tasks)
+        
         dependencies = task.get('dependencies', [])
         dependency_score = 0.0
         
-        # Direkte Abhängigkeiten
+        # Direkte Abhängigkeiten (je nicht abgeschlossener Aufgabe mit der ID einzeln aufaddiert)
         for dep_id in dependencies:
-            for other_task in all_tasks:
-                if other_task.get('task_id') == dep_id:
-                    if other_task.get('status') != 'completed':
-                        dependency_score += 0.3
+            if aggregates is not None:
+                unfinished = aggregates.unfinished_count(dep_id)
+            else:
+                unfinished = sum(1 for other_task in task_index.find('task_id', dep_id)
+                                 if other_task.get('status') != 'completed')
+            for _ in range(unfinished):
+                dependency_score += 0.3
         
         # Implizite Abhängigkeiten durch Team-Zuweisungen
+        # (Summation bis zur Obergrenze, damit der Score exakt dem schrittweisen Aufaddieren entspricht)
         assigned_team = task.get('assigned_team', '')
-        for other_task in all_tasks:
-            if (other_task.get('assigned_team') == assigned_team and 
-                other_task.get('status') == 'in_progress'):
-                dependency_score += 0.1
+        if aggregates is not None:
+            in_progress = aggregates.in_progress_count(assigned_team)
+        else:
+            in_progress = task_index.count('assigned_team', assigned_team, status='in_progress')
+        for _ in range(in_progress):
+            if dependency_score >= 1.0:
+                break
+            dependency_score += 0.1
         
         return min(dependency_score, 1.0)
     
@@ -108,7 +424,7 @@ class PriorityEngine:
         
         if assigned_team in budget_allocation:
             budget_info = budget_allocation[assigned_team]
-            if isinstance(budget_info, dict):
+            if isinstance(budget_info, Mapping):
                 total = budget_info.get('total', 0)
                 spent = budget_info.get('spent', 0)
                 if total > 0 and (spent / total) > 0.8:
@@ -119,43 +435,31 @@ class PriorityEngine:
     def analyze_strategic_importance(self, task: Dict[str, Any], manifest: Dict[str, Any]) -> float:
         """
         Analysiert die strategische Wichtigkeit einer Aufgabe
+        (CEO-Prioritätsfokus in Titel oder Beschreibung, Keywords des Projektziels)
         """
-        ceo_directives = manifest.get('ceo_directives', {})
-        priority_focus = ceo_directives.get('priority_focus', '').lower()
-        
-        strategic_score = 0.5  # Basis-Score
-        
-        # CEO-Prioritätsfokus
-        task_title = task.get('title', '').lower()
-        task_description = task.get('description', '').lower()
-        
-        if priority_focus and (priority_focus in task_title or priority_focus in task_description):
-            strategic_score += 0.4
-        
-        # Projekt-Ziel Alignment
-        project_goal = manifest.get('goal', '').lower()
-        goal_keywords = project_goal.split()[:5]  # Erste 5 Wörter des Ziels
-        
-        for keyword in goal_keywords:
-            if len(keyword) > 3 and keyword in task_description:
-                strategic_score += 0.1
-        
-        return min(strategic_score, 1.0)
+        return self.scoring_context(manifest).strategic_importance(task)
+    
+    def scoring_context(self, manifest: Mapping[str, Any]) -> ScoringContext:
+        """Vorbereitete Textmerkmale; nur bei geändertem Fokus oder Ziel neu erstellt"""
+        context = self._scoring_context
+        if context is None or not context.matches(manifest):
+            context = self._scoring_context = ScoringContext(manifest)
+        return context
     
     def calculate_priority_score(self, task: Dict[str, Any], all_tasks: List[Dict[str, Any]], 
-                                manifest: Dict[str, Any]) -> float:
+                                manifest: Dict[str, Any], task_index: Optional[TaskIndex] = None,
+                                aggregates: Optional[DependencyAggregates] = None) -> float:
         """
         Berechnet den Gesamtprioritätsscore einer Aufgabe
         """
         # Urgency (aus Task-Metadaten oder Default)
-        urgency_map = {'high': 1.0, 'medium': 0.6, 'low': 0.3}
-        urgency = urgency_map.get(task.get('urgency', 'medium'), 0.6)
+        urgency = URGENCY_SCORES.get(task.get('urgency', 'medium'), 0.6)
         
         # Komplexität (invertiert - weniger komplex = höhere Priorität für schnelle Wins)
         complexity = 1.0 - self.analyze_task_complexity(task)
         
         # Abhängigkeiten (invertiert - weniger Abhängigkeiten = höhere Priorität)
-        dependencies = 1.0 - self.analyze_dependencies(task, all_tasks)
+        dependencies = 1.0 - self.analyze_dependencies(task, all_tasks, task_index, aggregates)
         
         # Ressourcenverfügbarkeit
         resource_availability = self.analyze_resource_availability(task, manifest)
@@ -174,23 +478,90 @@ class PriorityEngine:
         
         return total_score
     
+    def priority_features(self, tasks: List[Dict[str, Any]], all_tasks: List[Dict[str, Any]],
+                          manifest: Dict[str, Any],
+                          aggregates: Optional[DependencyAggregates] = None) -> Dict[str, List[float]]:
+        """
+        Merkmalsspalten der Prioritätsscores (je Merkmal aus PRIORITY_FEATURES ein Wert je Aufgabe)
+        Teams und Budget werden einmal je Team ausgewertet statt für jede Aufgabe erneut, die
+        Abhängigkeiten über einmal vorberechnete Zähler (ein Durchlauf über all_tasks)
+        """
+        if aggregates is None:
+            aggregates = DependencyAggregates(all_tasks)
+        
+        context = self.scoring_context(manifest)
+        
+        columns = {name: [] for name in PRIORITY_FEATURES}
+        availability_by_team = {}
+        for task in tasks:
+            # Beschreibung nur einmal je Aufgabe kleinschreiben (Komplexität und strategische Wichtigkeit)
+            description = task.get('description', '').lower()
+            columns['urgency'].append(URGENCY_SCORES.get(task.get('urgency', 'medium'), 0.6))
+            columns['complexity'].append(1.0 - task_complexity(task, description))
+            columns['dependencies'].append(1.0 - self.analyze_dependencies(task, all_tasks, aggregates=aggregates))
+            
+            # Die Ressourcenverfügbarkeit hängt nur vom Team der Aufgabe ab
+            assigned_team = task.get('assigned_team', '')
+            availability = availability_by_team.get(assigned_team)
+            if availability is None:
+                availability = self.analyze_resource_availability(task, manifest)
+                availability_by_team[assigned_team] = availability
+            columns['resource_availability'].append(availability)
+            
+            columns['strategic_importance'].append(context.strategic_importance(task, description))
+        return columns
+    
+    def score_tasks(self, tasks: List[Dict[str, Any]], all_tasks: List[Dict[str, Any]],
+                    manifest: Dict[str, Any], aggregates: Optional[DependencyAggregates] = None) -> List[float]:
+        """
+        Prioritätsscores vieler Aufgaben in einem Durchlauf, identisch zu calculate_priority_score
+        Mit NumPy werden die gewichteten Merkmalsspalten vektorisiert summiert
+        """
+        columns = self.priority_features(tasks, all_tasks, manifest, aggregates)
+        if numpy is not None and tasks:
+            # Spaltenweise in der Reihenfolge von calculate_priority_score summiert (statt eines
+            # Matrix-Vektor-Produkts mit anderer Summationsreihenfolge), damit die Scores bitgleich sind
+            total_scores = numpy.zeros(len(tasks))
+            for name in PRIORITY_FEATURES:
+                total_scores += numpy.asarray(columns[name], dtype=numpy.float64) * self.weights[name]
+            return total_scores.tolist()
+        
+        weights = [self.weights[name] for name in PRIORITY_FEATURES]
+        total_scores = []
+        for values in zip(*(columns[name] for name in PRIORITY_FEATURES)):
+            total_score = 0.0
+            for value, weight in zip(values, weights):
+                total_score += value * weight
+            total_scores.append(total_score)
+        return total_scores
+    
+    def score_table(self) -> PriorityScoreTable:
+        """
+        Prioritätsscores aller offenen Aufgaben auf aktuellem Stand
+        Nach dem ersten Aufruf werden nur von Änderungen betroffene Aufgaben neu bewertet
+        """
+        if self._score_table is None:
+            self._score_table = PriorityScoreTable(self)
+        self._score_table.refresh()
+        return self._score_table
+    
+    def task_graph(self) -> TaskGraph:
+        """Abhängigkeitsgraph des aktuellen Manifests (inkrementell mit der Score-Tabelle gepflegt)"""
+        return self.score_table().graph
+    
     def prioritize_tasks(self) -> List[Dict[str, Any]]:
         """
         Priorisiert alle offenen Aufgaben und gibt sie sortiert zurück
         """
-        manifest = self.load_manifest()
-        all_tasks = manifest.get('tasks', [])
-        
-        # Nur offene Aufgaben berücksichtigen
-        open_tasks = [task for task in all_tasks if task.get('status') == 'open']
+        # Offene Aufgaben als Kopie mit ihrem Score aus der Score-Tabelle
+        table = self.score_table()
+        open_tasks = table.open_tasks()
         
-        # Prioritätsscore für jede Aufgabe berechnen
-        for task in open_tasks:
-            priority_score = self.calculate_priority_score(task, all_tasks, manifest)
-            task['priority_score'] = priority_score
-        
-        # Nach Prioritätsscore sortieren (höchster zuerst)
-        prioritized_tasks = sorted(open_tasks, key=lambda x: x.get('priority_score', 0), reverse=True)
+        # Nach Prioritätsscore sortieren (höchster zuerst); bei gleichem Score zuerst Aufgaben mit
+        # längerem kritischen Pfad und mehr direkt abhängigen Aufgaben, um den Graphen breit freizugeben
+        graph = table.graph
+        prioritized_tasks = sorted(open_tasks, key=lambda x: (x.get('priority_score', 0), *graph.rank(x.get('task_id'))),
+                                   reverse=True)
         
         return prioritized_tasks
     
@@ -231,24 +602,24 @@ class PriorityEngine:
         """
         Weist automatisch Aufgaben an geeignete KI-Agenten zu
         """
-        prioritized_tasks = self.prioritize_tasks()
-        manifest = self.load_manifest()
+        # Nur die max_assignments besten Aufgaben aus der Warteschlange (gleiche Reihenfolge wie
+        # prioritize_tasks, ohne alle offenen Aufgaben zu sortieren)
+        top_tasks = self.score_table().next_tasks(max_assignments)
+        manifest = self.manifest_store.view()
         assignments = []
+        task_updates = {}
         
-        for i, task in enumerate(prioritized_tasks[:max_assignments]):
+        for i, task in enumerate(top_tasks):
             suitable_agent = self.find_suitable_agent(task, manifest)
             
             if suitable_agent:
                 # Aufgabe zuweisen
                 task_id = task.get('task_id')
-                
-                # Manifest aktualisieren
-                for manifest_task in manifest.get('tasks', []):
-                    if manifest_task.get('task_id') == task_id:
-                        manifest_task['assigned_ai'] = suitable_agent
-                        manifest_task['status'] = 'assigned'
-                        manifest_task['assigned_date'] = datetime.now().isoformat()
-                        break
+                task_updates[task_id] = {
+                    'assigned_ai': suitable_agent,
+                    'status': 'assigned',
+                    'assigned_date': datetime.now().isoformat()
+                }
                 
                 assignments.append({
                     'task_id': task_id,
@@ -258,8 +629,8 @@ class PriorityEngine:
                     'assignment_reason': self._generate_assignment_reason(task, suitable_agent)
                 })
         
-        # Aktualisiertes Manifest speichern
-        self.save_manifest(manifest)
+        # Alle Zuweisungen als ein Journal-Eintrag speichern
+        self.manifest_store.update_tasks(task_updates)
         
         return assignments
     
@@ -290,11 +661,15 @@ class PriorityEngine:
         Generiert einen Bericht über die aktuelle Aufgabenpriorisierung
         """
         prioritized_tasks = self.prioritize_tasks()
+        graph = self.task_graph()
         
         report = "# Aufgaben-Priorisierungsbericht\n\n"
         report += f"Generiert am: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
         report += f"Anzahl offener Aufgaben: {len(prioritized_tasks)}\n\n"
         
+        for cycle in graph.cycles():
+            report += f"**Warnung:** Zyklische Abhängigkeit: {' -> '.join(map(str, cycle))}\n\n"
+        
         report += "## Priorisierte Aufgaben\n\n"
         
         for i, task in enumerate(prioritized_tasks, 1):
@@ -308,6 +683,10 @@ class PriorityEngine:
             if task.get('urgency'):
                 report += f"- **Dringlichkeit:** {task.get('urgency')}\n"
             
+            critical_path, fan_out = graph.rank(task.get('task_id'))
+            if fan_out:
+                report += f"- **Abhängigkeiten:** kritischer Pfad {critical_path}, blockiert direkt {fan_out} Aufgaben\n"
+            
             if task.get('description'):
                 description = task.get('description')[:100]
                 if len(task.get('description', '')) > 100:
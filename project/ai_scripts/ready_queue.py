@@ -0,0 +1,129 @@
+import heapq
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# Priorität: Zahl oder Tupel von Zahlen (höher zuerst, z.B. (Score, kritischer Pfad, fan_out))
+Priority = Union[float, Tuple[float, ...]]
+
+# Ab so vielen ungültigen Einträgen (und mehr als gültigen) wird der Heap bereinigt
+COMPACT_MIN_STALE = 64
+
+_ORDER, _KEY, _VALID, _PRIORITY = range(4)
+
+
+class ReadyQueue:
+    """
+    Prioritätswarteschlange als binärer Heap mit push, pop und update-key in O(log n)
+    Höhere Priorität zuerst, bei Gleichstand der kleinere Schlüssel (z.B. die Manifest-Position).
+    Eine geänderte Priorität markiert den alten Heap-Eintrag nur als ungültig (verzögerte
+    Invalidierung); ungültige Einträge werden beim Entnehmen übersprungen und verworfen, sobald
+    sie mehr als die Hälfte des Heaps ausmachen.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Any, Priority]] = ()):
+        self._entries: Dict[Any, list] = {key: self._entry(key, priority) for key, priority in items}
+        self._heap: List[list] = list(self._entries.values())
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    @staticmethod
+    def _entry(key: Any, priority: Priority) -> list:
+        """Heap-Eintrag; die negierte Priorität macht aus heapq einen Max-Heap"""
+        order = tuple(-value for value in priority) if isinstance(priority, tuple) else (-priority,)
+        return [order, key, True, priority]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._entries
+
+    def priority(self, key: Any) -> Optional[Priority]:
+        """Aktuelle Priorität eines Schlüssels oder None"""
+        entry = self._entries.get(key)
+        return entry[_PRIORITY] if entry is not None else None
+
+    def push(self, key: Any, priority: Priority) -> None:
+        """Fügt einen Schlüssel ein oder ändert seine Priorität"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[_PRIORITY] == priority:
+                return
+            self._invalidate(entry)
+        entry = self._entry(key, priority)
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+
+    def update(self, key: Any, priority: Priority) -> None:
+        """Ändert die Priorität eines enthaltenen Schlüssels (update-key)"""
+        if key not in self._entries:
+            raise KeyError(f"{key!r} ist nicht in der Warteschlange")
+        self.push(key, priority)
+
+    def remove(self, key: Any) -> bool:
+        """Entfernt einen Schlüssel; False, wenn er nicht enthalten war"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._invalidate(entry)
+        return True
+
+    def _invalidate(self, entry: list) -> None:
+        """Markiert einen Heap-Eintrag als ungültig und bereinigt den Heap bei Bedarf"""
+        entry[_VALID] = False
+        self._stale += 1
+        if self._stale > COMPACT_MIN_STALE and self._stale > len(self._entries):
+            self._heap = [item for item in self._heap if item[_VALID]]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _discard_stale_top(self) -> None:
+        """Entfernt ungültige Einträge an der Spitze des Heaps"""
+        while self._heap and not self._heap[0][_VALID]:
+            heapq.heappop(self._heap)
+            self._stale -= 1
+
+    def peek(self) -> Optional[Tuple[Any, Priority]]:
+        """(Schlüssel, Priorität) mit der höchsten Priorität, ohne zu entnehmen; None, wenn leer"""
+        self._discard_stale_top()
+        if not self._heap:
+            return None
+        entry = self._heap[0]
+        return entry[_KEY], entry[_PRIORITY]
+
+    def pop(self) -> Tuple[Any, Priority]:
+        """Entnimmt (Schlüssel, Priorität) mit der höchsten Priorität"""
+        self._discard_stale_top()
+        if not self._heap:
+            raise IndexError("Warteschlange ist leer")
+        entry = heapq.heappop(self._heap)
+        del self._entries[entry[_KEY]]
+        return entry[_KEY], entry[_PRIORITY]
+
+    def top(self, count: int) -> List[Tuple[Any, Priority]]:
+        """Die count höchsten Einträge in Reihenfolge, ohne sie zu entnehmen (O(count log n))"""
+        taken = []
+        while len(taken) < count:
+            self._discard_stale_top()
+            if not self._heap:
+                break
+            taken.append(heapq.heappop(self._heap))
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return [(entry[_KEY], entry[_PRIORITY]) for entry in taken]
+
+
+if __name__ == '__main__':
+    # Test der Warteschlange mit den Aufgaben des Projekts
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    from priority_engine import PriorityEngine
+
+    print("=== Ready Queue Test ===")
+    queue = ReadyQueue([('a', 0.5), ('b', (0.9, 1)), ('c', 0.7)])
+    queue.update('a', 0.95)
+    queue.remove('c')
+    print(f"Reihenfolge: {[queue.pop() for _ in range(len(queue))]}")
+
+    table = PriorityEngine(project_root).score_table()
+    for position, priority in table.queue.top(5):
+        print(f"- {table.index.tasks[position].get('task_id')}: {priority}")
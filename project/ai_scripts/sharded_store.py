@@ -0,0 +1,533 @@
+import os
+import tempfile
+import zlib
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import json_codec
+from manifest_journal import diff_documents, escape_pointer_segment, parse_pointer
+from manifest_store import (ManifestConflictError, ReadOnlyDict, ReadOnlyList, check_expected, freeze,
+                            get_manifest_store, thaw)
+from manifest_stream import filter_tasks
+from task_index import TaskIndex
+from task_markdown import HEADER_FIELDS, sync_task_markdown
+
+
+def shard_name(task_id: str, shard_count: int) -> str:
+    """Bestimmt den Shard (Bucket) einer Aufgabe anhand ihrer task_id"""
+    return f'{zlib.crc32(str(task_id).encode("utf-8")) % shard_count:03d}'
+
+
+def index_entry(task: Dict[str, Any], shard: str) -> Dict[str, Any]:
+    """Kompakter Index-Eintrag einer Aufgabe (indizierte Felder und Shard)"""
+    entry = {field: task[field] for field in TaskIndex.INDEXED_FIELDS if field in task}
+    entry['shard'] = shard
+    return entry
+
+
+class ShardedManifestStore:
+    """
+    Projektzustand mit ausgelagerten Aufgaben
+    Das Manifest (project_state/manifest.json, über ManifestStore mit Journal und Sperre)
+    enthält nur Ziel, Direktiven, Teams und einen kompakten Aufgaben-Index; die vollständigen
+    Aufgaben liegen gebündelt in project_state/tasks/<shard>.json. Lese- und Schreibzugriffe
+    auf einzelne Aufgaben berühren nur deren Shards; die Kopfzeilen der Aufgaben-Markdowns
+    (tasks/<task_id>.md) werden bei Änderungen nachgeführt.
+    Schreibvorgänge ersetzen zuerst die Shards und schreiben danach den Index-Eintrag. Schlägt
+    dieser fehl, werden die Shards zurückgeschrieben. Bricht ein Prozess dazwischen ab, gleicht
+    das Öffnen des Speichers den Index an die Shards an (repair_index): die Shards sind maßgeblich,
+    eine Änderung über mehrere Shards ist in diesem Fall nicht atomar.
+    """
+
+    def __init__(self, state_dir: str, task_dir: Optional[str] = None, shard_count: int = 256):
+        self.state_dir = state_dir
+        self.shard_dir = os.path.join(state_dir, 'tasks')
+        self.task_dir = task_dir
+        self.shard_count = shard_count
+        self.index_store = get_manifest_store(os.path.join(state_dir, 'manifest.json'))
+        # Gemeinsame Thread-Sperre mit dem Index-Manifest: Schreibpfade halten erst dessen Sperre und
+        # dann den Shard-Cache, Lesepfade umgekehrt; zwei getrennte Sperren könnten sich blockieren
+        self._lock = self.index_store._lock
+        # Shard-Cache: shard -> (Index-Version beim Lesen, Datensätze); None = eigener, noch unbestätigter Schreibvorgang
+        self._shards: Dict[str, Tuple[Any, Dict[str, Dict[str, Any]]]] = {}
+        self._data: Optional[Dict[str, Any]] = None
+        self._version = None
+        self._task_index: Optional[TaskIndex] = None
+        if os.path.exists(self.index_store.manifest_path):
+            self.repair_index()
+
+    def _shard_path(self, shard: str) -> str:
+        return os.path.join(self.shard_dir, f'{shard}.json')
+
+    def _read_shard(self, shard: str, version=None) -> Dict[str, Dict[str, Any]]:
+        """
+        Liest die Aufgaben eines Shards (gecacht je Version des Index-Manifests)
+        Jeder Schreibvorgang erzeugt einen Index-Journal-Eintrag; (mtime, size, inode) allein ist bei
+        schnellen Schreibfolgen anderer Prozesse nicht eindeutig genug
+        """
+        if version is None:
+            version = self.index_store.version
+        cached = self._shards.get(shard)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        records = self._load_shard_file(shard)
+        self._shards[shard] = (version, records)
+        return records
+
+    def _load_shard_file(self, shard: str) -> Dict[str, Dict[str, Any]]:
+        """Liest einen Shard ohne Cache (leer, falls er nicht existiert)"""
+        try:
+            with open(self._shard_path(shard), 'rb') as f:
+                return json_codec.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _confirm_shards(self, base_version) -> None:
+        """
+        Übernimmt nach einem eigenen Schreibvorgang (unter Sperre) alle Shards, die beim Stand
+        base_version gelesen oder gerade geschrieben wurden, für die neue Index-Version
+        """
+        version = self.index_store.version
+        for shard, (shard_version, records) in list(self._shards.items()):
+            if shard_version is None or shard_version == base_version:
+                self._shards[shard] = (version, records)
+
+    def _write_shard(self, shard: str, records: Dict[str, Dict[str, Any]]) -> None:
+        """Ersetzt einen Shard atomar (leere Shards werden gelöscht)"""
+        path = self._shard_path(shard)
+        if not records:
+            if os.path.exists(path):
+                os.remove(path)
+            self._shards[shard] = (None, {})
+            return
+
+        os.makedirs(self.shard_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.shard.', suffix='.tmp', dir=self.shard_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                json_codec.dump(records, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._shards[shard] = (None, records)
+
+    @contextmanager
+    def _shard_writes(self) -> Iterator[Any]:
+        """
+        Liefert write(shard, records) für die Shards eines Schreibvorgangs (Sperre erforderlich)
+        Scheitert der Schreibvorgang vor dem Index-Eintrag, werden die bisherigen Shards zurückgeschrieben
+        """
+        previous: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+        def write(shard: str, records: Dict[str, Dict[str, Any]]) -> None:
+            if shard not in previous:
+                try:
+                    previous[shard] = self._read_shard(shard)
+                except FileNotFoundError:  # Noch kein Index-Manifest (erstes save)
+                    previous[shard] = self._load_shard_file(shard)
+            self._write_shard(shard, records)
+
+        try:
+            yield write
+        except BaseException:
+            for shard, records in previous.items():
+                self._write_shard(shard, records)
+                self._shards.pop(shard, None)
+            raise
+
+    def repair_index(self) -> int:
+        """
+        Gleicht den Aufgaben-Index an die Shards an, falls ein Schreibvorgang zwischen Shards und
+        Index abgebrochen wurde: indizierte Felder und Shard folgen dem Datensatz, Einträge ohne
+        Datensatz entfallen, Datensätze ohne Eintrag werden angehängt
+        Gibt die Anzahl der korrigierten Einträge zurück
+        """
+        with self.index_store.locked():
+            index = self.index_store.view()
+            # Der Shard-Cache gilt je Index-Version; ein abgebrochener Schreibvorgang hat keine erzeugt
+            self._shards.clear()
+            records = {task_id: (shard, task) for shard in self._shard_names()
+                       for task_id, task in self._read_shard(shard).items()}
+
+            entries, repaired = [], 0
+            for entry in index.get('tasks', []):
+                record = records.pop(entry.get('task_id'), None)
+                if record is None:
+                    repaired += 1
+                    continue
+                entries.append(index_entry(record[1], record[0]))
+                repaired += entries[-1] != entry
+            for shard, task in records.values():
+                entries.append(index_entry(task, shard))
+                repaired += 1
+
+            if not repaired:
+                return 0
+            self.index_store.apply([{'op': 'add', 'path': '/tasks', 'value': entries}])
+            self._confirm_shards(None)
+            with self._lock:
+                self._data = None
+        print(f"Aufgaben-Index an die Shards angeglichen ({repaired} Einträge korrigiert).")
+        return repaired
+
+    def _shard_names(self) -> List[str]:
+        """Alle vorhandenen Shards"""
+        if not os.path.isdir(self.shard_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.shard_dir)
+                      if name.endswith('.json') and not name.startswith('.'))
+
+    def _require_task_id(self, task: Dict[str, Any]) -> str:
+        task_id = task.get('task_id')
+        if not isinstance(task_id, str) or not task_id:
+            raise ValueError(f"Aufgaben benötigen eine task_id als Text: {task!r}")
+        return task_id
+
+    def _index_document(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Manifest mit kompaktem Aufgaben-Index statt vollständiger Aufgaben"""
+        document = {}
+        for key, value in data.items():
+            if key == 'tasks' and isinstance(value, list):
+                document[key] = [index_entry(task, shard_name(self._require_task_id(task), self.shard_count))
+                                 for task in value]
+            else:
+                document[key] = value
+        return document
+
+    def _current(self) -> Dict[str, Any]:
+        """Setzt das vollständige Manifest aus Index und Shards zusammen (gecacht je Version)"""
+        with self._lock:
+            if self._data is not None and self.index_store.version == self._version:
+                return self._data
+
+            # Geteilte Sperre: Index und Shards stammen aus demselben Schreibvorgang
+            with self.index_store.locked(shared=True):
+                version = self.index_store.version
+                index = self.index_store.view()
+                data = {}
+                for key, value in index.items():
+                    if key == 'tasks' and isinstance(value, ReadOnlyList):
+                        data[key] = [self._read_shard(entry['shard'], version)[entry['task_id']] for entry in value]
+                    else:
+                        data[key] = thaw(value)
+
+            self._data, self._version, self._task_index = data, version, None
+            return self._data
+
+    @property
+    def version(self):
+        """Version des Index-Manifests (jede Aufgabenänderung erzeugt einen Journal-Eintrag)"""
+        return self.index_store.version
+
+    def last_modified(self) -> float:
+        """Zeitpunkt der letzten Änderung am Projektzustand"""
+        return self.index_store.last_modified()
+
+    def view(self) -> ReadOnlyDict:
+        """Schreibgeschützte Sicht auf den Projektzustand im Manifest-Format"""
+        return ReadOnlyDict(self._current())
+
+    def load(self) -> Dict[str, Any]:
+        """Veränderbare Kopie des Projektzustands im Manifest-Format"""
+        with self._lock:
+            return thaw(self._current())
+
+    def _sync_markdown(self, old_tasks: Dict[str, Dict[str, Any]], tasks: Iterable[Dict[str, Any]]) -> None:
+        """Führt die Aufgaben-Markdowns nach, deren Kopfzeilen-Felder sich geändert haben"""
+        for task in tasks:
+            old_task = old_tasks.get(task.get('task_id'), {})
+            if any(old_task.get(field) != task.get(field) for field in HEADER_FIELDS):
+                sync_task_markdown(self.task_dir, task)
+
+    def save(self, manifest: Dict[str, Any]) -> None:
+        """Ersetzt den gesamten Projektzustand (alle Shards und den Index)"""
+        data = thaw(manifest)
+        tasks = data.get('tasks', [])
+        document = self._index_document(data)
+
+        shards: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for task, entry in zip(tasks, document.get('tasks', [])):
+            records = shards.setdefault(entry['shard'], {})
+            if task['task_id'] in records:
+                raise ValueError(f"Doppelte task_id im Manifest: {task['task_id']}")
+            records[task['task_id']] = task
+
+        os.makedirs(self.state_dir, exist_ok=True)
+        with self.index_store.locked(), self._shard_writes() as write_shard:
+            old_tasks = {}
+            for shard in self._shard_names():
+                old_tasks.update(self._read_shard(shard))
+                if shard not in shards:
+                    write_shard(shard, {})
+            for shard, records in shards.items():
+                write_shard(shard, records)
+            self.index_store.save(document)
+            self._confirm_shards(None)
+
+            with self._lock:
+                self._data = None
+
+        self._sync_markdown(old_tasks, tasks)
+
+    def commit(self, manifest: Dict[str, Any], base_version) -> None:
+        """
+        Übernimmt ein verändertes Manifest, sofern seit base_version niemand geschrieben hat
+        Nur die Shards geänderter oder neuer Aufgaben werden neu geschrieben
+        """
+        data = thaw(manifest)
+        with self.index_store.locked():
+            if self.version != base_version:
+                raise ManifestConflictError("Projektzustand wurde zwischenzeitlich von einem anderen Agenten geändert")
+            current = self._current()
+            old_tasks = current.get('tasks', [])
+
+            changed_positions = set()
+            operations = []
+            for operation in diff_documents(current, data):
+                parts = parse_pointer(operation['path'])
+                if parts[0] != 'tasks':
+                    # Felder außerhalb der Aufgaben sind im Index-Manifest identisch abgelegt
+                    operations.append(operation)
+                elif len(parts) == 1 or not isinstance(data.get('tasks'), list):
+                    # Aufgabenliste ersetzt oder gekürzt: vollständig neu schreiben
+                    self.save(data)
+                    return
+                elif parts[1] == '-':
+                    changed_positions.update(range(len(old_tasks), len(data['tasks'])))
+                else:
+                    changed_positions.add(int(parts[1]))
+
+            tasks = data.get('tasks', [])
+            known_ids = [self._require_task_id(task) for task in tasks]
+            if len(set(known_ids)) != len(known_ids):
+                raise ValueError("Doppelte task_id im Manifest")
+
+            # test-Operationen sorgen dafür, dass auch reine Shard-Änderungen einen Journal-Eintrag
+            # (und damit eine neue Version) erzeugen
+            tests = []
+            shard_updates: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for position in sorted(changed_positions):
+                task = tasks[position]
+                entry = index_entry(task, shard_name(task['task_id'], self.shard_count))
+                if position < len(old_tasks):
+                    old_id = old_tasks[position]['task_id']
+                    tests.append({'op': 'test', 'path': f'/tasks/{position}/task_id', 'value': old_id})
+                    operations.append({'op': 'replace', 'path': f'/tasks/{position}', 'value': entry})
+                    if old_id != task['task_id']:
+                        old_shard = shard_name(old_id, self.shard_count)
+                        shard_updates.setdefault(old_shard, dict(self._read_shard(old_shard))).pop(old_id, None)
+                else:
+                    operations.append({'op': 'add', 'path': '/tasks/-', 'value': entry})
+                records = shard_updates.setdefault(entry['shard'], dict(self._read_shard(entry['shard'])))
+                records[task['task_id']] = task
+
+            with self._shard_writes() as write_shard:
+                for shard, records in shard_updates.items():
+                    write_shard(shard, records)
+                if tests or operations:
+                    self.index_store.apply(tests + operations)
+            self._confirm_shards(base_version)
+
+            with self._lock:
+                self._data, self._version, self._task_index = data, self.index_store.version, None
+
+        self._sync_markdown({task.get('task_id'): task for task in old_tasks},
+                            [tasks[position] for position in changed_positions])
+
+    def update_tasks(self, updates: Dict[str, Dict[str, Any]],
+                     manifest_fields: Optional[Dict[str, Any]] = None,
+                     expected: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """
+        Ändert Felder mehrerer Aufgaben; geschrieben werden nur deren Shards und ein Index-Eintrag
+        Bedingungen in expected werden vor dem ersten Schreibvorgang geprüft (wie ManifestStore)
+        """
+        with self.index_store.locked():
+            base_version = self.version
+            index = self.index_store.task_index()
+
+            by_shard: Dict[str, List[Tuple[int, str, Dict[str, Any]]]] = {}
+            for task_id, fields in updates.items():
+                position = index.position(task_id)
+                if position is None:
+                    raise KeyError(f"Aufgabe {task_id} nicht im Projektzustand gefunden")
+                if fields.get('task_id', task_id) != task_id:
+                    raise ValueError(f"task_id von {task_id} kann nur über commit() geändert werden")
+                by_shard.setdefault(index.tasks[position]['shard'], []).append((position, task_id, fields))
+
+            for shard, items in by_shard.items():
+                records = self._read_shard(shard)
+                for position, task_id, fields in items:
+                    check_expected(task_id, records[task_id], (expected or {}).get(task_id))
+
+            tests, operations = [], []
+            old_tasks, changed = {}, {}
+            shard_updates: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for shard, items in by_shard.items():
+                records = shard_updates[shard] = dict(self._read_shard(shard))
+                for position, task_id, fields in items:
+                    old_tasks[task_id] = records[task_id]
+                    task = dict(records[task_id])
+                    task.update(thaw(fields))
+                    records[task_id] = changed[position] = task
+
+                    tests.append({'op': 'test', 'path': f'/tasks/{position}/task_id', 'value': task_id})
+                    for field in TaskIndex.INDEXED_FIELDS:
+                        if field in fields:
+                            operations.append({'op': 'add', 'path': f'/tasks/{position}/{field}',
+                                               'value': task[field]})
+
+            for field, value in (manifest_fields or {}).items():
+                operations.append({'op': 'add', 'path': f'/{escape_pointer_segment(field)}', 'value': value})
+            if not tests and not operations:
+                return
+            with self._shard_writes() as write_shard:
+                for shard, records in shard_updates.items():
+                    write_shard(shard, records)
+                self.index_store.apply(tests + operations)
+            self._confirm_shards(base_version)
+
+            # Cache nachführen, falls er den Stand vor dieser Änderung enthielt
+            with self._lock:
+                if self._data is not None and self._version == base_version:
+                    for position, task in changed.items():
+                        self._data['tasks'][position] = task
+                        if self._task_index is not None:
+                            self._task_index.reindex(position)
+                    for field, value in (manifest_fields or {}).items():
+                        self._data[field] = thaw(value)
+                        if field == 'tasks':
+                            self._data = None
+                            break
+                    self._version = self.index_store.version
+
+        self._sync_markdown(old_tasks, changed.values())
+
+    def update_task(self, task_id: str, fields: Dict[str, Any],
+                    manifest_fields: Optional[Dict[str, Any]] = None,
+                    expected: Optional[Dict[str, Any]] = None) -> None:
+        """Ändert Felder einer einzelnen Aufgabe (nur, wenn sie expected entspricht)"""
+        self.update_tasks({task_id: fields}, manifest_fields, {task_id: expected} if expected else None)
+
+    def append_task(self, task: Dict[str, Any]) -> None:
+        """Fügt eine neue Aufgabe in ihren Shard ein und ergänzt den Index"""
+        task = thaw(task)
+        task_id = self._require_task_id(task)
+        shard = shard_name(task_id, self.shard_count)
+
+        with self.index_store.locked():
+            if self.index_store.find_task(task_id) is not None:
+                raise ValueError(f"Aufgabe {task_id} existiert bereits")
+            base_version = self.version
+
+            records = dict(self._read_shard(shard))
+            records[task_id] = task
+            operations = []
+            if 'tasks' not in self.index_store.view():
+                operations.append({'op': 'add', 'path': '/tasks', 'value': []})
+            operations.append({'op': 'add', 'path': '/tasks/-', 'value': index_entry(task, shard)})
+
+            with self._shard_writes() as write_shard:
+                write_shard(shard, records)
+                self.index_store.apply(operations)
+            self._confirm_shards(base_version)
+
+            with self._lock:
+                if self._data is not None and self._version == base_version and 'tasks' in self._data:
+                    self._data['tasks'].append(task)
+                    if self._task_index is not None:
+                        self._task_index.sync_appended()
+                    self._version = self.index_store.version
+                else:
+                    self._data = None
+
+        sync_task_markdown(self.task_dir, task)
+
+    def compact(self) -> None:
+        """Überführt das Journal des Index-Manifests in dessen Snapshot"""
+        self.index_store.compact()
+
+    def task_index(self) -> TaskIndex:
+        """Index über die vollständigen Aufgaben des aktuellen Standes"""
+        with self._lock:
+            data = self._current()
+            if self._task_index is None:
+                self._task_index = TaskIndex(data.get('tasks', []))
+            return self._task_index
+
+    def find_task(self, task_id: str) -> Optional[ReadOnlyDict]:
+        """Schreibgeschützte Sicht auf eine Aufgabe; gelesen wird nur ihr Shard"""
+        with self._lock:
+            entry = self.index_store.find_task(task_id)
+            if entry is None:
+                return None
+            return freeze(self._read_shard(entry['shard']).get(task_id))
+
+    def find_tasks(self, field: str, value: Any) -> List[ReadOnlyDict]:
+        """Aufgaben mit field == value; gelesen werden nur die betroffenen Shards"""
+        with self._lock:
+            return [ReadOnlyDict(self._read_shard(entry['shard'])[entry['task_id']])
+                    for entry in self.index_store.find_tasks(field, value)]
+
+    def get_field(self, key: str, default: Any = None) -> Any:
+        """Einzelnes Top-Level-Feld; außer 'tasks' genügt das Index-Manifest"""
+        if key == 'tasks':
+            return self.view().get(key, default)
+        return self.index_store.get_field(key, default)
+
+    def iter_items(self, key: str) -> Iterator[Any]:
+        """Elemente einer Top-Level-Liste (Aufgaben werden aus ihren Shards gelesen)"""
+        if key == 'tasks':
+            return self.iter_tasks()
+        return self.index_store.iter_items(key)
+
+    def iter_tasks(self, fields: Optional[Sequence[str]] = None, **filters: Any) -> Iterator[Mapping[str, Any]]:
+        """
+        Aufgaben einzeln, gefiltert nach field == value und optional auf fields reduziert
+        Betreffen Filter und Felder nur indizierte Felder, genügt der kompakte Index
+        """
+        indexed = {field: value for field, value in filters.items() if field in TaskIndex.INDEXED_FIELDS}
+        remaining = {field: value for field, value in filters.items() if field not in indexed}
+        if fields is not None and not remaining and all(field in TaskIndex.INDEXED_FIELDS for field in fields):
+            return self.index_store.iter_tasks(fields, **indexed)
+
+        entries = self.index_store.iter_tasks(('task_id', 'shard'), **indexed)
+        tasks = (ReadOnlyDict(self._read_shard(entry['shard'])[entry['task_id']]) for entry in entries)
+        # Auch indizierte Filter am Datensatz prüfen: ein Shard kann bereits neuer sein als der gelesene Index
+        return filter_tasks(tasks, fields, **filters)
+
+    def count_tasks(self, **filters: Any) -> int:
+        """Anzahl der Aufgaben, die allen Feldfiltern entsprechen (allein aus dem Index)"""
+        index = self.index_store.task_index()
+        if not filters:
+            return len(index.tasks)
+        field, value = filters.popitem()
+        return index.count(field, value, **filters)
+
+    def invalidate(self) -> None:
+        """Verwirft alle Caches"""
+        with self._lock:
+            self._shards.clear()
+            self._data = None
+            self._version = None
+            self._task_index = None
+            self.index_store.invalidate()
+
+
+if __name__ == '__main__':
+    # Test des Shard-Speichers
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    store = ShardedManifestStore(os.path.join(project_root, 'project_state'), os.path.join(project_root, 'tasks'))
+
+    print("=== Sharded Store Test ===")
+    try:
+        manifest = store.view()
+        print(f"Aufgaben: {len(manifest.get('tasks', []))} in {len(store._shard_names())} Shards")
+        print(f"Offene Aufgaben: {store.count_tasks(status='open')}")
+    except FileNotFoundError:
+        print("Kein Shard-Speicher vorhanden (Import über storage_backend.py import --backend sharded)")
@@ -0,0 +1,434 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import json_codec
+from manifest_journal import diff_documents, parse_pointer
+from manifest_store import ManifestConflictError, ReadOnlyDict, check_expected, freeze, thaw
+from manifest_stream import filter_tasks
+from task_index import TaskIndex
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS store_info (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS manifest_meta (
+    key TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    position INTEGER PRIMARY KEY,
+    task_id TEXT,
+    status TEXT,
+    assigned_team TEXT,
+    assigned_ai TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_task_id ON tasks (task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_team ON tasks (assigned_team, status);
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_ai ON tasks (assigned_ai);
+CREATE TABLE IF NOT EXISTS teams (
+    position INTEGER PRIMARY KEY,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS directives (
+    key TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL
+);
+"""
+
+# Top-Level-Felder, die in eigenen Tabellen statt in manifest_meta liegen
+TABLE_FIELDS = ('tasks', 'teams', 'ceo_directives')
+
+
+def _encode(value: Any) -> str:
+    return json_codec.dumps(thaw(value))
+
+
+def _column_value(value: Any) -> Any:
+    """Wert für eine indizierte Spalte (analog zu TaskIndex)"""
+    return value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+
+
+class SQLiteStore:
+    """
+    SQLite-Backend für den Projektzustand (Aufgaben, Teams, CEO-Direktiven)
+    Bietet dieselbe Schnittstelle wie ManifestStore; WAL-Modus erlaubt mehrere
+    Schreibprozesse, Status-/Team-/Zuweisungsabfragen laufen über Indizes.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._data: Optional[Dict[str, Any]] = None
+        self._revision: Optional[int] = None
+        self._task_index: Optional[TaskIndex] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Öffnet die Verbindung (neu nach einem fork, da Verbindungen nicht geteilt werden dürfen)"""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def _write_transaction(self):
+        """Schreibtransaktion mit sofortiger Schreibsperre (BEGIN IMMEDIATE)"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def _read_revision(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM store_info WHERE key = 'revision'").fetchone()
+        return row[0] if row else 0
+
+    def _bump_revision(self, conn: sqlite3.Connection) -> int:
+        revision = self._read_revision(conn) + 1
+        conn.execute("INSERT OR REPLACE INTO store_info (key, value) VALUES ('revision', ?)", (revision,))
+        return revision
+
+    def _materialize(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Setzt das vollständige Manifest aus den Tabellen zusammen"""
+        manifest = {}
+        for key, value in conn.execute('SELECT key, value FROM manifest_meta ORDER BY position').fetchall():
+            if value is not None:
+                manifest[key] = json_codec.loads(value)
+            elif key == 'tasks':
+                manifest[key] = [json_codec.loads(data) for (data,) in
+                                 conn.execute('SELECT data FROM tasks ORDER BY position')]
+            elif key == 'teams':
+                manifest[key] = [json_codec.loads(data) for (data,) in
+                                 conn.execute('SELECT data FROM teams ORDER BY position')]
+            elif key == 'ceo_directives':
+                manifest[key] = {name: json_codec.loads(data) for name, data in
+                                 conn.execute('SELECT key, value FROM directives ORDER BY position')}
+        return manifest
+
+    def _current(self) -> Dict[str, Any]:
+        """Gibt den gecachten Zustand zurück und liest nur bei neuer Revision neu ein"""
+        with self._lock:
+            conn = self._connection()
+            if self._data is not None and self._read_revision(conn) == self._revision:
+                return self._data
+
+            # Konsistenter Lesestand über alle Tabellen (innerhalb einer laufenden Schreibtransaktion
+            # ist dieser bereits gegeben)
+            own_transaction = not conn.in_transaction
+            if own_transaction:
+                conn.execute('BEGIN')
+            try:
+                self._revision = self._read_revision(conn)
+                self._data = self._materialize(conn)
+            finally:
+                if own_transaction:
+                    conn.execute('COMMIT')
+            self._task_index = None
+            return self._data
+
+    def _task_row(self, position: int, task: Dict[str, Any]) -> Tuple:
+        return (position, _column_value(task.get('task_id')), _column_value(task.get('status')),
+                _column_value(task.get('assigned_team')), _column_value(task.get('assigned_ai')),
+                _encode(task))
+
+    def _insert_tasks(self, conn: sqlite3.Connection, start: int, tasks: List[Dict[str, Any]]) -> None:
+        conn.executemany(
+            'INSERT OR REPLACE INTO tasks (position, task_id, status, assigned_team, assigned_ai, data) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [self._task_row(start + offset, task) for offset, task in enumerate(tasks)]
+        )
+
+    def _write_directive(self, conn: sqlite3.Connection, key: str, value: Any) -> None:
+        row = conn.execute('SELECT position FROM directives WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            row = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM directives').fetchone()
+        conn.execute('INSERT OR REPLACE INTO directives (key, position, value) VALUES (?, ?, ?)',
+                     (key, row[0], _encode(value)))
+
+    def _write_top_level(self, conn: sqlite3.Connection, key: str, value: Any) -> None:
+        """Schreibt ein Top-Level-Feld des Manifests (Tabellenfelder werden vollständig ersetzt)"""
+        row = conn.execute('SELECT position FROM manifest_meta WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            row = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM manifest_meta').fetchone()
+        position = row[0]
+
+        if key == 'tasks' and isinstance(value, list):
+            conn.execute('DELETE FROM tasks')
+            self._insert_tasks(conn, 0, value)
+            encoded = None
+        elif key == 'teams' and isinstance(value, list):
+            conn.execute('DELETE FROM teams')
+            conn.executemany('INSERT INTO teams (position, name, data) VALUES (?, ?, ?)',
+                             [(index, _column_value(team.get('name')), _encode(team))
+                              for index, team in enumerate(value)])
+            encoded = None
+        elif key == 'ceo_directives' and isinstance(value, dict):
+            conn.execute('DELETE FROM directives')
+            for name, directive in value.items():
+                self._write_directive(conn, name, directive)
+            encoded = None
+        else:
+            encoded = _encode(value)
+
+        conn.execute('INSERT OR REPLACE INTO manifest_meta (key, position, value) VALUES (?, ?, ?)',
+                     (key, position, encoded))
+
+    @property
+    def version(self) -> int:
+        """Revision des Datenbestands (wird bei jedem Schreibvorgang erhöht)"""
+        with self._lock:
+            return self._read_revision(self._connection())
+
+    def last_modified(self) -> float:
+        """Zeitpunkt der letzten Änderung an Datenbank oder WAL-Datei"""
+        mtime = os.path.getmtime(self.db_path)
+        wal_path = self.db_path + '-wal'
+        if os.path.exists(wal_path):
+            mtime = max(mtime, os.path.getmtime(wal_path))
+        return mtime
+
+    def view(self) -> ReadOnlyDict:
+        """Schreibgeschützte Sicht auf den Projektzustand im Manifest-Format"""
+        return ReadOnlyDict(self._current())
+
+    def load(self) -> Dict[str, Any]:
+        """Veränderbare Kopie des Projektzustands im Manifest-Format"""
+        with self._lock:
+            return thaw(self._current())
+
+    def save(self, manifest: Dict[str, Any]) -> None:
+        """Ersetzt den gesamten Projektzustand"""
+        data = thaw(manifest)
+        with self._write_transaction() as conn:
+            for table in ('manifest_meta', 'tasks', 'teams', 'directives'):
+                conn.execute(f'DELETE FROM {table}')
+            for key, value in data.items():
+                self._write_top_level(conn, key, value)
+            revision = self._bump_revision(conn)
+        self._data, self._revision, self._task_index = data, revision, None
+
+    def commit(self, manifest: Dict[str, Any], base_version: int) -> None:
+        """
+        Übernimmt ein verändertes Manifest, sofern seit base_version niemand geschrieben hat
+        Nur geänderte Aufgaben, Direktiven und Felder werden geschrieben
+        """
+        data = thaw(manifest)
+        with self._write_transaction() as conn:
+            if self._read_revision(conn) != base_version:
+                raise ManifestConflictError("Projektzustand wurde zwischenzeitlich von einem anderen Agenten geändert")
+            current = self._current()
+
+            changed_tasks, changed_directives, changed_fields = set(), set(), set()
+            appended_from = None
+            for operation in diff_documents(current, data):
+                parts = parse_pointer(operation['path'])
+                key = parts[0]
+                if key == 'tasks' and len(parts) == 2 and parts[1] == '-':
+                    if appended_from is None:
+                        appended_from = len(current.get('tasks', []))
+                elif key == 'tasks' and len(parts) >= 2 and (len(parts) > 2 or operation['op'] == 'replace'):
+                    changed_tasks.add(int(parts[1]))
+                elif key == 'ceo_directives' and len(parts) >= 2:
+                    changed_directives.add(parts[1])
+                else:
+                    changed_fields.add(key)
+
+            for key in changed_fields:
+                if key in data:
+                    self._write_top_level(conn, key, data[key])
+                else:
+                    conn.execute('DELETE FROM manifest_meta WHERE key = ?', (key,))
+            if 'tasks' not in changed_fields:
+                tasks = data.get('tasks', [])
+                for position in changed_tasks:
+                    self._insert_tasks(conn, position, [tasks[position]])
+                if appended_from is not None:
+                    self._insert_tasks(conn, appended_from, tasks[appended_from:])
+            if 'ceo_directives' not in changed_fields:
+                for name in changed_directives:
+                    if name in data.get('ceo_directives', {}):
+                        self._write_directive(conn, name, data['ceo_directives'][name])
+                    else:
+                        conn.execute('DELETE FROM directives WHERE key = ?', (name,))
+
+            revision = self._bump_revision(conn)
+        self._data, self._revision, self._task_index = data, revision, None
+
+    def update_tasks(self, updates: Dict[str, Dict[str, Any]],
+                     manifest_fields: Optional[Dict[str, Any]] = None,
+                     expected: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """Ändert Felder mehrerer Aufgaben in einer Transaktion (Bedingungen wie ManifestStore)"""
+        with self._write_transaction() as conn:
+            base_revision = self._read_revision(conn)
+            changed = {}
+            for task_id, fields in updates.items():
+                row = conn.execute('SELECT position, data FROM tasks WHERE task_id = ? ORDER BY position LIMIT 1',
+                                   (task_id,)).fetchone()
+                if row is None:
+                    raise KeyError(f"Aufgabe {task_id} nicht im Projektzustand gefunden")
+                task = json_codec.loads(row[1])
+                check_expected(task_id, task, (expected or {}).get(task_id))
+                task.update(thaw(fields))
+                self._insert_tasks(conn, row[0], [task])
+                changed[row[0]] = task
+            for key, value in (manifest_fields or {}).items():
+                self._write_top_level(conn, key, value)
+            revision = self._bump_revision(conn)
+
+        # Cache nachführen, falls er den Stand vor dieser Transaktion enthielt
+        if self._data is not None and self._revision == base_revision:
+            for position, task in changed.items():
+                self._data['tasks'][position] = task
+                if self._task_index is not None:
+                    self._task_index.reindex(position)
+            for key, value in (manifest_fields or {}).items():
+                self._data[key] = thaw(value)
+                if key == 'tasks':
+                    self._task_index = None
+            self._revision = revision
+
+    def update_task(self, task_id: str, fields: Dict[str, Any],
+                    manifest_fields: Optional[Dict[str, Any]] = None,
+                    expected: Optional[Dict[str, Any]] = None) -> None:
+        """Ändert Felder einer einzelnen Aufgabe (nur, wenn sie expected entspricht)"""
+        self.update_tasks({task_id: fields}, manifest_fields, {task_id: expected} if expected else None)
+
+    def append_task(self, task: Dict[str, Any]) -> None:
+        """Fügt eine neue Aufgabe hinzu"""
+        task = thaw(task)
+        with self._write_transaction() as conn:
+            base_revision = self._read_revision(conn)
+            if conn.execute("SELECT 1 FROM manifest_meta WHERE key = 'tasks'").fetchone() is None:
+                self._write_top_level(conn, 'tasks', [])
+            position = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM tasks').fetchone()[0]
+            self._insert_tasks(conn, position, [task])
+            revision = self._bump_revision(conn)
+
+        if self._data is not None and self._revision == base_revision and 'tasks' in self._data:
+            self._data['tasks'].append(task)
+            if self._task_index is not None:
+                self._task_index.sync_appended()
+            self._revision = revision
+        else:
+            self._data = None
+
+    def task_index(self) -> TaskIndex:
+        """Index über die Aufgaben des aktuellen Standes"""
+        with self._lock:
+            data = self._current()
+            if self._task_index is None:
+                self._task_index = TaskIndex(data.get('tasks', []))
+            return self._task_index
+
+    def find_task(self, task_id: str) -> Optional[ReadOnlyDict]:
+        """Schreibgeschützte Sicht auf eine Aufgabe oder None"""
+        tasks = self.find_tasks('task_id', task_id)
+        return tasks[0] if tasks else None
+
+    def find_tasks(self, field: str, value: Any) -> List[ReadOnlyDict]:
+        """Aufgaben mit field == value, direkt über die SQLite-Indizes abgefragt"""
+        if field not in TaskIndex.INDEXED_FIELDS:
+            raise ValueError(f"Feld {field} ist nicht indiziert")
+        with self._lock:
+            operator = 'IS' if value is None else '='
+            rows = self._connection().execute(
+                f'SELECT data FROM tasks WHERE {field} {operator} ? ORDER BY position', (value,)
+            ).fetchall()
+        return [freeze(json_codec.loads(data)) for (data,) in rows]
+
+    def get_field(self, key: str, default: Any = None) -> Any:
+        """Einzelnes Top-Level-Feld; skalare Felder werden direkt aus manifest_meta gelesen"""
+        if key in TABLE_FIELDS:
+            return self.view().get(key, default)
+        with self._lock:
+            row = self._connection().execute('SELECT value FROM manifest_meta WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return default
+        return freeze(json_codec.loads(row[0])) if row[0] is not None else None
+
+    def iter_items(self, key: str) -> Iterator[Any]:
+        """Elemente einer Top-Level-Liste (Aufgaben und Teams zeilenweise aus ihren Tabellen)"""
+        if key == 'tasks':
+            return self.iter_tasks()
+        if key == 'teams':
+            return self._iter_rows('SELECT data FROM teams ORDER BY position', ())
+        with self._lock:
+            row = self._connection().execute('SELECT value FROM manifest_meta WHERE key = ?', (key,)).fetchone()
+        value = json_codec.loads(row[0]) if row and row[0] is not None else []
+        return iter(value if isinstance(value, list) else [])
+
+    def _iter_rows(self, query: str, params: Sequence[Any]) -> Iterator[Dict[str, Any]]:
+        """Liest die JSON-Spalte einer Abfrage blockweise"""
+        with self._lock:
+            cursor = self._connection().execute(query, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            for (data,) in rows:
+                yield json_codec.loads(data)
+
+    def iter_tasks(self, fields: Optional[Sequence[str]] = None, **filters: Any) -> Iterator[Mapping[str, Any]]:
+        """
+        Aufgaben einzeln, gefiltert nach field == value und optional auf fields reduziert
+        Filter auf indizierte Felder laufen in SQLite; werden nur indizierte Felder angefragt,
+        entfällt das Parsen der Aufgaben vollständig
+        """
+        clauses, params, remaining = [], [], {}
+        for field, value in filters.items():
+            if field in TaskIndex.INDEXED_FIELDS:
+                clauses.append(f'{field} IS ?' if value is None else f'{field} = ?')
+                params.append(value)
+            else:
+                remaining[field] = value
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+
+        if fields is not None and not remaining and all(field in TaskIndex.INDEXED_FIELDS for field in fields):
+            columns = ', '.join(fields)
+            with self._lock:
+                cursor = self._connection().execute(
+                    f'SELECT {columns} FROM tasks{where} ORDER BY position', params)
+            return (dict(zip(fields, row)) for row in cursor)
+
+        tasks = self._iter_rows(f'SELECT data FROM tasks{where} ORDER BY position', params)
+        return filter_tasks(tasks, fields, **remaining)
+
+    def count_tasks(self, **filters: Any) -> int:
+        """Anzahl der Aufgaben, die allen Feldfiltern entsprechen (z.B. status='open')"""
+        clauses, params = [], []
+        for field, value in filters.items():
+            if field not in TaskIndex.INDEXED_FIELDS:
+                raise ValueError(f"Feld {field} ist nicht indiziert")
+            clauses.append(f'{field} IS ?' if value is None else f'{field} = ?')
+            params.append(value)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        with self._lock:
+            return self._connection().execute(f'SELECT COUNT(*) FROM tasks{where}', params).fetchone()[0]
+
+    def invalidate(self) -> None:
+        """Verwirft den Cache"""
+        with self._lock:
+            self._data = None
+            self._revision = None
+            self._task_index = None
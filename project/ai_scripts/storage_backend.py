@@ -0,0 +1,154 @@
+import argparse
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import json_codec
+from manifest_store import get_manifest_store, thaw
+from sharded_store import ShardedManifestStore
+from sqlite_store import SQLiteStore
+
+
+# Umgebungsvariable zur Auswahl des Backends ('json', 'sqlite' oder 'sharded')
+BACKEND_ENV_VAR = 'AI_STATE_BACKEND'
+DEFAULT_BACKEND = 'json'
+
+MANIFEST_FILE = 'project_manifest.json'
+SQLITE_FILE = 'project_state.sqlite'
+SHARDED_DIR = 'project_state'
+TASK_DIR = 'tasks'
+
+_sqlite_stores: Dict[str, SQLiteStore] = {}
+_sqlite_stores_lock = threading.Lock()
+_sharded_stores: Dict[str, ShardedManifestStore] = {}
+_sharded_stores_lock = threading.Lock()
+
+
+def get_sqlite_store(db_path: str) -> SQLiteStore:
+    """Gibt den prozessweit geteilten SQLiteStore für einen Datenbankpfad zurück"""
+    key = os.path.realpath(db_path)
+    with _sqlite_stores_lock:
+        store = _sqlite_stores.get(key)
+        if store is None:
+            store = SQLiteStore(key)
+            _sqlite_stores[key] = store
+        return store
+
+
+def get_sharded_store(state_dir: str, task_dir: Optional[str] = None) -> ShardedManifestStore:
+    """Gibt den prozessweit geteilten ShardedManifestStore für ein Zustandsverzeichnis zurück"""
+    key = os.path.realpath(state_dir)
+    with _sharded_stores_lock:
+        store = _sharded_stores.get(key)
+        if store is None:
+            store = ShardedManifestStore(key, task_dir)
+            _sharded_stores[key] = store
+        return store
+
+
+def _open_json_store(project_root: str):
+    return get_manifest_store(os.path.join(project_root, MANIFEST_FILE))
+
+
+def _open_sqlite_store(project_root: str):
+    return get_sqlite_store(os.path.join(project_root, SQLITE_FILE))
+
+
+def _open_sharded_store(project_root: str):
+    return get_sharded_store(os.path.join(project_root, SHARDED_DIR), os.path.join(project_root, TASK_DIR))
+
+
+STORAGE_BACKENDS: Dict[str, Callable[[str], Any]] = {
+    'json': _open_json_store,
+    'sqlite': _open_sqlite_store,
+    'sharded': _open_sharded_store,
+}
+
+
+def register_storage_backend(name: str, factory: Callable[[str], Any]) -> None:
+    """
+    Registriert ein weiteres Backend
+    factory(project_root) muss ein Objekt mit der Store-Schnittstelle liefern
+    (view, load, save, commit, version, update_tasks, append_task, find_task, find_tasks, task_index)
+    """
+    STORAGE_BACKENDS[name] = factory
+
+
+def selected_backend(backend: Optional[str] = None) -> str:
+    """Name des zu verwendenden Backends (Parameter, sonst AI_STATE_BACKEND, sonst 'json')"""
+    return backend or os.environ.get(BACKEND_ENV_VAR) or DEFAULT_BACKEND
+
+
+def open_project_store(project_root: str, backend: Optional[str] = None):
+    """Öffnet den Projektzustand eines Projekts über das gewählte Backend"""
+    name = selected_backend(backend)
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unbekanntes Storage-Backend: {name} (verfügbar: {', '.join(STORAGE_BACKENDS)})")
+    return STORAGE_BACKENDS[name](project_root)
+
+
+def import_json_manifest(project_root: str, backend: str = 'sqlite', manifest_path: Optional[str] = None):
+    """Übernimmt ein project_manifest.json vollständig in das angegebene Backend"""
+    manifest_path = manifest_path or os.path.join(project_root, MANIFEST_FILE)
+    # Über den ManifestStore gelesen, damit offene Journal-Einträge enthalten sind
+    manifest = thaw(get_manifest_store(manifest_path).view())
+
+    store = open_project_store(project_root, backend)
+    store.save(manifest)
+    return store
+
+
+def export_json_manifest(project_root: str, backend: str = 'sqlite', manifest_path: Optional[str] = None) -> str:
+    """Schreibt den Projektzustand eines Backends als project_manifest.json (atomar ersetzt)"""
+    manifest_path = manifest_path or os.path.join(project_root, MANIFEST_FILE)
+    store = open_project_store(project_root, backend)
+    if getattr(store, 'manifest_path', None) == os.path.realpath(manifest_path):
+        # JSON-Backend auf das eigene Manifest: Journal in den Snapshot überführen genügt
+        store.compact()
+        return manifest_path
+    manifest = thaw(store.view())
+
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.project_manifest.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            json_codec.dump(manifest, f, pretty=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, manifest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Ein evtl. vorhandener JSON-Store darf seinen Cache nicht weiterverwenden
+    get_manifest_store(manifest_path).invalidate()
+    return manifest_path
+
+
+if __name__ == '__main__':
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+    parser = argparse.ArgumentParser(description='Import/Export zwischen project_manifest.json und Storage-Backends')
+    parser.add_argument('command', choices=['import', 'export', 'info'], nargs='?', default='info')
+    parser.add_argument('--backend', default='sqlite', help='Ziel-/Quell-Backend (Standard: sqlite)')
+    parser.add_argument('--manifest', default=None, help='Pfad zum JSON-Manifest')
+    args = parser.parse_args()
+
+    print("=== Storage Backend Test ===")
+    if args.command == 'import':
+        store = import_json_manifest(project_root, args.backend, args.manifest)
+        print(f"Importiert: {len(store.view().get('tasks', []))} Aufgaben nach '{args.backend}'")
+    elif args.command == 'export':
+        path = export_json_manifest(project_root, args.backend, args.manifest)
+        print(f"Exportiert nach: {path}")
+    else:
+        print(f"Aktives Backend: {selected_backend()}")
+        print(f"Verfügbare Backends: {', '.join(STORAGE_BACKENDS)}")
+        try:
+            manifest = open_project_store(project_root).view()
+            print(f"Aufgaben: {len(manifest.get('tasks', []))}")
+        except FileNotFoundError:
+            print("Kein Projektzustand vorhanden")
@@ -1,24 +1,59 @@
-import json
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import re
 from collections import defaultdict, Counter
 
+import json_codec
+from history_log import format_history_event, get_history_log, map_history_shards, parse_history_timestamp
+from storage_backend import open_project_store
+
+# Schlüsselwörter für Fehler-Ereignisse in der History (auch Vorfilter beim Durchsuchen der Segmente)
+HISTORY_ERROR_KEYWORDS = ['error', 'fehler', 'failed', 'exception', 'critical']
+
+
+def _collect_history_issues(history_dir: str, shard: str, cutoff_date: datetime) -> Dict[str, Any]:
+    """Fehler-Ereignisse einer History-Datei ab cutoff_date (Map-Schritt, ggf. im Prozesspool)"""
+    issues = {'total_reported': 0, 'critical': 0, 'recent_issues': []}
+    # Nur Einträge mit einem Schlüsselwort werden dekodiert (Segmente per mmap bzw. blockweise durchsucht)
+    for event in get_history_log(history_dir).search_shard(shard, HISTORY_ERROR_KEYWORDS, since=cutoff_date):
+        event_time = parse_history_timestamp(event.get('timestamp')) or cutoff_date
+        content = format_history_event(event).lower()
+        
+        # Suche nach Error-Pattern
+        for pattern in HISTORY_ERROR_KEYWORDS:
+            if pattern in content:
+                issues['total_reported'] += 1
+                
+                if 'critical' in content:
+                    issues['critical'] += 1
+                
+                issues['recent_issues'].append({
+                    'file': event.get('affected_item') or event['source'],
+                    'date': event_time.isoformat(),
+                    'type': 'error_detected'
+                })
+                break
+    return issues
+
+
 class SummaryGenerator:
     """
     Automatisierte Zusammenfassungen für Projektfortschritt, Probleme und Verbesserungsvorschläge
     Generiert regelmäßige Reports für das Management
     """
     
-    def __init__(self, project_root: str):
+    def __init__(self, project_root: str, history_workers: int = 1):
         self.project_root = project_root
         self.manifest_path = os.path.join(project_root, 'project_manifest.json')
+        self.manifest_store = open_project_store(project_root)
         self.history_dir = os.path.join(project_root, 'history')
         self.knowledge_base_dir = os.path.join(project_root, 'knowledge_base')
         self.summaries_dir = os.path.join(project_root, 'summaries')
         self.agent_profiles_dir = os.path.join(project_root, 'agent_profiles')
         self.feedback_dir = os.path.join(project_root, 'feedback')
+        # Prozesse für die History-Auswertung (1 = seriell, 0 = alle CPU-Kerne)
+        self.history_workers = history_workers
         
         # Summary-Typen
         self.summary_types = {
@@ -44,8 +79,7 @@ class SummaryGenerator:
     
     def load_manifest(self) -> Dict[str, Any]:
         """Lädt das project_manifest.json"""
-        with open(self.manifest_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.manifest_store.load()
     
     def collect_project_data(self, days: int = 7) -> Dict[str, Any]:
         """Sammelt alle relevanten Projektdaten für die Zusammenfassung"""
@@ -92,14 +126,9 @@ class SummaryGenerator:
             }
         }
         
-        # Manifest-Daten sammeln
-        manifest = self.load_manifest()
-        
-        # Task-Statistiken
-        tasks = manifest.get('tasks', [])
-        data['tasks']['total'] = len(tasks)
-        
-        for task in tasks:
+        # Task-Statistiken (Aufgaben werden einzeln gestreamt statt das Manifest vollständig zu laden)
+        for task in self.manifest_store.iter_tasks():
+            data['tasks']['total'] += 1
             status = task.get('status', 'unknown')
             if status == 'completed':
                 data['tasks']['completed'] += 1
@@ -131,7 +160,7 @@ class SummaryGenerator:
             for agent_file in agent_files:
                 try:
                     with open(os.path.join(self.agent_profiles_dir, agent_file), 'r', encoding='utf-8') as f:
-                        profile = json.load(f)
+                        profile = json_codec.load(f)
                     
                     agent_id = profile.get('agent_id')
                     performance = profile.get('performance_history', {})
@@ -156,38 +185,15 @@ class SummaryGenerator:
                 data['agents']['top_performers'] = sorted_by_completion[:3]
                 data['agents']['underperformers'] = [a for a in sorted_by_completion if a['completion_rate'] < 0.7]
         
-        # History-Daten für Issues sammeln
+        # History-Daten für Issues sammeln (nur Ereignisse und Segmente ab cutoff_date), je Datei
+        # ausgewertet (mit history_workers > 1 im Prozesspool) und in Dateireihenfolge zusammengeführt
         if os.path.exists(self.history_dir):
-            for log_file in os.listdir(self.history_dir):
-                if log_file.endswith('.log'):
-                    log_path = os.path.join(self.history_dir, log_file)
-                    
-                    # Prüfe Datei-Datum
-                    file_time = datetime.fromtimestamp(os.path.getmtime(log_path))
-                    if file_time < cutoff_date:
-                        continue
-                    
-                    try:
-                        with open(log_path, 'r', encoding='utf-8') as f:
-                            content = f.read().lower()
-                        
-                        # Suche nach Error-Pattern
-                        error_patterns = ['error', 'fehler', 'failed', 'exception', 'critical']
-                        for pattern in error_patterns:
-                            if pattern in content:
-                                data['issues']['total_reported'] += 1
-                                
-                                if 'critical' in content:
-                                    data['issues']['critical'] += 1
-                                
-                                data['issues']['recent_issues'].append({
-                                    'file': log_file,
-                                    'date': file_time.isoformat(),
-                                    'type': 'error_detected'
-                                })
-                                break
-                    except:
-                        continue
+            shards = get_history_log(self.history_dir).shards(since=cutoff_date)
+            for issues in map_history_shards(self.history_dir, _collect_history_issues, shards, cutoff_date,
+                                             workers=self.history_workers):
+                data['issues']['total_reported'] += issues['total_reported']
+                data['issues']['critical'] += issues['critical']
+                data['issues']['recent_issues'].extend(issues['recent_issues'])
         
         # Knowledge Base für Verbesserungen sammeln
         ideas_path = os.path.join(self.knowledge_base_dir, 'ideas.md')
@@ -216,7 +222,7 @@ class SummaryGenerator:
             data['metrics']['efficiency'] = avg_completion
         
         # Kollaboration basierend auf Team-Aktivität
-        teams = manifest.get('teams', [])
+        teams = list(self.manifest_store.iter_items('teams'))
         if teams:
             active_teams = len([t for t in teams if t.get('members')])
             data['metrics']['collaboration'] = min(1.0, active_teams / max(1, len(teams)))
@@ -0,0 +1,167 @@
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from history_log import get_history_writer, make_history_event, timestamp_now
+from task_markdown import apply_task_header, read_task_markdown, write_task_markdown
+
+
+def task_status_fields(new_status: str, ai_name: Optional[str] = None) -> Dict[str, Any]:
+    """Ermittelt die Felder, die bei einem Statuswechsel einer Aufgabe gesetzt werden"""
+    fields: Dict[str, Any] = {'status': new_status}
+    if new_status == 'in_progress' and ai_name:
+        fields['assigned_ai'] = ai_name
+    elif new_status == 'completed':
+        fields['completed_date'] = datetime.now().strftime('%Y-%m-%d')
+    return fields
+
+
+class TaskBatch:
+    """
+    Sammelt Änderungen an Manifest, Aufgaben-Dateien und History als eine Arbeitseinheit
+
+    with TaskBatch(store, task_dir, history_dir) as batch:
+        batch.set_status('task_001_setup', 'in_progress', 'AI_Agent_Prototype')
+        batch.replace_in_task_file('task_001_setup', '- [ ] Schritt', '- [x] Schritt')
+        batch.log('AI_Agent_Prototype', 'TASK_STATUS_UPDATE', 'task_001_setup', '...')
+
+    flush() schreibt alle Aufgabenfelder als einen Journal-Datensatz, liest und schreibt jede
+    Aufgaben-Datei höchstens einmal und hängt alle History-Ereignisse mit einem Schreibvorgang
+    an den Ereignisstrom an (über den gepufferten Schreiber). Beim Verlassen mit einer Ausnahme wird nichts geschrieben.
+    """
+
+    def __init__(self, store, task_dir: Optional[str] = None, history_dir: Optional[str] = None):
+        self.store = store
+        self.task_dir = task_dir
+        self.history_dir = history_dir
+        self._task_fields: Dict[str, Dict[str, Any]] = OrderedDict()
+        self._manifest_fields: Dict[str, Any] = {}
+        self._expected: Dict[str, Dict[str, Any]] = {}
+        self._file_edits: Dict[str, List[Tuple[str, Any, Any]]] = OrderedDict()
+        self._history: List[Dict[str, Any]] = []
+
+    def __enter__(self) -> 'TaskBatch':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+        return False
+
+    def update_task(self, task_id: str, fields: Dict[str, Any]) -> None:
+        """Merkt Feldänderungen einer Aufgabe vor (spätere Werte überschreiben frühere)"""
+        self._task_fields.setdefault(task_id, {}).update(fields)
+
+    def set_status(self, task_id: str, new_status: str, ai_name: Optional[str] = None) -> None:
+        """Merkt einen Statuswechsel vor; die Kopfzeilen der Aufgaben-Datei folgen beim flush"""
+        self.update_task(task_id, task_status_fields(new_status, ai_name))
+
+    def expect(self, task_id: str, fields: Dict[str, Any]) -> None:
+        """Bedingung für den flush: die Aufgabe muss beim Schreiben diese Feldwerte haben"""
+        self._expected.setdefault(task_id, {}).update(fields)
+
+    def set_manifest_fields(self, fields: Dict[str, Any]) -> None:
+        """Merkt Änderungen an Top-Level-Feldern des Manifests vor"""
+        self._manifest_fields.update(fields)
+
+    def replace_in_task_file(self, task_id: str, old: str, new: str) -> None:
+        """Merkt eine Textersetzung in der Aufgaben-Datei vor"""
+        self._file_edits.setdefault(task_id, []).append(('replace', old, new))
+
+    def append_to_task_file(self, task_id: str, text: str) -> None:
+        """Merkt Text vor, der an die Aufgaben-Datei angehängt wird"""
+        self._file_edits.setdefault(task_id, []).append(('append', text, None))
+
+    def log(self, ai_name: str, action_type: str, affected_item: str, description: str,
+            output: str = '') -> None:
+        """Merkt einen History-Eintrag vor (Zeitstempel zum Zeitpunkt des Aufrufs)"""
+        self._history.append(make_history_event(timestamp_now(), ai_name, action_type, affected_item,
+                                                description, output))
+
+    @property
+    def pending(self) -> bool:
+        """True, solange vorgemerkte Änderungen noch nicht geschrieben wurden"""
+        return bool(self._task_fields or self._manifest_fields or self._file_edits or self._history)
+
+    def discard(self) -> None:
+        """Verwirft alle vorgemerkten Änderungen"""
+        self._task_fields = OrderedDict()
+        self._manifest_fields = {}
+        self._expected = {}
+        self._file_edits = OrderedDict()
+        self._history = []
+
+    def _flush_manifest(self) -> None:
+        if not self._task_fields and not self._manifest_fields:
+            return
+        manifest_fields = dict(self._manifest_fields)
+        manifest_fields.setdefault('last_updated', timestamp_now())
+        self.store.update_tasks(dict(self._task_fields), manifest_fields, self._expected or None)
+
+    def _prepare_task_files(self) -> Dict[str, str]:
+        """
+        Liest jede betroffene Aufgaben-Datei einmal und wendet Kopfzeilen und Bearbeitungen an
+        Fehlt eine Datei mit vorgemerkten Bearbeitungen, schlägt dies vor jedem Schreibvorgang fehl
+        """
+        contents: Dict[str, str] = {}
+        if not self.task_dir:
+            return contents
+        for task_id in OrderedDict.fromkeys(list(self._task_fields) + list(self._file_edits)):
+            edits = self._file_edits.get(task_id, [])
+            try:
+                content = read_task_markdown(self.task_dir, task_id)
+            except FileNotFoundError:
+                if edits:
+                    raise
+                continue
+
+            updated = apply_task_header(content, self._task_fields.get(task_id, {}))
+            for kind, text, replacement in edits:
+                if kind == 'replace':
+                    updated = updated.replace(text, replacement)
+                else:
+                    updated += text
+            if updated != content:
+                contents[task_id] = updated
+        return contents
+
+    def _flush_history(self) -> None:
+        if not self.history_dir or not self._history:
+            return
+        # Gepuffert: der Hintergrund-Schreiber hängt die Ereignisse gesammelt an
+        get_history_writer(self.history_dir).append(self._history)
+
+    def flush(self) -> None:
+        """
+        Schreibt alle vorgemerkten Änderungen: zuerst das Manifest (maßgeblicher Stand),
+        dann die Aufgaben-Dateien, zuletzt die History
+        """
+        try:
+            task_files = self._prepare_task_files()
+            self._flush_manifest()
+            for task_id, content in task_files.items():
+                write_task_markdown(self.task_dir, task_id, content)
+            self._flush_history()
+        finally:
+            self.discard()
+
+
+if __name__ == '__main__':
+    # Test der gebündelten Aufgaben-Aktualisierung (ohne Schreiben)
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    from storage_backend import open_project_store
+
+    print("=== Task Batch Test ===")
+    batch = TaskBatch(open_project_store(project_root), os.path.join(project_root, 'tasks'),
+                      os.path.join(project_root, 'history'))
+    batch.set_status('task_001_setup', 'in_progress', 'AI_Agent_Prototype')
+    batch.set_status('task_001_setup', 'completed')
+    batch.log('AI_Agent_Prototype', 'TASK_STATUS_UPDATE', 'task_001_setup', 'Status gesetzt.')
+    batch.log('AI_Agent_Prototype', 'FILE_UPDATE', 'task_001_setup', 'Task-Datei aktualisiert.')
+    print(f"Vorgemerkte Felder: {batch._task_fields}")
+    print(f"History-Ereignisse: {[event['action_type'] for event in batch._history]}")
+    batch.discard()
+    print(f"Ausstehend nach discard: {batch.pending}")
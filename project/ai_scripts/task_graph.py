@@ -0,0 +1,266 @@
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Set, Tuple
+
+from task_index import index_value
+
+
+class TaskGraph:
+    """
+    Abhängigkeitsgraph der Aufgaben (Kante: Abhängigkeit -> abhängige Aufgabe)
+    Je Aufgabe werden gehalten:
+    - blocking: Anzahl nicht abgeschlossener Abhängigkeiten (0 = startbereit)
+    - critical_path: Länge der längsten Kette offener Aufgaben, die an ihr hängt (sie selbst eingeschlossen)
+    - fan_out: Anzahl nicht abgeschlossener Aufgaben, die direkt von ihr abhängen
+    Abschlüsse und Wiedereröffnungen werden inkrementell eingearbeitet (set_finished, sync); nur
+    geänderte Abhängigkeitslisten oder neue Aufgaben bauen den Graphen neu auf. Aufgaben in Zyklen
+    erhalten keinen kritischen Pfad und keine Ebene; unbekannte Abhängigkeiten blockieren nicht.
+    """
+
+    def __init__(self, tasks: Iterable[Mapping[str, Any]]):
+        self.rebuild(tasks)
+
+    @staticmethod
+    def _read(tasks: Iterable[Mapping[str, Any]]) -> Tuple[Dict[Any, List[Any]], Dict[Any, int]]:
+        """Abhängigkeiten und Anzahl nicht abgeschlossener Aufgaben je task_id"""
+        dependencies: Dict[Any, List[Any]] = {}
+        unfinished: Dict[Any, int] = {}
+        for task in tasks:
+            task_id = index_value(task.get('task_id'))
+            own = dependencies.setdefault(task_id, [])
+            for dep_id in task.get('dependencies') or ():
+                dep_id = index_value(dep_id)
+                if dep_id not in own:
+                    own.append(dep_id)
+            unfinished[task_id] = unfinished.get(task_id, 0) + (task.get('status') != 'completed')
+        return dependencies, unfinished
+
+    def rebuild(self, tasks: Iterable[Mapping[str, Any]]) -> None:
+        """Baut den Graphen und alle abgeleiteten Werte neu auf"""
+        self._build(*self._read(tasks))
+
+    def _build(self, raw_dependencies: Dict[Any, List[Any]], unfinished: Dict[Any, int]) -> None:
+        """Baut Kanten, Zyklen und abgeleitete Werte aus den gelesenen Abhängigkeiten auf"""
+        self._raw_dependencies = raw_dependencies
+        self._unfinished = unfinished
+        # Nur Kanten zwischen bekannten Aufgaben; unbekannte Abhängigkeiten getrennt
+        self.dependencies: Dict[Any, List[Any]] = {}
+        self.dependents: Dict[Any, List[Any]] = {task_id: [] for task_id in raw_dependencies}
+        self.missing: Dict[Any, List[Any]] = {}
+        for task_id, dep_ids in raw_dependencies.items():
+            known = [dep_id for dep_id in dep_ids if dep_id in self.dependents]
+            self.dependencies[task_id] = known
+            for dep_id in known:
+                self.dependents[dep_id].append(task_id)
+            if len(known) < len(dep_ids):
+                self.missing[task_id] = [dep_id for dep_id in dep_ids if dep_id not in self.dependents]
+
+        # Tarjan nur, wenn Kahn nicht alle Aufgaben ordnen kann (Zyklen und alles dahinter)
+        self.cyclic: Set[Any] = set()
+        order = self._topological_order()
+        if len(order) < len(self.dependencies):
+            self.cyclic = {task_id for cycle in self._cycles_among(set(self.dependencies) - set(order))
+                           for task_id in cycle}
+            order = self._topological_order()
+        self.blocking = {task_id: sum(1 for dep_id in self.dependencies[task_id] if self.is_unfinished(dep_id))
+                         for task_id in self.dependencies}
+        self.fan_out = {task_id: sum(1 for child in self.dependents[task_id] if self.is_unfinished(child))
+                        for task_id in self.dependents}
+        self.critical_path = {task_id: 0 for task_id in self.dependencies}
+        for task_id in reversed(order):
+            self.critical_path[task_id] = self._path_length(task_id)
+        # IDs, deren rank() sich seit dem Aufbau bzw. take_rank_changes geändert hat
+        self._rank_changes: Set[Any] = set()
+
+    def is_unfinished(self, task_id: Any) -> bool:
+        """True, wenn mindestens eine Aufgabe mit dieser ID nicht abgeschlossen ist"""
+        return self._unfinished.get(task_id, 0) > 0
+
+    def is_ready(self, task_id: Any) -> bool:
+        """Offen, nicht in einem Zyklus und ohne offene Abhängigkeiten"""
+        return self.is_unfinished(task_id) and task_id not in self.cyclic and self.blocking.get(task_id) == 0
+
+    def _path_length(self, task_id: Any) -> int:
+        """Kritischer Pfad einer Aufgabe aus den Werten ihrer abhängigen Aufgaben"""
+        if task_id in self.cyclic or not self.is_unfinished(task_id):
+            return 0
+        return 1 + max((self.critical_path[child] for child in self.dependents[task_id]), default=0)
+
+    def _topological_order(self) -> List[Any]:
+        """Topologische Reihenfolge (Kahn); Aufgaben in oder hinter nicht erkannten Zyklen fehlen"""
+        in_degree = {task_id: 0 for task_id in self.dependencies if task_id not in self.cyclic}
+        for task_id in in_degree:
+            for dep_id in self.dependencies[task_id]:
+                if dep_id not in self.cyclic:
+                    in_degree[task_id] += 1
+        order = [task_id for task_id, degree in in_degree.items() if degree == 0]
+        for task_id in order:
+            for child in self.dependents[task_id]:
+                if child in in_degree:
+                    in_degree[child] -= 1
+                    if in_degree[child] == 0:
+                        order.append(child)
+        return order
+
+    def cycles(self) -> List[List[Any]]:
+        """Zyklen als stark zusammenhängende Komponenten (Tarjan, iterativ); Selbstabhängigkeiten eingeschlossen"""
+        return self._cycles_among(self.cyclic)
+
+    def _cycles_among(self, candidates: Set[Any]) -> List[List[Any]]:
+        """Tarjan ausgehend von den Kandidaten; Zyklen ohne Kandidaten werden nicht gefunden"""
+        index: Dict[Any, int] = {}
+        lowlink: Dict[Any, int] = {}
+        stack: List[Any] = []
+        on_stack: Set[Any] = set()
+        cycles = []
+        for root in self.dependencies:
+            if root not in candidates or root in index:
+                continue
+            work = [(root, iter(self.dependents[root]))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.dependents[child])))
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.dependencies[node]:
+                        cycles.append(component[::-1])
+        return cycles
+
+    def layers(self) -> List[List[Any]]:
+        """
+        Topologische Ebenen der offenen Aufgaben: Ebene 0 ist sofort startbereit, Ebene n hängt
+        höchstens von Ebenen < n ab; Aufgaben in oder hinter Zyklen fehlen
+        """
+        layer_of: Dict[Any, int] = {}
+        layers: List[List[Any]] = []
+        for task_id in self._topological_order():
+            if not self.is_unfinished(task_id) or task_id in self.cyclic:
+                continue
+            layer = 0
+            for dep_id in self.dependencies[task_id]:
+                if not self.is_unfinished(dep_id):
+                    continue
+                if dep_id not in layer_of:
+                    break
+                layer = max(layer, layer_of[dep_id] + 1)
+            else:
+                layer_of[task_id] = layer
+                if layer == len(layers):
+                    layers.append([])
+                layers[layer].append(task_id)
+        return layers
+
+    def downstream(self, task_id: Any) -> int:
+        """Anzahl aller offenen Aufgaben, die direkt oder indirekt von der Aufgabe abhängen"""
+        seen = {task_id}
+        pending = [task_id]
+        while pending:
+            for child in self.dependents.get(pending.pop(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    pending.append(child)
+        return sum(1 for child in seen if child != task_id and self.is_unfinished(child))
+
+    def rank(self, task_id: Any) -> Tuple[int, int]:
+        """(kritischer Pfad, fan_out) einer Aufgabe, z.B. als Sortierschlüssel; unbekannte IDs (0, 0)"""
+        task_id = index_value(task_id)
+        return self.critical_path.get(task_id, 0), self.fan_out.get(task_id, 0)
+
+    def take_rank_changes(self) -> Set[Any]:
+        """IDs mit inkrementell geändertem rank() seit dem letzten Aufruf (ein Neuaufbau setzt zurück)"""
+        changes, self._rank_changes = self._rank_changes, set()
+        return changes
+
+    def set_finished(self, task_id: Any, finished: bool = True) -> List[Any]:
+        """
+        Markiert alle Aufgaben einer ID als abgeschlossen (bzw. wieder offen) und aktualisiert
+        blocking, fan_out und kritische Pfade inkrementell
+        Gibt die dadurch startbereit gewordenen Aufgaben zurück (bei Wiedereröffnung ggf. sie selbst)
+        """
+        task_id = index_value(task_id)
+        if task_id not in self.dependencies or self.is_unfinished(task_id) != finished:
+            return []
+        self._unfinished[task_id] = 0 if finished else 1
+        return self._apply_change(task_id)
+
+    def _apply_change(self, task_id: Any) -> List[Any]:
+        """Arbeitet den geänderten Abschlussstatus einer ID in die abgeleiteten Werte ein"""
+        step = -1 if not self.is_unfinished(task_id) else 1
+        # Eine wieder geöffnete Aufgabe ohne offene Abhängigkeiten ist selbst startbereit
+        ready = [task_id] if step > 0 and self.is_ready(task_id) else []
+        for child in self.dependents[task_id]:
+            self.blocking[child] += step
+            if step < 0 and self.is_ready(child):
+                ready.append(child)
+        for dep_id in self.dependencies[task_id]:
+            self.fan_out[dep_id] += step
+            self._rank_changes.add(dep_id)
+
+        # Kritische Pfade ändern sich nur für die Aufgabe selbst und ihre Vorgänger
+        pending = [task_id]
+        while pending:
+            node = pending.pop()
+            length = self._path_length(node)
+            if length != self.critical_path[node]:
+                self.critical_path[node] = length
+                self._rank_changes.add(node)
+                pending.extend(self.dependencies[node])
+        return ready
+
+    def sync(self, tasks: Iterable[Mapping[str, Any]]) -> List[Any]:
+        """
+        Gleicht den Graphen mit der aktuellen Aufgabenliste ab
+        Geänderte Abschlussstatus werden inkrementell eingearbeitet; neue, entfernte Aufgaben oder
+        geänderte Abhängigkeiten bauen den Graphen neu auf. Gibt neu startbereite Aufgaben zurück
+        (nach einem Neuaufbau alle startbereiten).
+        """
+        raw_dependencies, unfinished = self._read(tasks)
+        if raw_dependencies != self._raw_dependencies:
+            self._build(raw_dependencies, unfinished)
+            return [task_id for task_id in self.dependencies if self.is_ready(task_id)]
+
+        ready = []
+        for task_id, count in unfinished.items():
+            previous = self._unfinished[task_id]
+            self._unfinished[task_id] = count
+            if (previous > 0) != (count > 0):
+                ready.extend(self._apply_change(task_id))
+        return [task_id for task_id in ready if self.is_ready(task_id)]
+
+
+if __name__ == '__main__':
+    # Test des Abhängigkeitsgraphen mit den Aufgaben des Projekts
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    from storage_backend import open_project_store
+
+    print("=== Task Graph Test ===")
+    store = open_project_store(project_root)
+    graph = TaskGraph(store.iter_tasks())
+    print(f"Aufgaben: {len(graph.dependencies)}, Zyklen: {graph.cycles()}, fehlende Abhängigkeiten: {graph.missing}")
+    for number, layer in enumerate(graph.layers()):
+        print(f"Ebene {number}: {', '.join(map(str, layer))}")
+    for task_id in graph.dependencies:
+        critical_path, fan_out = graph.rank(task_id)
+        print(f"- {task_id}: kritischer Pfad {critical_path}, fan_out {fan_out}, "
+              f"nachgelagert {graph.downstream(task_id)}, startbereit: {graph.is_ready(task_id)}")
@@ -0,0 +1,130 @@
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Set
+
+# Mindestlänge des Änderungsprotokolls (ansonsten so viele Einträge, wie es Aufgaben gibt)
+CHANGE_LOG_MIN = 1024
+
+
+def index_value(value: Any) -> Any:
+    """Schlüssel eines Feldwerts im Index; nicht hashbare Werte (Listen, Dicts) über ihre Repräsentation"""
+    return value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+
+
+class TaskIndex:
+    """
+    In-Memory-Index über manifest['tasks']
+    Ermöglicht Lookups nach task_id, status, assigned_team und assigned_ai ohne lineare Suche
+    Angehängte und geänderte Positionen werden zusätzlich protokolliert (changes_since), damit
+    abgeleitete Strukturen nur geänderte Aufgaben neu lesen müssen
+    """
+
+    INDEXED_FIELDS = ('task_id', 'status', 'assigned_team', 'assigned_ai')
+
+    def __init__(self, tasks: Sequence[Dict[str, Any]]):
+        self.tasks = tasks
+        self._positions: Dict[str, Dict[Any, Set[int]]] = {}
+        self._values: List[Dict[str, Any]] = []
+        self._changes: List[int] = []
+        self._changes_start = 0
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Baut alle Indizes aus der Aufgabenliste neu auf (bisherige Protokoll-Stände werden ungültig)"""
+        self._positions = {field: defaultdict(set) for field in self.INDEXED_FIELDS}
+        self._values = []
+        self.sync_appended()
+        self._changes_start = self.change_count + 1
+        self._changes = []
+
+    @property
+    def change_count(self) -> int:
+        """Anzahl der bisher protokollierten Änderungen (Stand für changes_since)"""
+        return self._changes_start + len(self._changes)
+
+    def changes_since(self, count: int) -> Optional[List[int]]:
+        """
+        Seit dem Stand count angehängte oder geänderte Positionen (mit Wiederholungen)
+        None, wenn das Protokoll diesen Stand nicht mehr enthält; dann muss neu gelesen werden
+        """
+        if count < self._changes_start or count > self.change_count:
+            return None
+        return self._changes[count - self._changes_start:]
+
+    def _record_change(self, position: int) -> None:
+        """Protokolliert eine Position; ältere Hälfte wird verworfen, wenn das Protokoll zu lang wird"""
+        self._changes.append(position)
+        if len(self._changes) > max(CHANGE_LOG_MIN, len(self.tasks)):
+            dropped = len(self._changes) // 2
+            del self._changes[:dropped]
+            self._changes_start += dropped
+
+    def sync_appended(self) -> None:
+        """Indiziert Aufgaben, die seit dem letzten Aufruf an die Liste angehängt wurden"""
+        for position in range(len(self._values), len(self.tasks)):
+            values = self._extract(self.tasks[position])
+            self._values.append(values)
+            for field, value in values.items():
+                self._positions[field][value].add(position)
+            self._record_change(position)
+
+    def reindex(self, position: int) -> None:
+        """Aktualisiert die Indizes einer geänderten Aufgabe"""
+        old_values = self._values[position]
+        new_values = self._extract(self.tasks[position])
+
+        for field in self.INDEXED_FIELDS:
+            if old_values[field] != new_values[field]:
+                positions = self._positions[field][old_values[field]]
+                positions.discard(position)
+                if not positions:
+                    del self._positions[field][old_values[field]]
+                self._positions[field][new_values[field]].add(position)
+
+        self._values[position] = new_values
+        self._record_change(position)
+
+    def _extract(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Liest die indizierten Felder einer Aufgabe (fehlende Felder als None)"""
+        return {field: index_value(task.get(field)) for field in self.INDEXED_FIELDS}
+
+    def positions(self, field: str, value: Any) -> List[int]:
+        """Positionen aller Aufgaben mit field == value (in Manifest-Reihenfolge)"""
+        return sorted(self._positions[field].get(value, ()))
+
+    def find(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """Alle Aufgaben mit field == value (in Manifest-Reihenfolge)"""
+        return [self.tasks[position] for position in self.positions(field, value)]
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Aufgabe mit der gegebenen task_id oder None"""
+        position = self.position(task_id)
+        return self.tasks[position] if position is not None else None
+
+    def position(self, task_id: str) -> Optional[int]:
+        """Position der (ersten) Aufgabe mit der gegebenen task_id oder None"""
+        positions = self._positions['task_id'].get(task_id)
+        return min(positions) if positions else None
+
+    def count(self, field: str, value: Any, **filters: Any) -> int:
+        """Anzahl der Aufgaben mit field == value, optional mit weiteren Feldfiltern"""
+        positions = self._positions[field].get(value, set())
+        for filter_field, filter_value in filters.items():
+            other = self._positions[filter_field].get(filter_value, set())
+            positions = positions & other if len(positions) <= len(other) else other & positions
+        return len(positions)
+
+    def values(self, field: str) -> Iterable[Any]:
+        """Alle vorkommenden Werte eines indizierten Feldes"""
+        return self._positions[field].keys()
+
+    def by_status(self, status: str) -> List[Dict[str, Any]]:
+        """Alle Aufgaben mit dem gegebenen Status"""
+        return self.find('status', status)
+
+    def by_team(self, team: str) -> List[Dict[str, Any]]:
+        """Alle Aufgaben des gegebenen Teams"""
+        return self.find('assigned_team', team)
+
+    def by_ai(self, ai_name: str) -> List[Dict[str, Any]]:
+        """Alle Aufgaben, die der gegebenen KI zugewiesen sind"""
+        return self.find('assigned_ai', ai_name)
@@ -1,27 +1,22 @@
-import json
 import os
 
+from storage_backend import open_project_store
+
 class TaskManager:
     def __init__(self, project_root):
         self.project_root = project_root
         self.manifest_path = os.path.join(project_root, 'project_manifest.json')
         self.tasks_dir = os.path.join(project_root, 'tasks')
+        self.manifest_store = open_project_store(project_root)
 
     def load_manifest(self):
-        with open(self.manifest_path, 'r') as f:
-            return json.load(f)
+        return self.manifest_store.load()
 
     def save_manifest(self, manifest):
-        with open(self.manifest_path, 'w') as f:
-            json.dump(manifest, f, indent=2)
+        self.manifest_store.save(manifest)
 
     def get_available_tasks(self):
-        manifest = self.load_manifest()
-        available_tasks = []
-        for task in manifest.get('tasks', []):
-            if task.get('status') == 'open':
-                available_tasks.append(task)
-        return available_tasks
+        return list(self.manifest_store.iter_tasks(status='open'))
 
     def prioritize_tasks(self, tasks):
         # Simple prioritization logic: prioritize tasks with 'high' urgency first
@@ -31,17 +26,13 @@ class TaskManager:
         return prioritized_tasks
 
     def assign_task(self, task_id, ai_agent_id):
-        manifest = self.load_manifest()
-        for task in manifest.get('tasks', []):
-            if task.get('task_id') == task_id:
-                task['assigned_ai'] = ai_agent_id
-                task['status'] = 'assigned'
-                self.save_manifest(manifest)
-                return True
-        return False
+        if self.manifest_store.find_task(task_id) is None:
+            return False
+        self.manifest_store.update_task(task_id, {'assigned_ai': ai_agent_id, 'status': 'assigned'})
+        return True
 
     def distribute_tasks(self):
-        manifest = self.load_manifest()
+        manifest = self.manifest_store.view()
         available_tasks = self.get_available_tasks()
         prioritized_tasks = self.prioritize_tasks(available_tasks)
 
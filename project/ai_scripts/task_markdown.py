@@ -0,0 +1,77 @@
+import os
+import re
+from typing import Any, Dict, Mapping, Optional
+
+
+# Kopfzeilen der Aufgaben-Markdown-Dateien (siehe tasks/task_template.md) und ihre Manifest-Felder
+HEADER_FIELDS = {
+    'status': 'Status',
+    'assigned_ai': 'Zugewiesen an',
+    'due_date': 'Fälligkeitsdatum',
+    'completed_date': 'Abgeschlossen am',
+}
+
+_HEADER_PATTERNS = {
+    field: re.compile(r'^(\*\*' + re.escape(label) + r':\*\*)[ \t]*(.*)$', re.MULTILINE)
+    for field, label in HEADER_FIELDS.items()
+}
+
+
+def task_markdown_path(task_dir: str, task_id: str) -> str:
+    """Pfad der Markdown-Datei einer Aufgabe"""
+    return os.path.join(task_dir, f'{task_id}.md')
+
+
+def read_task_markdown(task_dir: str, task_id: str) -> str:
+    """Liest die Markdown-Datei einer Aufgabe"""
+    with open(task_markdown_path(task_dir, task_id), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def write_task_markdown(task_dir: str, task_id: str, content: str) -> None:
+    """Schreibt die Markdown-Datei einer Aufgabe"""
+    with open(task_markdown_path(task_dir, task_id), 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def apply_task_header(content: str, task: Mapping[str, Any]) -> str:
+    """Überträgt Status, Zuweisung und Daten einer Aufgabe in die Kopfzeilen des Markdowns"""
+    for field, pattern in _HEADER_PATTERNS.items():
+        if field not in task:
+            continue
+        value = task[field]
+        text = '' if value is None else str(value)
+        content = pattern.sub(lambda match: f'{match.group(1)} {text}', content, count=1)
+    return content
+
+
+def sync_task_markdown(task_dir: Optional[str], task: Mapping[str, Any]) -> bool:
+    """
+    Hält die Kopfzeilen einer vorhandenen Aufgaben-Datei mit dem Manifest-Eintrag synchron
+    Gibt True zurück, wenn die Datei geändert wurde
+    """
+    task_id = task.get('task_id')
+    if not task_dir or not task_id:
+        return False
+    try:
+        content = read_task_markdown(task_dir, task_id)
+    except FileNotFoundError:
+        return False
+
+    updated = apply_task_header(content, task)
+    if updated == content:
+        return False
+    write_task_markdown(task_dir, task_id, updated)
+    return True
+
+
+if __name__ == '__main__':
+    # Test der Kopfzeilen-Synchronisation
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    task_dir = os.path.join(project_root, 'tasks')
+
+    print("=== Task Markdown Test ===")
+    content = read_task_markdown(task_dir, 'task_template')
+    sample: Dict[str, Any] = {'status': 'in_progress', 'assigned_ai': 'AI_Agent_Prototype', 'completed_date': None}
+    for line in apply_task_header(content, sample).splitlines()[:8]:
+        print(line)
@@ -0,0 +1,252 @@
+import asyncio
+import inspect
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+from history_log import get_history_writer
+from task_batch import TaskBatch
+
+# Handler: handler(task, batch, ai_name), auch als Coroutine; alle Änderungen laufen über den TaskBatch
+TaskHandler = Callable[[Mapping[str, Any], TaskBatch, str], Any]
+
+_TASK_ID_PATTERN = re.compile(r'^task_\d+_(.+)$')
+
+
+def task_type(task: Mapping[str, Any]) -> str:
+    """
+    Typ einer Aufgabe: Feld 'task_type', sonst der Namensteil der Task-ID
+    (task_001_setup -> setup)
+    """
+    if task.get('task_type'):
+        return task['task_type']
+    task_id = task.get('task_id', '')
+    match = _TASK_ID_PATTERN.match(task_id)
+    return match.group(1) if match else task_id
+
+
+class TaskHandlerRegistry:
+    """
+    Zuordnung Aufgabentyp -> Handler
+
+    registry = TaskHandlerRegistry()
+
+    @registry.register('setup')
+    def handle_setup(task, batch, ai_name):
+        batch.set_status(task['task_id'], 'completed')
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, TaskHandler] = {}
+
+    def register(self, type_name: str, handler: Optional[TaskHandler] = None):
+        """Registriert einen Handler; ohne handler als Dekorator verwendbar"""
+        if handler is None:
+            def decorator(function: TaskHandler) -> TaskHandler:
+                self.register(type_name, function)
+                return function
+            return decorator
+        if type_name in self._handlers:
+            raise ValueError(f"Für Aufgabentyp '{type_name}' ist bereits ein Handler registriert")
+        self._handlers[type_name] = handler
+        return handler
+
+    def unregister(self, type_name: str) -> None:
+        """Entfernt den Handler eines Aufgabentyps"""
+        self._handlers.pop(type_name, None)
+
+    def get(self, type_name: str) -> Optional[TaskHandler]:
+        """Handler eines Aufgabentyps oder None"""
+        return self._handlers.get(type_name)
+
+    def handler_for(self, task: Mapping[str, Any]) -> Optional[TaskHandler]:
+        """Handler für eine Aufgabe oder None"""
+        return self._handlers.get(task_type(task))
+
+    def task_types(self) -> List[str]:
+        """Alle registrierten Aufgabentypen"""
+        return sorted(self._handlers)
+
+    def __contains__(self, type_name: str) -> bool:
+        return type_name in self._handlers
+
+
+# Prozessweite Standard-Registry für main.py und weitere Handler-Module
+default_registry = TaskHandlerRegistry()
+register_task_handler = default_registry.register
+
+
+class TaskWorker:
+    """
+    Langlaufende Arbeitsschleife eines KI-Agenten
+    Holt fortlaufend offene Aufgaben mit registriertem Handler aus dem Store, führt jede in
+    einem eigenen TaskBatch aus und prüft vor jeder Aufgabe Kill-Switch und Kill-Keyword.
+    Interpreterstart und Manifest-Cache werden so über beliebig viele Aufgaben geteilt.
+    """
+
+    def __init__(self, store, ai_name: str, registry: Optional[TaskHandlerRegistry] = None,
+                 task_dir: Optional[str] = None, history_dir: Optional[str] = None,
+                 input_source: Optional[Callable[[], str]] = None, poll_interval: float = 1.0):
+        self.store = store
+        self.ai_name = ai_name
+        self.registry = registry if registry is not None else default_registry
+        self.task_dir = task_dir
+        self.history_dir = history_dir
+        self.input_source = input_source
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self.failed = 0
+        self.stop_reason: Optional[str] = None
+        self._skipped: Set[str] = set()
+        self._unknown: Set[str] = set()
+
+    def log_action(self, action_type: str, affected_item: str, description: str, output: str = '') -> None:
+        """Reiht einen einzelnen History-Eintrag außerhalb eines Batches ein"""
+        if not self.history_dir:
+            return
+        get_history_writer(self.history_dir).log(self.ai_name, action_type, affected_item, description, output)
+
+    def flush_history(self) -> None:
+        """Wartet, bis alle eingereihten History-Einträge geschrieben sind"""
+        if self.history_dir:
+            get_history_writer(self.history_dir).flush()
+
+    def check_stop(self) -> Optional[Tuple[str, str]]:
+        """
+        Prüft Kill-Switch und Kill-Keyword
+        Gibt (betroffenes Element, Beschreibung) zurück, wenn die Arbeit eingestellt werden muss
+        """
+        if self.store.get_field('kill_switch', False):
+            return 'Kill-Switch', 'Arbeit aufgrund des aktivierten Kill-Switches eingestellt.'
+
+        kill_keyword = self.store.get_field('kill_keyword', '')
+        if kill_keyword and self.input_source is not None:
+            message = self.input_source() or ''
+            if kill_keyword in message:
+                return 'Kill-Keyword', f"Arbeit aufgrund des erkannten Kill-Keywords '{kill_keyword}' eingestellt."
+        return None
+
+    def stop(self, affected_item: str, description: str) -> None:
+        """Stellt die Arbeit ein und protokolliert den Grund"""
+        self.stop_reason = affected_item
+        print(f"{affected_item} erkannt. KI {self.ai_name} stoppt die Arbeit.")
+        self.log_action('PROJECT_STOP', affected_item, description)
+        self.flush_history()
+
+    def next_task(self) -> Optional[Mapping[str, Any]]:
+        """Nächste offene Aufgabe mit registriertem Handler (unbekannte Typen werden übersprungen)"""
+        for task in self.store.iter_tasks(status='open'):
+            task_id = task.get('task_id')
+            if task_id in self._skipped:
+                continue
+            if self.registry.handler_for(task) is None:
+                if task_id not in self._unknown:
+                    print(f"Unbekannte Aufgabe: {task_id}. Überspringe.")
+                    self._unknown.add(task_id)
+                continue
+            return task
+        return None
+
+    @property
+    def unknown_count(self) -> int:
+        """Anzahl der offenen Aufgaben, die mangels registriertem Handler übersprungen wurden"""
+        return len(self._unknown)
+
+    def reset_skipped(self) -> None:
+        """Gibt fehlgeschlagene bzw. unverändert offene Aufgaben für einen neuen Versuch frei"""
+        self._skipped.clear()
+
+    def claim(self, task: Mapping[str, Any]) -> Optional[Mapping[str, Any]]:
+        """Übernimmt eine Aufgabe vor der Bearbeitung; None, wenn ein anderer Worker schneller war"""
+        return task
+
+    def finish_batch(self, task: Mapping[str, Any], batch: TaskBatch) -> None:
+        """Ergänzt den Batch einer Aufgabe nach ihrem Handler (z.B. Freigabe einer Lease)"""
+
+    def process(self, task: Mapping[str, Any]) -> bool:
+        """
+        Führt den Handler einer Aufgabe in einem TaskBatch aus
+        Schlägt der Handler fehl, wird nichts geschrieben, der Fehler protokolliert und die
+        Aufgabe für diesen Lauf übersprungen
+        """
+        task_id = task['task_id']
+        handler = self.registry.handler_for(task)
+        try:
+            with TaskBatch(self.store, self.task_dir, self.history_dir) as batch:
+                result = handler(task, batch, self.ai_name)
+                if inspect.isawaitable(result):
+                    # Coroutine-Handler (siehe async_orchestrator) laufen hier synchron
+                    asyncio.run(result)
+                self.finish_batch(task, batch)
+        except Exception as e:
+            self.record_failure(task_id, e)
+            return False
+
+        self.record_success(task_id)
+        return True
+
+    def record_failure(self, task_id: str, error: Exception) -> None:
+        """Protokolliert einen fehlgeschlagenen Handler; die Aufgabe wird für diesen Lauf übersprungen"""
+        print(f"Fehler bei {task_id}: {error}")
+        self.log_action('TASK_ERROR', task_id, f"Bearbeitung von {task_id} fehlgeschlagen.", repr(error))
+        self._skipped.add(task_id)
+        self.failed += 1
+
+    def record_success(self, task_id: str) -> None:
+        """Zählt eine abgeschlossene Aufgabe"""
+        print(f"KI {self.ai_name} hat {task_id} erfolgreich abgeschlossen.")
+
+        # Handler, die den Status nicht ändern, würden sonst sofort erneut ausgewählt
+        current = self.store.find_task(task_id)
+        if current is not None and current.get('status') == 'open':
+            self._skipped.add(task_id)
+        self.processed += 1
+
+    def run(self, max_tasks: Optional[int] = None, follow: bool = False) -> int:
+        """
+        Bearbeitet offene Aufgaben, bis keine mehr vorliegt (follow=False), max_tasks erreicht ist
+        oder Kill-Switch bzw. Kill-Keyword greifen; mit follow=True wird auf neue Aufgaben gewartet
+        Gibt die Anzahl der bearbeiteten Aufgaben zurück
+        """
+        start = self.processed
+        try:
+            while max_tasks is None or self.processed - start < max_tasks:
+                stop = self.check_stop()
+                if stop is not None:
+                    self.stop(*stop)
+                    break
+
+                task = self.next_task()
+                if task is None:
+                    if not follow:
+                        break
+                    time.sleep(self.poll_interval)
+                    # Fehlgeschlagene Aufgaben erneut versuchen: die Ursache könnte inzwischen behoben sein
+                    self.reset_skipped()
+                    continue
+
+                claimed = self.claim(task)
+                if claimed is not None:
+                    self.process(claimed)
+        finally:
+            self.flush_history()
+        return self.processed - start
+
+
+if __name__ == '__main__':
+    # Test der Handler-Registry (ohne Schreiben)
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    from storage_backend import open_project_store
+
+    store = open_project_store(project_root)
+    registry = TaskHandlerRegistry()
+    registry.register('setup', lambda task, batch, ai_name: None)
+
+    print("=== Task Worker Test ===")
+    print(f"Registrierte Typen: {registry.task_types()}")
+    for task in store.iter_tasks():
+        print(f"- {task['task_id']} ({task['status']}): Typ '{task_type(task)}', "
+              f"Handler: {'ja' if registry.handler_for(task) else 'nein'}")
+    worker = TaskWorker(store, 'AI_Agent_Prototype', registry)
+    print(f"Stopp-Bedingung: {worker.check_stop()}")
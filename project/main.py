@@ -1,135 +1,152 @@
-import json
+import argparse
+import asyncio
 import os
+import sys
 from datetime import datetime
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 PROJECT_MANIFEST_PATH = os.path.join(PROJECT_ROOT, 'project_manifest.json')
+TASKS_DIR = os.path.join(PROJECT_ROOT, 'tasks')
+HISTORY_DIR = os.path.join(PROJECT_ROOT, 'history')
+
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'ai_scripts'))
+from manifest_store import run_transaction
+from storage_backend import open_project_store
+from history_log import get_history_writer
+from task_batch import task_status_fields, timestamp_now
+from task_markdown import read_task_markdown, write_task_markdown
+from task_worker import TaskWorker, register_task_handler
+from agent_pool import AgentPool, format_pool_report
+from async_orchestrator import AsyncOrchestrator
+
+manifest_store = open_project_store(PROJECT_ROOT)
+
+# Simulate checking for kill keyword in a hypothetical input
+def hypothetical_input():
+    """Liefert die zuletzt empfangene Nachricht, in der nach dem Kill-Keyword gesucht wird."""
+    # Uncomment the line below to test the kill keyword functionality
+    # return f"Urgent: {manifest_store.get_field('kill_keyword', '')} - Stop all operations!"
+    return "This is a normal message. No kill keyword here."
 
 def read_project_manifest():
     """Liest das project_manifest.json und gibt es als Dictionary zurück."""
-    with open(PROJECT_MANIFEST_PATH, 'r') as f:
-        return json.load(f)
+    return manifest_store.load()
 
 def write_project_manifest(data):
     """Schreibt das gegebene Dictionary in project_manifest.json."""
-    data['last_updated'] = datetime.now().isoformat(timespec='seconds') + 'Z'
-    with open(PROJECT_MANIFEST_PATH, 'w') as f:
-        json.dump(data, f, indent=2)
+    data['last_updated'] = timestamp_now()
+    manifest_store.save(data)
 
 def log_action(ai_name, action_type, affected_item, description, output=''):
-    """Protokolliert eine Aktion im history-Verzeichnis."""
-    timestamp = datetime.now().isoformat(timespec='seconds') + 'Z'
-    log_filename = f"{timestamp.replace(':', '-')}_{ai_name}_{affected_item.replace('/', '-')}.log"
-    log_filepath = os.path.join(PROJECT_ROOT, 'history', log_filename)
-
-    log_entry = f"{timestamp} - {ai_name} - {action_type} - {affected_item}\n"
-    log_entry += f"Beschreibung: {description}\n"
-    log_entry += f"Output: {output}\n\n"
-
-    with open(log_filepath, 'a') as f:
-        f.write(log_entry)
+    """Protokolliert eine Aktion im Ereignisstrom des history-Verzeichnisses (gepuffert)."""
+    get_history_writer(HISTORY_DIR).log(ai_name, action_type, affected_item, description, output)
 
 def read_task_file(task_id):
     """Liest eine Aufgaben-Datei und gibt ihren Inhalt zurück."""
-    task_filepath = os.path.join(PROJECT_ROOT, 'tasks', f'{task_id}.md')
-    with open(task_filepath, 'r') as f:
-        return f.read()
+    return read_task_markdown(TASKS_DIR, task_id)
 
 def write_task_file(task_id, content):
     """Schreibt den gegebenen Inhalt in eine Aufgaben-Datei."""
-    task_filepath = os.path.join(PROJECT_ROOT, 'tasks', f'{task_id}.md')
-    with open(task_filepath, 'w') as f:
-        f.write(content)
+    write_task_markdown(TASKS_DIR, task_id, content)
 
 def update_task_status_in_manifest(manifest, task_id, new_status, ai_name=None):
     """Aktualisiert den Status einer Aufgabe im Projekt-Manifest."""
     for task in manifest['tasks']:
         if task['task_id'] == task_id:
-            task['status'] = new_status
-            if new_status == 'in_progress' and ai_name:
-                task['assigned_ai'] = ai_name
-            elif new_status == 'completed':
-                task['completed_date'] = datetime.now().strftime('%Y-%m-%d')
+            task.update(task_status_fields(new_status, ai_name))
             break
     return manifest
 
-def process_task_001(ai_name):
-    """Simuliert die Bearbeitung von task_001_setup."""
-    task_id = 'task_001_setup'
-    print(f"KI {ai_name} beginnt mit der Bearbeitung von {task_id}.")
+def create_worker(ai_name):
+    """Erzeugt die Arbeitsschleife einer KI über alle registrierten Task-Handler."""
+    return TaskWorker(manifest_store, ai_name, task_dir=TASKS_DIR, history_dir=HISTORY_DIR,
+                      input_source=hypothetical_input)
 
-    # 1. Manifest lesen
-    manifest = read_project_manifest()
-    if manifest.get('kill_switch', False):
-        print(f"Kill-Switch ist aktiviert. KI {ai_name} stoppt die Arbeit.")
-        log_action(ai_name, 'PROJECT_STOP', 'Kill-Switch', 'Arbeit aufgrund des aktivierten Kill-Switches eingestellt.')
-        return
-    
-    # Simulate checking for kill keyword in a hypothetical input
-    kill_keyword = manifest.get('kill_keyword', '')
-    hypothetical_input = "This is a normal message. No kill keyword here."
-    # Uncomment the line below to test the kill keyword functionality
-    # hypothetical_input = f"Urgent: {kill_keyword} - Stop all operations!"
+def idle_message(worker):
+    """Meldung, wenn ein Lauf keine Aufgabe bearbeitet hat; nennt übersprungene unbekannte Typen."""
+    if worker.unknown_count:
+        return f"Keine offenen Aufgaben mit registriertem Handler ({worker.unknown_count} ohne Handler übersprungen)."
+    return "Keine offenen Aufgaben gefunden."
 
-    if kill_keyword and kill_keyword in hypothetical_input:
-        print(f"Kill-Keyword '{kill_keyword}' erkannt. KI {ai_name} stoppt die Arbeit.")
-        log_action(ai_name, 'PROJECT_STOP', 'Kill-Keyword', f"Arbeit aufgrund des erkannten Kill-Keywords '{kill_keyword}' eingestellt.")
+def process_task_001(ai_name):
+    """Simuliert die Bearbeitung von task_001_setup."""
+    worker = create_worker(ai_name)
+    stop = worker.check_stop()
+    if stop is not None:
+        worker.stop(*stop)
         return
+    task = manifest_store.find_task('task_001_setup')
+    if task is not None:
+        worker.process(task)
+
+def ensure_requirements_file(requirements_path):
+    """Legt requirements.txt an, falls sie fehlt; True, wenn die Datei neu erstellt wurde."""
+    if os.path.exists(requirements_path):
+        return False
+    with open(requirements_path, 'w') as f:
+        f.write('numpy\npandas\n') # Beispiel-Abhängigkeiten
+    return True
+
+@register_task_handler('setup')
+async def handle_setup_task(task, batch, ai_name):
+    """Handler für Setup-Aufgaben (task_001_setup): Verzeichnisse, requirements.txt, Abhängigkeiten."""
+    task_id = task['task_id']
+    print(f"KI {ai_name} beginnt mit der Bearbeitung von {task_id}.")
 
+    # Alle Änderungen laufen über den Batch des Workers und werden nach dem Handler einmal geschrieben
     # 2. Status in Manifest und Task-Datei auf 'in_progress' setzen
-    manifest = update_task_status_in_manifest(manifest, task_id, 'in_progress', ai_name)
-    write_project_manifest(manifest)
-    log_action(ai_name, 'TASK_STATUS_UPDATE', task_id, f"Status von {task_id} auf 'in_progress' gesetzt.")
-
-    task_content = read_task_file(task_id)
-    task_content = task_content.replace('**Status:** open', '**Status:** in_progress')
-    task_content = task_content.replace('**Zugewiesen an:** unassigned', f'**Zugewiesen an:** {ai_name}')
-    write_task_file(task_id, task_content)
-    log_action(ai_name, 'FILE_UPDATE', task_id, f"Task-Datei {task_id}.md aktualisiert: Status auf 'in_progress' und zugewiesene KI.")
+    batch.set_status(task_id, 'in_progress', ai_name)
+    batch.log(ai_name, 'TASK_STATUS_UPDATE', task_id, f"Status von {task_id} auf 'in_progress' gesetzt.")
+    batch.log(ai_name, 'FILE_UPDATE', task_id, f"Task-Datei {task_id}.md aktualisiert: Status auf 'in_progress' und zugewiesene KI.")
 
     # 3. Schritte ausführen (simuliert)
     print("Simuliere die Überprüfung der Verzeichnisse...")
-    log_action(ai_name, 'SIMULATED_ACTION', 'Verzeichnisprüfung', 'Überprüfung der erforderlichen Verzeichnisse abgeschlossen.')
+    batch.log(ai_name, 'SIMULATED_ACTION', 'Verzeichnisprüfung', 'Überprüfung der erforderlichen Verzeichnisse abgeschlossen.')
 
     print("Simuliere die Erstellung/Überprüfung von requirements.txt...")
     # Hier könnte eine echte Logik zur Erstellung/Überprüfung stehen
     requirements_path = os.path.join(PROJECT_ROOT, 'ai_scripts', 'requirements.txt')
-    if not os.path.exists(requirements_path):
-        with open(requirements_path, 'w') as f:
-            f.write('numpy\npandas\n') # Beispiel-Abhängigkeiten
-        log_action(ai_name, 'FILE_CREATE', 'ai_scripts/requirements.txt', 'requirements.txt erstellt.')
+    if await asyncio.to_thread(ensure_requirements_file, requirements_path):
+        batch.log(ai_name, 'FILE_CREATE', 'ai_scripts/requirements.txt', 'requirements.txt erstellt.')
     else:
-        log_action(ai_name, 'FILE_CHECK', 'ai_scripts/requirements.txt', 'requirements.txt existiert bereits.')
+        batch.log(ai_name, 'FILE_CHECK', 'ai_scripts/requirements.txt', 'requirements.txt existiert bereits.')
 
     print("Simuliere die Installation von Abhängigkeiten...")
     # In einem echten Szenario würde hier pip install -r requirements.txt ausgeführt
-    log_action(ai_name, 'SIMULATED_ACTION', 'Abhängigkeitsinstallation', 'Abhängigkeiten simuliert installiert.')
+    await asyncio.sleep(0)
+    batch.log(ai_name, 'SIMULATED_ACTION', 'Abhängigkeitsinstallation', 'Abhängigkeiten simuliert installiert.')
 
     # 4. Status in Manifest und Task-Datei auf 'completed' setzen
-    manifest = read_project_manifest()
-    manifest = update_task_status_in_manifest(manifest, task_id, 'completed')
-    write_project_manifest(manifest)
-    log_action(ai_name, 'TASK_STATUS_UPDATE', task_id, f"Status von {task_id} auf 'completed' gesetzt.")
+    batch.set_status(task_id, 'completed')
+    batch.log(ai_name, 'TASK_STATUS_UPDATE', task_id, f"Status von {task_id} auf 'completed' gesetzt.")
 
-    task_content = read_task_file(task_id)
-    task_content = task_content.replace('**Status:** in_progress', '**Status:** completed')
-    task_content = task_content.replace('- [ ] Überprüfen, ob alle erforderlichen Verzeichnisse vorhanden sind.', '- [x] Überprüfen, ob alle erforderlichen Verzeichnisse vorhanden sind.')
-    task_content = task_content.replace('- [ ] Eine `requirements.txt` Datei im `ai_scripts/` Verzeichnis erstellen, falls nicht vorhanden.', '- [x] Eine `requirements.txt` Datei im `ai_scripts/` Verzeichnis erstellen, falls nicht vorhanden.')
-    task_content = task_content.replace('- [ ] Die Abhängigkeiten aus der `requirements.txt` installieren.', '- [x] Die Abhängigkeiten aus der `requirements.txt` installieren.')
-    task_content = task_content.replace('- [ ] Den Status dieser Aufgabe auf `completed` setzen.', '- [x] Den Status dieser Aufgabe auf `completed` setzen.')
-    task_content += f"\n### {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {ai_name}\n- Aufgabe erfolgreich abgeschlossen.\n"
-    write_task_file(task_id, task_content)
-    log_action(ai_name, 'FILE_UPDATE', task_id, f"Task-Datei {task_id}.md aktualisiert: Status auf 'completed' und Schritte markiert.")
-
-    print(f"KI {ai_name} hat {task_id} erfolgreich abgeschlossen.")
+    for step in (
+        'Überprüfen, ob alle erforderlichen Verzeichnisse vorhanden sind.',
+        'Eine `requirements.txt` Datei im `ai_scripts/` Verzeichnis erstellen, falls nicht vorhanden.',
+        'Die Abhängigkeiten aus der `requirements.txt` installieren.',
+        'Den Status dieser Aufgabe auf `completed` setzen.',
+    ):
+        batch.replace_in_task_file(task_id, f'- [ ] {step}', f'- [x] {step}')
+    batch.append_to_task_file(task_id, f"\n### {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {ai_name}\n- Aufgabe erfolgreich abgeschlossen.\n")
+    batch.log(ai_name, 'FILE_UPDATE', task_id, f"Task-Datei {task_id}.md aktualisiert: Status auf 'completed' und Schritte markiert.")
 
 
 if __name__ == '__main__':
     ai_agent_name = 'AI_Agent_Prototype'
-    
+
+    # Argumente zuerst auswerten: --help und Fehleingaben dürfen das Manifest nicht verändern
+    parser = argparse.ArgumentParser(description='Arbeitsschleife eines KI-Agenten')
+    parser.add_argument('--follow', action='store_true', help='Auf neue Aufgaben warten statt nach der letzten zu beenden')
+    parser.add_argument('--max-tasks', type=int, default=None, help='Höchstens so viele Aufgaben bearbeiten (je Worker)')
+    parser.add_argument('--workers', type=int, default=1, help='Anzahl paralleler Worker-Prozesse (0 = alle CPU-Kerne)')
+    parser.add_argument('--concurrency', type=int, default=0,
+                        help='Aufgaben gleichzeitig im asyncio-Orchestrator bearbeiten (0 = synchrone Schleife)')
+    args = parser.parse_args()
+
     # Initiales Setup des project_manifest.json, falls noch keine tasks vorhanden sind
-    manifest = read_project_manifest()
-    if not manifest['tasks']:
+    def add_initial_task(manifest):
+        if manifest['tasks']:
+            return False
         manifest['tasks'].append({
             "task_id": "task_001_setup",
             "title": "Initiales Setup des Projektumfelds",
@@ -138,32 +155,25 @@ if __name__ == '__main__':
             "due_date": None,
             "completed_date": None
         })
-        write_project_manifest(manifest)
+        manifest['last_updated'] = timestamp_now()
+        return True
+
+    if run_transaction(manifest_store, add_initial_task):
         print("project_manifest.json mit initialer Aufgabe aktualisiert.")
 
-    # KI-Logik: Nächste offene Aufgabe finden und bearbeiten
-    manifest = read_project_manifest()
-    if manifest.get('kill_switch', False):
-        print(f"Kill-Switch ist aktiviert. KI {ai_agent_name} stoppt die Arbeit.")
-        log_action(ai_agent_name, 'PROJECT_STOP', 'Kill-Switch', 'Arbeit aufgrund des aktivierten Kill-Switches eingestellt.')
+    # KI-Logik: Offene Aufgaben fortlaufend über die registrierten Handler bearbeiten
+    if args.concurrency > 0:
+        orchestrator = AsyncOrchestrator(manifest_store, ai_agent_name, task_dir=TASKS_DIR, history_dir=HISTORY_DIR,
+                                         input_source=hypothetical_input, concurrency=args.concurrency)
+        processed = asyncio.run(orchestrator.run(max_tasks=args.max_tasks, follow=args.follow))
+        if orchestrator.stop_reason is None and not processed:
+            print(idle_message(orchestrator.worker))
+    elif args.workers != 1:
+        pool = AgentPool(PROJECT_ROOT, args.workers or None, ai_agent_name, task_dir=TASKS_DIR,
+                         history_dir=HISTORY_DIR, input_source=hypothetical_input)
+        print(format_pool_report(pool.run(max_tasks=args.max_tasks, follow=args.follow)))
     else:
-        kill_keyword = manifest.get('kill_keyword', '')
-        hypothetical_input = "This is a normal message. No kill keyword here."
-        # Uncomment the line below to test the kill keyword functionality
-        # hypothetical_input = f"Urgent: {kill_keyword} - Stop all operations!"
-
-        if kill_keyword and kill_keyword in hypothetical_input:
-            print(f"Kill-Keyword '{kill_keyword}' erkannt. KI {ai_agent_name} stoppt die Arbeit.")
-            log_action(ai_agent_name, 'PROJECT_STOP', 'Kill-Keyword', f"Arbeit aufgrund des erkannten Kill-Keywords '{kill_keyword}' eingestellt.")
-        else:
-            for task in manifest['tasks']:
-                if task['status'] == 'open':
-                    if task['task_id'] == 'task_001_setup':
-                        process_task_001(ai_agent_name)
-                    else:
-                        print(f"Unbekannte Aufgabe: {task['task_id']}. Überspringe.")
-                    break
-            else:
-                print("Keine offenen Aufgaben gefunden.")
-
-
+        worker = create_worker(ai_agent_name)
+        processed = worker.run(max_tasks=args.max_tasks, follow=args.follow)
+        if worker.stop_reason is None and not processed and not worker.failed:
+            print(idle_message(worker))